@@ -0,0 +1,211 @@
+"""合并多位老师的表扬榜文件并统计
+
+按学科合并每个学生的表扬/批评次数，并按名单分组统计，可导出为 CSV 或
+JSON。文件较多时分块交给进程池并行读取，每块在工作进程中先汇总，
+主进程只合并各块的小计。
+
+    python aggregate.py 表扬榜目录 --roster students_name.txt -o 本周.csv
+"""
+import argparse
+import collections
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import binary_board
+import roster
+import storage
+
+PARALLEL_BYTES = 4 << 20  # 文件总大小小于此值（或只有一个 CPU）时直接读取，省去启动进程池的开销
+CHUNKS_PER_WORKER = 4
+
+
+def read_marks(path):
+    """读取一个表扬榜文件，返回 (学科, 姓名列表, 表扬列表, 批评列表)，不是表扬榜时返回 None"""
+    if storage.is_binary(path):
+        with binary_board.BinaryBoard(path) as board:
+            return board.subject, board.names(), board.flags('praise'), board.flags('criticism')
+    data = storage.read_board(path)
+    students = data.get('students') if isinstance(data, dict) else None
+    if not isinstance(students, dict) or not all(isinstance(state, dict) for state in students.values()):
+        return None
+    states = students.values()
+    return (data.get('subject', ''), list(students),
+            [bool(state.get('praise')) for state in states],
+            [bool(state.get('criticism')) for state in states])
+
+
+def summarize_files(paths):
+    """汇总一批文件：返回 (学科 -> 表扬榜数, 学科 -> {姓名: [表扬, 批评]}, 跳过的文件)
+
+    在工作进程中运行，所以是模块级函数。
+    """
+    boards = collections.Counter()
+    marks = {}
+    skipped = []
+    for path in paths:
+        try:
+            result = read_marks(path)
+        except (OSError, ValueError, UnicodeDecodeError):
+            result = None
+        if result is None:
+            skipped.append(path)
+            continue
+        subject, names, praise, criticism = result
+        boards[subject] += 1
+        counts = marks.setdefault(subject, {})
+        for name, p, c in zip(names, praise, criticism):
+            total = counts.get(name)
+            if total is None:
+                counts[name] = [int(p), int(c)]
+            else:
+                total[0] += p
+                total[1] += c
+    return boards, marks, skipped
+
+
+class BoardTotals:
+    """按学科合并后的统计结果"""
+
+    def __init__(self):
+        self.boards = collections.Counter()  # 学科 -> 表扬榜数
+        self.marks = {}  # 学科 -> {姓名: [表扬次数, 批评次数]}
+        self.skipped = []  # 无法读取或不是表扬榜的文件
+
+    def merge(self, boards, marks, skipped=()):
+        """合并一批文件的小计"""
+        self.boards.update(boards)
+        for subject, counts in marks.items():
+            target = self.marks.setdefault(subject, {})
+            for name, (praise, criticism) in counts.items():
+                total = target.get(name)
+                if total is None:
+                    target[name] = [praise, criticism]
+                else:
+                    total[0] += praise
+                    total[1] += criticism
+        self.skipped.extend(skipped)
+
+    @property
+    def subjects(self):
+        return sorted(self.boards)
+
+    def students(self, group_of=None):
+        """每个学生的合计和分学科次数，按表扬次数从多到少排序"""
+        group_of = group_of or {}
+        rows = {}
+        for subject, counts in self.marks.items():
+            for name, (praise, criticism) in counts.items():
+                row = rows.get(name)
+                if row is None:
+                    row = rows[name] = {'student': name, 'group': group_of.get(name, ''),
+                                        'praise': 0, 'criticism': 0, 'subjects': {}}
+                row['praise'] += praise
+                row['criticism'] += criticism
+                row['subjects'][subject] = {'praise': praise, 'criticism': criticism}
+        return sorted(rows.values(), key=lambda row: (-row['praise'], row['criticism'], row['student']))
+
+    def groups(self, group_of):
+        """每组的人数和表扬/批评合计，按名单中的组顺序"""
+        order = list(dict.fromkeys(group_of.values()))
+        totals = {group: {'group': group, 'students': 0, 'praise': 0, 'criticism': 0}
+                  for group in order}
+        for row in self.students(group_of):
+            total = totals.get(row['group'])
+            if total is None:
+                continue  # 不在名单中的学生
+            total['students'] += 1
+            total['praise'] += row['praise']
+            total['criticism'] += row['criticism']
+        return [totals[group] for group in order]
+
+    def to_dict(self, group_of=None):
+        return {
+            'boards': dict(sorted(self.boards.items())),
+            'students': self.students(group_of),
+            'groups': self.groups(group_of) if group_of else [],
+            'skipped': self.skipped,
+        }
+
+    def write_json(self, path, group_of=None):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(group_of), f, ensure_ascii=False, indent=4)
+
+    def write_csv(self, path, group_of=None):
+        """每个学生一行：合计和每个学科的表扬/批评次数（带 BOM，Excel 可直接打开）"""
+        subjects = self.subjects
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['student', 'group', 'praise', 'criticism']
+                            + [f'{subject}:{mode}' for subject in subjects
+                               for mode in ('praise', 'criticism')])
+            for row in self.students(group_of):
+                counts = row['subjects']
+                writer.writerow([row['student'], row['group'], row['praise'], row['criticism']]
+                                + [counts.get(subject, {}).get(mode, 0) for subject in subjects
+                                   for mode in ('praise', 'criticism')])
+
+    def write(self, path, group_of=None):
+        """按扩展名导出为 CSV 或 JSON"""
+        if path.lower().endswith('.csv'):
+            self.write_csv(path, group_of)
+        else:
+            self.write_json(path, group_of)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0  # 列出后被删除的文件由 summarize_files 跳过
+
+
+def merge_boards(paths, jobs=None, mp_context=None):
+    """读取并合并表扬榜文件，返回 BoardTotals
+
+    mp_context 为进程池的启动方式；在界面进程中调用时应传入 spawn。
+    """
+    paths = list(paths)
+    totals = BoardTotals()
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or sum(_file_size(path) for path in paths) < PARALLEL_BYTES:
+        totals.merge(*summarize_files(paths))
+        return totals
+    size = max(1, -(-len(paths) // (workers * CHUNKS_PER_WORKER)))
+    chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+    with ProcessPoolExecutor(workers, mp_context=mp_context) as pool:
+        for result in pool.map(summarize_files, chunks):
+            totals.merge(*result)
+    return totals
+
+
+def group_map(board_roster):
+    """名单中每个学生（key）所在组的名称"""
+    return {student.key: group.title
+            for group in board_roster.groups for student in group.students}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='合并表扬榜文件并统计')
+    parser.add_argument('sources', nargs='+', help='表扬榜文件或目录')
+    parser.add_argument('--roster', help='名单文件，用于按组统计')
+    parser.add_argument('--class', dest='class_name', help='名单中的班级')
+    parser.add_argument('-o', '--output', help='输出文件（.csv 或 .json，默认输出 JSON 到标准输出）')
+    parser.add_argument('-j', '--jobs', type=int, help='并行读取的进程数')
+    args = parser.parse_args(argv)
+
+    group_of = None
+    if args.roster:
+        group_of = group_map(roster.pick_roster(roster.load_rosters(args.roster), args.class_name))
+    totals = merge_boards(storage.find_boards(args.sources), args.jobs)
+    if args.output:
+        totals.write(args.output, group_of)
+    else:
+        json.dump(totals.to_dict(group_of), sys.stdout, ensure_ascii=False, indent=4)
+    print(f'{sum(totals.boards.values())} boards, {len(totals.skipped)} skipped', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""表扬榜趋势分析
+
+把表扬榜文件转换为 (表扬榜 × 学生) 的列数据，计算每个学生的表扬率和
+批评率、按学科/按周/按组的比率、每周表扬率趋势，以及连续被批评的次数。
+
+每个文件读取后的部分结果（学科、日期、姓名、标记列）按路径缓存在
+analytics.cache（marshal 格式）中，以修改时间和大小判断是否有变化，
+只有新增或修改的文件需要重新读取。装有 NumPy 时用向量化计算，
+否则用纯 Python 计算，结果相同。
+
+    python analytics.py 表扬榜目录 --roster students_name.txt
+"""
+import argparse
+import json
+import marshal
+import os
+import sys
+from datetime import datetime
+
+import aggregate
+import roster
+import storage
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选的
+    np = None
+
+CACHE_FILE = 'analytics.cache'
+SPARKS = '▁▂▃▄▅▆▇█'
+
+
+class BoardCache:
+    """每个文件的部分结果：路径 -> ((mtime_ns, 大小), (学科, 日期, 姓名, 表扬列, 批评列))
+
+    标记列是每人一个字节（0/1）的 bytes，可直接作为 NumPy 数组使用。
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                self._entries = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            self._entries = {}
+        self._dirty = False
+        self.reread = 0  # 本次重新读取的文件数
+
+    def get(self, path):
+        """返回文件的部分结果，不是表扬榜文件时返回 None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._entries.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        self.reread += 1
+        try:
+            marks = aggregate.read_marks(path)
+        except (OSError, ValueError, UnicodeDecodeError):
+            marks = None
+        entry = None
+        if marks is not None:
+            subject, names, praise, criticism = marks
+            day = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d')
+            entry = (subject, day, tuple(names), bytes(praise), bytes(criticism))
+        self._entries[path] = (stamp, entry)
+        self._dirty = True
+        return entry
+
+    def prune(self, paths):
+        """删除不在 paths 中的文件的缓存"""
+        keep = set(paths)
+        for path in [path for path in self._entries if path not in keep]:
+            del self._entries[path]
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError:
+            pass  # 缓存写不进去时下次重新读取即可
+
+
+class Columns:
+    """按日期排序的表扬榜和所有出现过的学生"""
+
+    def __init__(self, entries):
+        entries = sorted(entries, key=lambda entry: entry[1])
+        self.students = []
+        index = {}
+        self.subjects = []
+        self.days = []
+        self.rows = []  # 每张表扬榜：(学生下标列表, 表扬列, 批评列)
+        for subject, day, names, praise, criticism in entries:
+            columns = []
+            for name in names:
+                i = index.get(name)
+                if i is None:
+                    i = index[name] = len(self.students)
+                    self.students.append(name)
+                columns.append(i)
+            self.subjects.append(subject)
+            self.days.append(day)
+            self.rows.append((columns, praise, criticism))
+        self.weeks = [week_of(day) for day in self.days]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def week_of(day):
+    year, week, _ = datetime.strptime(day, '%Y-%m-%d').isocalendar()
+    return f'{year}-W{week:02d}'
+
+
+def _week_spans(weeks):
+    """按周连续分段：[(周, 起始行, 结束行)]"""
+    spans = []
+    for row, week in enumerate(weeks):
+        if spans and spans[-1][0] == week:
+            spans[-1][2] = row + 1
+        else:
+            spans.append([week, row, row + 1])
+    return spans
+
+
+def _reduce_numpy(columns):
+    """向量化计算：三个 (表扬榜 × 学生) 的矩阵上做按列/按行归约"""
+    shape = (len(columns), len(columns.students))
+    present = np.zeros(shape, dtype=bool)
+    praise = np.zeros(shape, dtype=bool)
+    criticism = np.zeros(shape, dtype=bool)
+    for row, (index, p, c) in enumerate(columns.rows):
+        index = np.asarray(index, dtype=np.intp)
+        present[row, index] = True
+        praise[row, index] = np.frombuffer(p, dtype=np.uint8)
+        criticism[row, index] = np.frombuffer(c, dtype=np.uint8)
+
+    # 连续被批评：按时间逐行推进，所有学生一起计算；缺席的表扬榜不打断连续
+    run = np.zeros(shape[1], dtype=np.int64)
+    longest = np.zeros(shape[1], dtype=np.int64)
+    for row in range(shape[0]):
+        run = np.where(present[row], (run + 1) * criticism[row], run)
+        np.maximum(longest, run, out=longest)
+
+    def by_key(keys):
+        names = sorted(set(keys))
+        code_of = {name: i for i, name in enumerate(names)}
+        codes = np.array([code_of[key] for key in keys], dtype=np.intp)
+        sums = [np.bincount(codes, weights=matrix.sum(axis=1), minlength=len(names))
+                for matrix in (present, praise, criticism)]
+        boards = np.bincount(codes, minlength=len(names))
+        return {name: (int(boards[i]), int(sums[0][i]), int(sums[1][i]), int(sums[2][i]))
+                for i, name in enumerate(names)}
+
+    spans = _week_spans(columns.weeks)
+    starts = [start for week, start, end in spans]
+    weekly_present = np.add.reduceat(present, starts, axis=0) if starts else present[:0]
+    weekly_praise = np.add.reduceat(praise, starts, axis=0) if starts else praise[:0]
+    return {
+        'boards': present.sum(axis=0).tolist(),
+        'praise': praise.sum(axis=0).tolist(),
+        'criticism': criticism.sum(axis=0).tolist(),
+        'longest': longest.tolist(),
+        'current': run.tolist(),
+        'subjects': by_key(columns.subjects),
+        'weeks': by_key(columns.weeks),
+        'weekly_present': weekly_present.tolist(),
+        'weekly_praise': weekly_praise.tolist(),
+    }
+
+
+def _reduce_python(columns):
+    """没有 NumPy 时的等价计算"""
+    size = len(columns.students)
+    boards, praise, criticism = [0] * size, [0] * size, [0] * size
+    run, longest = [0] * size, [0] * size
+    subjects, weeks = {}, {}
+    spans = _week_spans(columns.weeks)
+    weekly_present = [[0] * size for _ in spans]
+    weekly_praise = [[0] * size for _ in spans]
+    span = -1
+    for row, (index, p, c) in enumerate(columns.rows):
+        if span + 1 < len(spans) and spans[span + 1][1] == row:
+            span += 1
+        week_present, week_praise = weekly_present[span], weekly_praise[span]
+        for i, pi, ci in zip(index, p, c):
+            boards[i] += 1
+            praise[i] += pi
+            criticism[i] += ci
+            week_present[i] += 1
+            week_praise[i] += pi
+            run[i] = run[i] + 1 if ci else 0
+            if run[i] > longest[i]:
+                longest[i] = run[i]
+        for totals, key in ((subjects, columns.subjects[row]), (weeks, columns.weeks[row])):
+            total = totals.setdefault(key, [0, 0, 0, 0])
+            total[0] += 1
+            total[1] += len(index)
+            total[2] += sum(p)
+            total[3] += sum(c)
+    return {
+        'boards': boards,
+        'praise': praise,
+        'criticism': criticism,
+        'longest': longest,
+        'current': run,
+        'subjects': {key: tuple(value) for key, value in sorted(subjects.items())},
+        'weeks': {key: tuple(value) for key, value in sorted(weeks.items())},
+        'weekly_present': weekly_present,
+        'weekly_praise': weekly_praise,
+    }
+
+
+def _rate(count, total):
+    return round(count / total, 4) if total else 0.0
+
+
+def sparkline(rates):
+    """把 0~1 的比率序列画成一行字符（没有数据的周为空格）"""
+    return ''.join(' ' if rate is None else SPARKS[min(int(rate * len(SPARKS)), len(SPARKS) - 1)]
+                   for rate in rates)
+
+
+def analyze(paths, group_of=None, cache=None, use_numpy=None):
+    """分析表扬榜文件，返回可直接转为 JSON 的结果"""
+    group_of = group_of or {}
+    paths = [os.path.abspath(path) for path in paths]
+    own_cache = cache is None
+    if own_cache:
+        cache = BoardCache()
+    entries = [entry for entry in map(cache.get, paths) if entry is not None]
+    if own_cache:
+        cache.prune(paths)
+        cache.save()
+
+    columns = Columns(entries)
+    use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+    raw = _reduce_numpy(columns) if use_numpy else _reduce_python(columns)
+
+    week_names = [week for week, start, end in _week_spans(columns.weeks)]
+    students = []
+    groups = {}
+    for i, name in enumerate(columns.students):
+        boards = raw['boards'][i]
+        trend = [_rate(week_praise[i], week_present[i]) if week_present[i] else None
+                 for week_praise, week_present in zip(raw['weekly_praise'], raw['weekly_present'])]
+        group = group_of.get(name, '')
+        students.append({
+            'student': name,
+            'group': group,
+            'boards': boards,
+            'praise': raw['praise'][i],
+            'criticism': raw['criticism'][i],
+            'praise_rate': _rate(raw['praise'][i], boards),
+            'criticism_rate': _rate(raw['criticism'][i], boards),
+            'longest_streak': raw['longest'][i],
+            'current_streak': raw['current'][i],
+            'trend': trend,
+        })
+        total = groups.setdefault(group, [0, 0, 0])
+        total[0] += boards
+        total[1] += raw['praise'][i]
+        total[2] += raw['criticism'][i]
+    students.sort(key=lambda row: (-row['praise_rate'], row['student']))
+
+    def key_rows(name, stats):
+        return [{name: key, 'boards': boards,
+                 'praise_rate': _rate(praise, present), 'criticism_rate': _rate(criticism, present)}
+                for key, (boards, present, praise, criticism) in stats.items()]
+
+    return {
+        'engine': 'numpy' if use_numpy else 'python',
+        'boards': len(columns),
+        'weeks': week_names,
+        'students': students,
+        'subjects': key_rows('subject', raw['subjects']),
+        'by_week': key_rows('week', raw['weeks']),
+        'groups': [{'group': group, 'praise_rate': _rate(praise, boards),
+                    'criticism_rate': _rate(criticism, boards)}
+                   for group, (boards, praise, criticism) in groups.items() if group],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='表扬榜趋势分析')
+    parser.add_argument('sources', nargs='+', help='表扬榜文件或目录')
+    parser.add_argument('--roster', help='名单文件，用于按组统计')
+    parser.add_argument('--class', dest='class_name', help='名单中的班级')
+    parser.add_argument('--no-numpy', action='store_true', help='不使用 NumPy')
+    args = parser.parse_args(argv)
+
+    group_of = None
+    if args.roster:
+        group_of = aggregate.group_map(
+            roster.pick_roster(roster.load_rosters(args.roster), args.class_name))
+    report = analyze(storage.find_boards(args.sources), group_of,
+                     use_numpy=False if args.no_numpy else None)
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=4)
+
+
+if __name__ == '__main__':
+    main()
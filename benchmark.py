@@ -0,0 +1,301 @@
+"""表扬榜性能基准
+
+用合成名单（默认 48、500、5000、50000 人）测量状态切换、整榜加载、
+保存、历史存档查询、名单解析和控件创建的耗时，结果输出为 JSON，
+可用 --compare 与之前的结果对比。
+
+纯逻辑的用例不需要显示器；需要 Tk 的用例在有显示器（或能启动 Xvfb）时
+运行，否则跳过。
+
+    python benchmark.py --output bench.json
+    python benchmark.py --sizes 48,500 --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from board_state import BoardState
+import history
+import roster
+import storage
+
+DEFAULT_SIZES = (48, 500, 5000, 50000)
+TK_MAX_SIZE = 5000  # 控件用例的最大人数，再大创建控件太慢
+SUBJECTS = ('语文', '数学', '英语', '物理', '化学', '政治', '历史', '地理', '生物')
+NETWORK_ENV_VARS = ('PRAISE_BOARD_SYNC', 'PRAISE_BOARD_LIVE')  # 界面用例运行时清除
+
+
+def synthetic_names(size):
+    return [f'学生{i:05d}' for i in range(size)]
+
+
+def synthetic_board(names, seed=0):
+    """生成保存文件结构的随机表扬榜"""
+    rng = random.Random(seed)
+    return {
+        'subject': rng.choice(SUBJECTS),
+        'mode': 'praise',
+        'students': {name: {'praise': rng.random() < 0.3, 'criticism': rng.random() < 0.1}
+                     for name in names}
+    }
+
+
+def timed(func, repeat):
+    """运行 repeat 次，返回最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class Benchmark:
+    def __init__(self, workdir, repeat):
+        self.workdir = workdir
+        self.repeat = repeat
+        self.results = []
+        self.skipped = []
+
+    def record(self, case, size, seconds, ops=1):
+        self.results.append({
+            'case': case,
+            'size': size,
+            'ops': ops,
+            'seconds': round(seconds, 6),
+            'per_op_us': round(seconds / ops * 1e6, 3),
+        })
+        print(f'{case:<24} {size:>7}  {seconds * 1000:10.3f} ms  '
+              f'{seconds / ops * 1e6:10.3f} us/op', file=sys.stderr)
+
+    def skip(self, case, size, reason):
+        self.skipped.append({'case': case, 'size': size, 'reason': reason})
+        print(f'{case:<24} {size:>7}  skipped: {reason}', file=sys.stderr)
+
+    # ---- 纯逻辑 ----
+
+    def bench_toggle(self, size):
+        names = synthetic_names(size)
+        state = BoardState(names)
+        state.subscribe(lambda event, *args: None)
+        ops = max(size, 10000)
+        order = [names[i % size] for i in range(ops)]
+
+        def run():
+            for name in order:
+                state.toggle(name)
+        self.record('toggle', size, timed(run, self.repeat), ops)
+
+    def bench_load(self, size):
+        names = synthetic_names(size)
+        data = synthetic_board(names)
+        state = BoardState(names)
+        self.record('load_dict', size, timed(lambda: state.load_dict(data), self.repeat))
+        for ext in ('.json', '.pboard'):
+            path = os.path.join(self.workdir, f'load_{size}{ext}')
+            storage.write_board(path, data)
+            self.record(f'read_board{ext}', size,
+                        timed(lambda: state.load_dict(storage.read_board(path)), self.repeat))
+
+    def bench_save(self, size):
+        names = synthetic_names(size)
+        state = BoardState(names)
+        state.load_dict(synthetic_board(names))
+        for ext in ('.json', '.pboard'):
+            path = os.path.join(self.workdir, f'save_{size}{ext}')
+            self.record(f'save{ext}', size,
+                        timed(lambda: storage.write_board(path, state.to_dict()), self.repeat))
+
+    def bench_roster(self, size):
+        path = os.path.join(self.workdir, f'roster_{size}.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('class,group,seat,id,name\n')
+            for i, name in enumerate(synthetic_names(size)):
+                f.write(f'{i // 48 + 1},{i % 48 // 4 + 1},{i % 4 + 1},{i},{name}\n')
+        self.record('roster_csv', size, timed(lambda: roster.load_rosters(path), self.repeat))
+
+    def bench_archive(self, size, boards=180):
+        """一学年（boards 张表扬榜）的存档写入和查询"""
+        path = os.path.join(self.workdir, f'history_{size}.db')
+        if os.path.exists(path):
+            os.remove(path)
+        archive = history.BoardHistory(path)
+        names = synthetic_names(size)
+        day = datetime(2025, 9, 1, 8)
+        start = time.perf_counter()
+        for i in range(boards):
+            data = synthetic_board(names, seed=i)
+            archive.record(data, os.path.join(self.workdir, f'{data["subject"]}.json'),
+                           day + timedelta(days=i))
+        self.record('archive_record', size, time.perf_counter() - start, boards)
+        student = names[len(names) // 2]
+        self.record('archive_student', size, timed(
+            lambda: archive.student_summary(student, '2025-09-01', '2026-07-01'), self.repeat))
+        self.record('archive_totals', size, timed(
+            lambda: archive.totals('2025-09-01', '2026-07-01', '数学'), self.repeat))
+        archive.close()
+
+    # ---- 需要 Tk ----
+
+    def bench_widgets(self, size, tk, display_mode='widgets'):
+        """界面用例；display_mode 为 canvas 时用例名加 canvas_ 前缀"""
+        import praise_board
+        prefix = '' if display_mode == 'widgets' else f'{display_mode}_'
+        board_dir = os.path.join(self.workdir, f'board_{size}_{display_mode}')
+        os.makedirs(board_dir, exist_ok=True)
+        with open(os.path.join(board_dir, 'students_name.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(synthetic_names(size)))
+        with open(os.path.join(board_dir, 'preferences.json'), 'w', encoding='utf-8') as f:
+            json.dump({'journal': False, 'display_mode': display_mode, 'sync_url': ''}, f)
+
+        # 不同步、不开实时展示：基准的大量点击不能进入发件箱或上传，耗时也不含网络
+        environ = {var: os.environ.pop(var) for var in NETWORK_ENV_VARS if var in os.environ}
+        cwd = os.getcwd()
+        os.chdir(board_dir)
+        root = app = None
+        try:
+            root = tk.Tk()
+            start = time.perf_counter()
+            app = praise_board.PraiseBoard(root)
+            root.update()
+            self.record(f'build_{display_mode}', size, time.perf_counter() - start)
+
+            names = list(app.state.names)
+            ops = min(size, 1000)
+
+            def run():
+                for name in names[:ops]:
+                    app.toggle_check(name)
+                app.redraw.flush()
+                root.update_idletasks()
+            self.record(f'{prefix}toggle_render', size, timed(run, self.repeat), ops)
+            self.record(f'{prefix}mode_repaint', size, timed(
+                lambda: (app.mode.set('criticism' if app.mode.get() == 'praise' else 'praise'),
+                         app.redraw.flush(), root.update_idletasks()), self.repeat))
+        finally:
+            # 每个用例一个 Tk 实例，关闭它的后台线程和文件监视，不留给下一个用例
+            if app is not None:
+                app.saver.close()
+                app.watcher.close()
+                if app.sync is not None:
+                    app.sync.stop()
+            if root is not None:
+                root.destroy()
+            os.chdir(cwd)
+            os.environ.update(environ)
+
+
+def start_display():
+    """确保有可用的显示器，必要时启动 Xvfb；返回 (tkinter 模块, Xvfb 进程, 跳过原因)"""
+    xvfb = None
+    if not os.environ.get('DISPLAY') and sys.platform.startswith('linux'):
+        if not shutil.which('Xvfb'):
+            return None, None, 'no display and Xvfb not found'
+        # -displayfd：由 Xvfb 选一个空闲的显示器号，就绪后写入管道
+        read_fd, write_fd = os.pipe()
+        xvfb = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', '1920x1080x24'],
+                                pass_fds=(write_fd,),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            display = pipe.readline().strip()
+        if not display:
+            xvfb.wait()
+            return None, None, 'Xvfb failed to start'
+        os.environ['DISPLAY'] = ':' + display
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+    except Exception as e:
+        if xvfb is not None:
+            xvfb.terminate()
+        return None, None, f'Tk unavailable: {e}'
+    return tk, xvfb, None
+
+
+def compare(results, baseline_path):
+    """打印与之前结果相比的耗时变化"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['case'], r['size']): r for r in json.load(f)['results']}
+    print(f'{"case":<24} {"size":>7} {"before":>12} {"after":>12} {"change":>8}', file=sys.stderr)
+    for result in results:
+        before = baseline.get((result['case'], result['size']))
+        if before is None:
+            continue
+        change = (result['per_op_us'] / before['per_op_us'] - 1) * 100 if before['per_op_us'] else 0
+        print(f'{result["case"]:<24} {result["size"]:>7} {before["per_op_us"]:>10.3f}us '
+              f'{result["per_op_us"]:>10.3f}us {change:>+7.1f}%', file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='表扬榜性能基准')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='逗号分隔的名单人数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例重复次数（取最短）')
+    parser.add_argument('--output', help='结果 JSON 文件（默认输出到标准输出）')
+    parser.add_argument('--compare', help='与之前的结果 JSON 对比')
+    parser.add_argument('--no-tk', action='store_true', help='跳过需要 Tk 的用例')
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+
+    workdir = tempfile.mkdtemp(prefix='praise_bench_')
+    bench = Benchmark(workdir, args.repeat)
+    tk = xvfb = None
+    try:
+        for size in sizes:
+            bench.bench_toggle(size)
+            bench.bench_load(size)
+            bench.bench_save(size)
+            bench.bench_roster(size)
+            bench.bench_archive(size)
+
+        if args.no_tk:
+            reason = 'disabled with --no-tk'
+        else:
+            tk, xvfb, reason = start_display()
+        for size in sizes:
+            if reason:
+                bench.skip('build_widgets', size, reason)
+            elif size > TK_MAX_SIZE:
+                bench.skip('build_widgets', size, f'more than {TK_MAX_SIZE} students')
+            else:
+                bench.bench_widgets(size, tk)
+            if reason:
+                bench.skip('build_canvas', size, reason)
+            else:
+                bench.bench_widgets(size, tk, 'canvas')
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'repeat': args.repeat,
+        },
+        'results': bench.results,
+        'skipped': bench.skipped,
+    }
+    if args.compare:
+        compare(bench.results, args.compare)
+    text = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""表扬榜二进制格式（.pboard）
+
+文件结构（小端序）：
+    头部      magic 'PBRD'、版本 u16、模式 u8、保留 u8、人数 u32、学科长度 u32
+    学科      UTF-8
+    字符串表  (人数 + 1) 个 u32 偏移量（第 i 人姓名起始位置，末项为总长度 + 1），
+              随后是以 NUL 分隔的所有姓名的 UTF-8 字节
+    表扬列    按位存放，每人 1 位
+    批评列    同上
+    文档版本  u32（仅版本 2；每次保存加一，用于判断文件是否被其他程序修改过）
+
+数据中没有文档版本（'version'）时仍写为版本 1。
+"""
+import mmap
+import struct
+
+from board_state import MODES
+
+BINARY_EXT = '.pboard'
+MAGIC = b'PBRD'
+SCHEMA_VERSION = 2
+HEADER = struct.Struct('<4sHBxII')
+TRAILER = struct.Struct('<I')  # 版本 2 的文档版本
+# 字节 -> 8 个标记（低位在前）
+_BITS = [tuple(bool(byte >> bit & 1) for bit in range(8)) for byte in range(256)]
+
+
+def _pack_bits(flags):
+    bits = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def encode(data):
+    """把保存文件的字典结构编码为二进制"""
+    students = data.get('students', {})
+    if any('\0' in name for name in students):
+        raise ValueError('学生姓名中不能有 NUL 字符')
+    names = [name.encode('utf-8') for name in students]
+    subject = data.get('subject', '').encode('utf-8')
+    mode = MODES.index(data.get('mode', 'praise'))
+
+    offsets = []
+    position = 0
+    for name in names:
+        offsets.append(position)
+        position += len(name) + 1
+    offsets.append(position)
+    states = list(students.values())
+    version = data.get('version')
+    if version is not None and not 0 <= version <= 0xFFFFFFFF:
+        raise ValueError(f'文档版本超出范围: {version}')
+    return b''.join([
+        HEADER.pack(MAGIC, 1 if version is None else 2, mode, len(names), len(subject)),
+        subject,
+        struct.pack(f'<{len(offsets)}I', *offsets),
+        b'\0'.join(names),
+        _pack_bits([state.get('praise', False) for state in states]),
+        _pack_bits([state.get('criticism', False) for state in states]),
+        b'' if version is None else TRAILER.pack(version),
+    ])
+
+
+class BinaryBoard:
+    """以内存映射方式读取 .pboard 文件，只解码用到的部分
+
+    source 为文件路径，或已读入内存的文件内容（bytes）。
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            self._map = source
+        else:
+            with open(source, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except ValueError:
+            self.close()
+            raise
+
+    def _parse(self):
+        """检查头部和各部分的长度，截断或损坏的文件抛出 ValueError"""
+        size = len(self._map)
+        if size < HEADER.size:
+            raise ValueError('不是表扬榜二进制文件')
+        magic, version, mode, count, subject_len = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError('不是表扬榜二进制文件')
+        if not 1 <= version <= SCHEMA_VERSION:
+            raise ValueError(f'不支持的文件版本: {version}')
+        if mode >= len(MODES):
+            raise ValueError(f'未知模式: {mode}')
+        self.version = version
+        self.mode = MODES[mode]
+        self._count = count
+        self._subject_at = HEADER.size
+        self._offsets_at = self._subject_at + subject_len
+        self._names_at = self._offsets_at + 4 * (count + 1)
+        if self._names_at > size:
+            raise ValueError('文件不完整')
+        names_end = struct.unpack_from('<I', self._map, self._offsets_at + 4 * count)[0]
+        if count and not names_end:
+            raise ValueError('文件已损坏')
+        names_len = max(names_end - 1, 0)
+        bits_len = (count + 7) // 8
+        self._bits_at = {
+            'praise': self._names_at + names_len,
+            'criticism': self._names_at + names_len + bits_len,
+        }
+        trailer = TRAILER.size if version >= 2 else 0
+        if self._bits_at['criticism'] + bits_len + trailer != size:
+            raise ValueError('文件不完整' if size < self._bits_at['criticism'] + bits_len + trailer
+                             else '文件已损坏')
+        self.board_version = None  # 文档版本，版本 1 的文件没有
+        if trailer:
+            self.board_version = TRAILER.unpack_from(self._map, size - trailer)[0]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def subject(self):
+        return self._map[self._subject_at:self._offsets_at].decode('utf-8')
+
+    def name(self, index):
+        """第 index 名学生的姓名"""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start, end = struct.unpack_from('<II', self._map, self._offsets_at + 4 * index)
+        return self._map[self._names_at + start:self._names_at + end - 1].decode('utf-8')
+
+    def get(self, index, mode):
+        """第 index 名学生在指定模式下的标记"""
+        byte = self._map[self._bits_at[mode] + (index >> 3)]
+        return bool(byte >> (index & 7) & 1)
+
+    def marked(self, mode):
+        """指定模式下被标记的学生下标（只扫描非零字节）"""
+        start = self._bits_at[mode]
+        bits = self._map[start:start + (self._count + 7) // 8]
+        return [i << 3 | bit
+                for i, byte in enumerate(bits) if byte
+                for bit in range(8) if byte >> bit & 1]
+
+    def flags(self, mode):
+        """指定模式下所有学生的标记列表"""
+        start = self._bits_at[mode]
+        bits = self._map[start:start + (self._count + 7) // 8]
+        return [flag for byte in bits for flag in _BITS[byte]][:self._count]
+
+    def names(self):
+        """所有学生的姓名"""
+        if not self._count:
+            return []
+        names = self._map[self._names_at:self._bits_at['praise']].decode('utf-8').split('\0')
+        if len(names) != self._count:
+            raise ValueError('文件已损坏')
+        return names
+
+    def to_dict(self):
+        """解码为保存文件的字典结构"""
+        data = {
+            'subject': self.subject,
+            'mode': self.mode,
+            'students': {
+                name: {'praise': praise, 'criticism': criticism}
+                for name, praise, criticism
+                in zip(self.names(), self.flags('praise'), self.flags('criticism'))
+            }
+        }
+        if self.board_version is not None:
+            data['version'] = self.board_version
+        return data
+
+
+def read(path):
+    """读取 .pboard 文件为保存文件的字典结构"""
+    with BinaryBoard(path) as board:
+        return board.to_dict()
+
+
+def decode(payload):
+    """把已读入的 .pboard 文件内容解码为保存文件的字典结构"""
+    return BinaryBoard(payload).to_dict()
@@ -0,0 +1,281 @@
+"""无界面批量处理表扬榜文件（不导入 tkinter）
+
+对每个文件：读取 -> 依次执行操作 -> 按与界面保存相同的结构
+（BoardState.to_dict）原子写回。文件较多时用进程池并行处理。
+
+操作可以在命令行用 --op 给出，也可以用 --ops 从文件或标准输入（-）
+逐行读取 JSON 记录。记录的格式与操作日志相同，另有几种批量操作：
+
+    {"op": "mark", "student": "张三", "mode": "praise", "value": true}
+    {"op": "toggle", "student": "张三"}             mode 省略时为表扬榜当前模式
+    {"op": "batch", "changes": [["张三", "praise", true], ...]}
+    {"op": "toggle_group", "students": ["张三", "李四"]}
+    {"op": "mode", "value": "criticism"}
+    {"op": "subject", "value": "数学"}
+    {"op": "reset"}  {"op": "invert"}  {"op": "copy", "source": "praise", "target": "criticism"}
+    {"op": "add", "student": "王五"}  {"op": "remove", "student": "王五"}
+    {"op": "snapshot", "data": {...}}
+
+带 "file" 字段的记录只作用于该文件（文件不必在命令行中列出），
+其他记录作用于所有文件。--op 的简写：mark:姓名 unmark:姓名 toggle:姓名
+mode:criticism subject:数学 reset invert copy:praise:criticism，或一个 JSON 对象。
+
+    python board_batch.py 表扬榜目录 --op subject:数学 --op reset
+    python board_batch.py --create --roster students_name.txt --ops - < ops.jsonl
+    python board_batch.py 表扬榜目录 --check
+
+每个文件输出一行 JSON 结果，有文件出错时退出码为 1。
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import roster
+import shared_board
+import storage
+from board_state import MODES, BoardState
+
+PARALLEL_THRESHOLD = 8  # 少于这么多文件时直接处理，省去启动进程池的开销
+FORMATS = {'json': '.json', 'pboard': storage.binary_board.BINARY_EXT}
+
+
+def validate_board(data):
+    """检查表扬榜数据的结构，返回问题列表（没有问题时为空）"""
+    if not isinstance(data, dict):
+        return ['不是对象']
+    problems = []
+    if not isinstance(data.get('subject', ''), str):
+        problems.append('subject 不是字符串')
+    if not isinstance(data.get('version', 0), int):
+        problems.append('version 不是整数')
+    if data.get('mode', 'praise') not in MODES:
+        problems.append(f'未知模式: {data.get("mode")!r}')
+    students = data.get('students')
+    if not isinstance(students, dict):
+        problems.append('students 不是对象')
+        return problems
+    for name, state in students.items():
+        if not isinstance(state, dict):
+            problems.append(f'{name}: 不是对象')
+            continue
+        for mode in MODES:
+            if not isinstance(state.get(mode, False), bool):
+                problems.append(f'{name}: {mode} 不是布尔值')
+        unknown = set(state) - set(MODES)
+        if unknown:
+            problems.append(f'{name}: 未知字段 {sorted(unknown)}')
+    return problems
+
+
+def parse_op(text):
+    """把 --op 参数（简写或 JSON 对象）转换为操作记录"""
+    text = text.strip()
+    if text.startswith('{'):
+        return json.loads(text)
+    kind, _, arg = text.partition(':')
+    if kind in ('mark', 'unmark'):
+        return {'op': 'mark', 'student': arg, 'value': kind == 'mark'}
+    if kind in ('toggle', 'add', 'remove'):
+        return {'op': kind, 'student': arg}
+    if kind in ('mode', 'subject'):
+        return {'op': kind, 'value': arg}
+    if kind == 'copy':
+        source, _, target = arg.partition(':')
+        return {'op': 'copy', 'source': source or 'praise', 'target': target or 'criticism'}
+    if kind in ('reset', 'invert'):
+        return {'op': kind, 'mode': arg} if arg else {'op': kind}
+    raise ValueError(f'未知操作: {text!r}')
+
+
+def read_ops(lines):
+    """逐行读取 JSON 操作记录（空行和 # 开头的行忽略）"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'第 {number} 行: {e}') from None
+        if not isinstance(record, dict) or 'op' not in record:
+            raise ValueError(f'第 {number} 行: 不是操作记录')
+        yield record
+
+
+def _student(state, name):
+    if name not in state:
+        raise ValueError(f'名单中没有学生: {name!r}')
+    return name
+
+
+def apply_op(state, op):
+    """把一条操作应用到 BoardState；学生不存在或操作无效时抛出 ValueError"""
+    kind = op.get('op')
+    mode = op.get('mode')
+    if kind == 'mark':
+        state.set(_student(state, op['student']), op.get('value', True), mode)
+    elif kind == 'toggle':
+        state.toggle(_student(state, op['student']), mode)
+    elif kind == 'batch':
+        state.set_many([(_student(state, name), change_mode, value)
+                        for name, change_mode, value in op['changes']])
+    elif kind == 'toggle_group':
+        state.toggle_group([_student(state, name) for name in op['students']], mode)
+    elif kind in ('mode', 'subject'):
+        (state.set_mode if kind == 'mode' else state.set_subject)(op['value'])
+    elif kind == 'reset':
+        state.reset()
+    elif kind == 'invert':
+        state.invert(mode)
+    elif kind == 'copy':
+        state.copy_marks(op.get('source', 'praise'), op.get('target', 'criticism'))
+    elif kind == 'add':
+        state.add_student(op['student'])
+    elif kind == 'remove':
+        state.remove_student(_student(state, op['student']))
+    elif kind == 'snapshot':
+        problems = validate_board(op['data'])
+        if problems:
+            raise ValueError('快照无效: ' + '; '.join(problems))
+        state.load_dict(op['data'])
+    else:
+        raise ValueError(f'未知操作: {kind!r}')
+
+
+def output_path(path, options):
+    """结果文件的路径：默认写回原文件，可指定输出目录和格式"""
+    directory = options.get('output') or os.path.dirname(path)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    ext = FORMATS.get(options.get('format'), ext or '.json')
+    return os.path.join(directory, stem + ext)
+
+
+def process_board(task):
+    """处理一个文件，返回结果摘要
+
+    在工作进程中运行，所以是模块级函数；task 为 (路径, 操作列表, 选项)。
+    写入时对写入的文件（原文件或 -o/--format 指定的结果文件）持有与界面
+    相同的文件锁，界面保存时会合并这里的修改；读取原文件不需要加锁。
+    """
+    path, ops, options = task
+    result = {'file': path}
+    try:
+        target = output_path(path, options)
+        if options.get('check') or options.get('dry_run'):
+            _process(path, target, ops, options, result)
+        else:
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            with shared_board.FileLock(target):
+                _process(path, target, ops, options, result)
+        result['ok'] = True
+    except (OSError, ValueError, KeyError, TypeError, UnicodeDecodeError) as e:
+        result.update(ok=False, error=f'{type(e).__name__}: {e}')
+    return result
+
+
+def _process(path, target, ops, options, result):
+    if os.path.exists(path):
+        data = storage.read_board(path)
+    elif options.get('create'):
+        data = {'subject': '', 'mode': 'praise', 'students': {}}
+    else:
+        raise FileNotFoundError('文件不存在')
+    problems = validate_board(data)
+    if problems:
+        raise ValueError('; '.join(problems))
+    if options.get('check'):
+        return
+
+    names = options.get('names') or list(data['students'])
+    state = BoardState(names, mode=data.get('mode', 'praise'))
+    state.load_dict(data)
+    changes = []
+    state.subscribe(lambda event, *args: changes.append(event))
+    for op in ops:
+        apply_op(state, op)
+
+    board = state.to_dict()  # 与界面保存的结构相同
+    version = data.pop('version', None)
+    result.update(ops=len(ops), changed=bool(changes) or board != data,
+                  praise=state.count('praise'), criticism=state.count('criticism'))
+    if not options.get('dry_run') and (result['changed'] or options.get('output')
+                                       or options.get('format') or not os.path.exists(path)):
+        board['version'] = (version or 0) + 1
+        storage.write_board(target, board)
+        result['output'] = target
+
+
+def plan(sources, ops):
+    """按文件分配操作：返回 [(路径, 操作列表)]，操作保持给出的顺序"""
+    common = []  # (序号, 操作)
+    targeted = {}  # 路径 -> [(序号, 操作)]
+    for seq, op in enumerate(ops):
+        path = op.get('file')
+        if path is None:
+            common.append((seq, op))
+        else:
+            op = {key: value for key, value in op.items() if key != 'file'}
+            targeted.setdefault(os.path.abspath(path), []).append((seq, op))
+    # 不存在的文件 find_boards 找不到，也交给 process_board（--create 时新建，否则报错）
+    missing = [os.path.abspath(source) for source in sources if not os.path.exists(source)]
+    paths = list(dict.fromkeys(storage.find_boards(sources) + missing + list(targeted)))
+    return [(path, [op for seq, op in heapq.merge(common, targeted.get(path, []),
+                                                   key=lambda item: item[0])])
+            for path in paths]
+
+
+def run(tasks, jobs=None):
+    """处理所有文件，按文件顺序逐个产出结果"""
+    if len(tasks) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            yield from pool.map(process_board, tasks, chunksize=4)
+    else:
+        yield from map(process_board, tasks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='无界面批量处理表扬榜文件')
+    parser.add_argument('sources', nargs='*', help='表扬榜文件或目录')
+    parser.add_argument('--op', action='append', default=[], help='操作（简写或 JSON），可多次给出')
+    parser.add_argument('--ops', help='操作记录文件（JSON lines），- 表示标准输入')
+    parser.add_argument('--roster', help='名单文件：新建的表扬榜使用此名单，已有的表扬榜按此名单增删学生')
+    parser.add_argument('--class', dest='class_name', help='名单中的班级')
+    parser.add_argument('--create', action='store_true', help='文件不存在时新建')
+    parser.add_argument('-o', '--output', help='输出目录（默认写回原文件）')
+    parser.add_argument('--format', choices=sorted(FORMATS), help='输出格式（默认与原文件相同）')
+    parser.add_argument('-j', '--jobs', type=int, help='并行处理的进程数')
+    parser.add_argument('--check', action='store_true', help='只检查文件结构，不修改')
+    parser.add_argument('--dry-run', action='store_true', help='执行操作但不写入文件')
+    args = parser.parse_args(argv)
+
+    try:
+        ops = [parse_op(text) for text in args.op]
+        if args.ops == '-':
+            ops.extend(read_ops(sys.stdin))
+        elif args.ops:
+            with open(args.ops, 'r', encoding='utf-8') as f:
+                ops.extend(read_ops(f))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    options = {'create': args.create, 'output': args.output, 'format': args.format,
+               'check': args.check, 'dry_run': args.dry_run}
+    if args.roster:
+        options['names'] = roster.pick_roster(roster.load_rosters(args.roster), args.class_name).names()
+    tasks = [(path, file_ops, options) for path, file_ops in plan(args.sources, ops)]
+    if not tasks:
+        parser.error('没有表扬榜文件')
+
+    failed = 0
+    for result in run(tasks, args.jobs):
+        failed += not result['ok']
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    print(f'{len(tasks)} boards, {failed} failed', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""表扬榜的自适应布局
+
+学生姓名、对勾和组名各用一个共享的命名字体（tkinter.font.Font），所有
+表扬榜的标签都引用这几个字体。窗口大小变化（包括切换全屏）停止
+SETTLE_MS 之后，按当前名单和窗口大小计算放得下的最大字号和每行组数，
+只修改一次共享字体，由 Tk 重排所有引用它的标签，不必逐个重新配置控件。
+"""
+import tkinter.font as tkfont
+
+SETTLE_MS = 150  # 窗口大小停止变化这么久之后才重新布局
+MIN_SIZE = 10
+MAX_SIZE = 72
+MEASURE_NAMES = 20  # 只测量字数最多的这些姓名
+# 与 PraiseBoard.build_board 中的内边距和边框对应（像素，不随字号变化）
+ROW_EXTRA_HEIGHT = 28  # 每个学生：标签 pady 和边框、条目间距
+TITLE_EXTRA_HEIGHT = 32  # 每行组名：标签 pady 和组间距
+COLUMN_EXTRA_WIDTH = 74  # 每组：姓名和对勾的 padx、边框、组间距
+
+
+def fit_layout(group_sizes, metrics, width, height, max_columns):
+    """返回 (字号, 每行组数)：字号是在 width × height 内放下所有组的最大值
+
+    group_sizes 是每组人数，metrics 是 ResponsiveLayout.measure 的结果
+    （每磅字号对应的像素数）。字号相同时每行的组数多者优先。
+    """
+    count = len(group_sizes)
+    if not count:
+        return None, 1
+    column_unit = max(metrics['width'], metrics['title'])
+    best = None
+    for columns in range(1, min(max_columns, count) + 1):
+        per_point = fixed = 0
+        for start in range(0, count, columns):
+            tallest = max(group_sizes[start:start + columns])
+            per_point += tallest * metrics['line'] + metrics['title_line']
+            fixed += tallest * ROW_EXTRA_HEIGHT + TITLE_EXTRA_HEIGHT
+        fits = [(height - fixed) / per_point if per_point else MAX_SIZE]
+        if column_unit:
+            fits.append((width / columns - COLUMN_EXTRA_WIDTH) / column_unit)
+        candidate = (max(MIN_SIZE, min(MAX_SIZE, int(min(fits)))), columns)
+        if best is None or candidate > best:
+            best = candidate
+    return best
+
+
+class ResponsiveLayout:
+    """共享字体，以及窗口大小变化停止后的重新布局
+
+    fonts 是 {名称: 字体描述}，其中 'name' 是姓名字体，其他字体按与它
+    的初始字号之比一起缩放。on_settled 在大小停止变化后调用。
+    """
+
+    def __init__(self, root, fonts, on_settled):
+        self.root = root
+        self.fonts = {key: tkfont.Font(root, font=description)
+                      for key, description in fonts.items()}
+        self._base = {key: abs(int(font.cget('size'))) for key, font in self.fonts.items()}
+        self.on_settled = on_settled
+        self.enabled = False  # 窗口大小变化过之后才自动布局
+        self._size = None
+        self._job = None
+        root.bind('<Configure>', self._on_configure, add='+')
+
+    @property
+    def size(self):
+        """姓名字体当前的字号"""
+        return abs(int(self.fonts['name'].cget('size')))
+
+    def _on_configure(self, event):
+        # 子控件的 <Configure> 也会传到这里，只关心主窗口
+        if event.widget is not self.root:
+            return
+        size = (event.width, event.height)
+        if size == self._size:
+            return
+        first = self._size is None
+        self._size = size
+        if first:
+            return  # 第一次显示时窗口是按初始字号排好的
+        self.enabled = True
+        self.schedule()
+
+    def schedule(self):
+        """SETTLE_MS 之后重新布局，期间再次调用则重新计时"""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+        self._job = self.root.after(SETTLE_MS, self._settle)
+
+    def _settle(self):
+        self._job = None
+        self.on_settled()
+
+    def refresh(self):
+        """名单或当前表扬榜变化后重新布局（窗口大小没变过时保持初始字号）"""
+        if self.enabled:
+            self.schedule()
+
+    def measure(self, groups):
+        """名单在姓名字体每磅字号下的宽度和行高（像素）"""
+        name_font, check_font, group_font = self.fonts['name'], self.fonts['check'], self.fonts['group']
+        size = self.size
+        names = sorted((student.name for group in groups for student in group.students),
+                       key=len, reverse=True)[:MEASURE_NAMES]
+        name = max(map(name_font.measure, names), default=0)
+        check = max(check_font.measure('✓'), check_font.measure('✗'))
+        title = max((group_font.measure(group.title) for group in groups), default=0)
+        line = max(name_font.metrics('linespace'), check_font.metrics('linespace'))
+        return {
+            'width': (name + check) / size,
+            'title': title / size,
+            'line': line / size,
+            'title_line': group_font.metrics('linespace') / size,
+        }
+
+    def apply(self, group_sizes, metrics, width, height, max_columns):
+        """计算并设置字号（有变化时才修改共享字体），返回每行组数"""
+        size, columns = fit_layout(group_sizes, metrics, width, height, max_columns)
+        if size is not None and size != self.size:
+            base = self._base['name']
+            for key, font in self.fonts.items():
+                font.configure(size=max(1, round(self._base[key] * size / base)))
+        return columns
@@ -0,0 +1,314 @@
+"""表扬榜状态模型（不依赖Tk，可在无界面环境下使用）"""
+import collections
+import contextlib
+from array import array
+
+MODES = ('praise', 'criticism')
+UNDO_LIMIT = 100  # 最多保留的撤销步数
+
+
+class BoardState:
+    """学生表扬/批评状态
+
+    每个学生对应一个下标，每种模式用一个bytearray按下标存放标记，
+    界面只通过 subscribe 注册的回调观察状态变化。
+    """
+
+    def __init__(self, names=(), subject='', mode='praise'):
+        self._check_mode(mode)
+        self.subject = subject
+        self.mode = mode
+        self._names = []
+        self._index = {}
+        self._marks = {m: bytearray() for m in MODES}
+        self._listeners = []
+        for name in names:
+            self.add_student(name)
+
+    @staticmethod
+    def _check_mode(mode):
+        if mode not in MODES:
+            raise ValueError(f'未知模式: {mode!r}')
+
+    # ---- 观察者 ----
+
+    def subscribe(self, callback):
+        """注册状态变化回调 callback(event, *args)"""
+        self._listeners.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """取消注册回调"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, *args):
+        for callback in tuple(self._listeners):
+            callback(event, *args)
+
+    # ---- 名单 ----
+
+    def add_student(self, name):
+        """添加学生，返回其下标（已存在则直接返回）"""
+        index = self._index.get(name)
+        if index is not None:
+            return index
+        index = len(self._names)
+        self._names.append(name)
+        self._index[name] = index
+        for marks in self._marks.values():
+            marks.append(0)
+        self._notify('add', name)
+        return index
+
+    def remove_student(self, name):
+        """移除学生"""
+        index = self._index.pop(name)
+        del self._names[index]
+        for marks in self._marks.values():
+            del marks[index]
+        for i in range(index, len(self._names)):
+            self._index[self._names[i]] = i
+        self._notify('remove', name)
+
+    def set_roster(self, names):
+        """替换名单，保留仍在名单中的学生的标记，只通知一次"""
+        old_index, old_marks = self._index, self._marks
+        self._names = []
+        self._index = {}
+        self._marks = {m: bytearray() for m in MODES}
+        for name in names:
+            if name in self._index:
+                continue
+            self._index[name] = len(self._names)
+            self._names.append(name)
+            for mode in MODES:
+                index = old_index.get(name)
+                self._marks[mode].append(old_marks[mode][index] if index is not None else 0)
+        self._notify('roster')
+
+    @property
+    def names(self):
+        return tuple(self._names)
+
+    def index(self, name):
+        return self._index[name]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    # ---- 查询 ----
+
+    def get(self, name, mode=None):
+        """查询学生在指定模式（默认当前模式）下的标记"""
+        return bool(self._marks[mode or self.mode][self._index[name]])
+
+    def count(self, mode=None):
+        """统计指定模式下被标记的人数"""
+        return self._marks[mode or self.mode].count(1)
+
+    def marked(self, mode=None):
+        """返回指定模式下被标记的学生"""
+        marks = self._marks[mode or self.mode]
+        return [name for name, flag in zip(self._names, marks) if flag]
+
+    # ---- 修改 ----
+
+    def set(self, name, value, mode=None):
+        """设置学生标记，状态有变化时通知观察者"""
+        mode = mode or self.mode
+        self._check_mode(mode)
+        marks = self._marks[mode]
+        index = self._index[name]
+        value = bool(value)
+        if marks[index] == value:
+            return
+        marks[index] = value
+        self._notify('mark', name, mode, value)
+
+    def set_many(self, changes):
+        """批量设置标记 [(姓名, 模式, 值)]，作为一次变化只通知一次
+
+        通知 ('batch', 实际变化的 [(姓名, 模式, 值)])，返回实际变化的条目。
+        """
+        # 先检查全部条目，有未知学生或模式时不做任何修改
+        resolved = []
+        for name, mode, value in changes:
+            self._check_mode(mode)
+            resolved.append((name, mode, self._index[name], bool(value)))
+        applied = []
+        for name, mode, index, value in resolved:
+            marks = self._marks[mode]
+            if marks[index] != value:
+                marks[index] = value
+                applied.append((name, mode, value))
+        if applied:
+            self._notify('batch', applied)
+        return applied
+
+    def toggle_group(self, names, mode=None):
+        """切换一组学生：全部已标记时全部取消，否则全部标记"""
+        mode = mode or self.mode
+        value = not all(self.get(name, mode) for name in names)
+        return self.set_many([(name, mode, value) for name in names])
+
+    def reset(self):
+        """清除两种模式的所有标记（可撤销，与 clear 不同）"""
+        return self.set_many([(name, mode, False)
+                              for mode in MODES
+                              for name, flag in zip(self._names, self._marks[mode]) if flag])
+
+    def invert(self, mode=None):
+        """反转指定模式下所有学生的标记"""
+        mode = mode or self.mode
+        return self.set_many([(name, mode, not flag)
+                              for name, flag in zip(self._names, self._marks[mode])])
+
+    def copy_marks(self, source='praise', target='criticism'):
+        """把一种模式的标记复制到另一种模式"""
+        self._check_mode(source)
+        return self.set_many([(name, target, bool(flag))
+                              for name, flag in zip(self._names, self._marks[source])])
+
+    def toggle(self, name, mode=None):
+        """切换学生标记，返回新状态"""
+        mode = mode or self.mode
+        value = not self.get(name, mode)
+        self.set(name, value, mode)
+        return value
+
+    def set_mode(self, mode):
+        """切换当前模式"""
+        self._check_mode(mode)
+        if mode == self.mode:
+            return
+        self.mode = mode
+        self._notify('mode', mode)
+
+    def set_subject(self, subject):
+        """设置学科"""
+        if subject == self.subject:
+            return
+        self.subject = subject
+        self._notify('subject', subject)
+
+    def clear(self):
+        """清除所有标记"""
+        for mode in MODES:
+            self._marks[mode] = bytearray(len(self._names))
+        self._notify('load')
+
+    # ---- 序列化（与保存文件结构一致） ----
+
+    def to_dict(self):
+        """导出为保存文件使用的字典结构"""
+        praise = self._marks['praise']
+        criticism = self._marks['criticism']
+        return {
+            'subject': self.subject,
+            'mode': self.mode,
+            'students': {
+                name: {'praise': bool(praise[i]), 'criticism': bool(criticism[i])}
+                for i, name in enumerate(self._names)
+            }
+        }
+
+    def load_dict(self, data):
+        """从保存文件的字典结构恢复状态，只通知一次"""
+        if 'mode' in data:
+            self._check_mode(data['mode'])
+            self.mode = data['mode']
+        if 'subject' in data:
+            self.subject = data['subject']
+
+        size = len(self._names)
+        marks = {mode: bytearray(size) for mode in MODES}
+        for student, state in data.get('students', {}).items():
+            index = self._index.get(student)
+            if index is None:
+                continue  # 不在当前名单中的学生忽略
+            for mode in MODES:
+                marks[mode][index] = bool(state.get(mode, False))
+        self._marks = marks
+        self._notify('load')
+
+
+class UndoStack:
+    """标记修改的撤销/重做
+
+    每一步只保存变化的条目，编码为 下标 << 2 | 模式 << 1 | 新值 的整数数组；
+    撤销时设置相反的值。加载文件或名单变化后下标失效，清空所有步骤。
+    """
+
+    def __init__(self, state, limit=UNDO_LIMIT):
+        self.state = state
+        self._undo = collections.deque(maxlen=limit)
+        self._redo = []
+        self._applying = False
+        state.subscribe(self._on_state_changed)
+
+    def _on_state_changed(self, event, *args):
+        if self._applying:
+            return
+        if event == 'mark':
+            name, mode, value = args
+            self._push([(name, mode, value)])
+        elif event == 'batch':
+            self._push(args[0])
+        elif event in ('load', 'roster', 'add', 'remove'):
+            self.clear()
+
+    def _push(self, changes):
+        index = self.state.index
+        self._undo.append(array('I', (index(name) << 2 | MODES.index(mode) << 1 | value
+                                      for name, mode, value in changes)))
+        self._redo.clear()
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    @contextlib.contextmanager
+    def paused(self):
+        """期间的状态变化不记为撤销步骤（如合并进来的其他程序的修改）"""
+        applying, self._applying = self._applying, True
+        try:
+            yield
+        finally:
+            self._applying = applying
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def _apply(self, step, invert):
+        names = self.state.names
+        self._applying = True
+        try:
+            self.state.set_many([(names[code >> 2], MODES[code >> 1 & 1], bool(code & 1) != invert)
+                                 for code in (reversed(step) if invert else step)])
+        finally:
+            self._applying = False
+
+    def undo(self):
+        """撤销一步，返回是否有可撤销的步骤"""
+        if not self._undo:
+            return False
+        step = self._undo.pop()
+        self._apply(step, invert=True)
+        self._redo.append(step)
+        return True
+
+    def redo(self):
+        """重做一步，返回是否有可重做的步骤"""
+        if not self._redo:
+            return False
+        step = self._redo.pop()
+        self._apply(step, invert=False)
+        self._undo.append(step)
+        return True
@@ -0,0 +1,291 @@
+"""单画布的表扬榜显示方式（学生较多时使用）
+
+整个表扬榜画在一个 tk.Canvas 上：每名学生是一个矩形和两个文字项（姓名、
+对勾），每组一个组名文字项，都带有标签（student/box/name/check/group）。
+所有学生和组的位置按名单和共享字体先算好，登记在网格空间索引中；只为
+可见区域附近的学生创建画布项，滚动时把移出区域的项回收给新进入的学生，
+画布项数量与窗口大小有关而与人数无关。点击位置由空间索引查出对应的
+学生或组，不需要为每名学生绑定事件。
+
+对勾由 PraiseBoard 的刷新调度驱动：状态变化后调用 update_student 或
+refresh，只有当前画出的学生需要修改画布项。
+"""
+import tkinter as tk
+
+MARKS = {'praise': ('✓', 'green'), 'criticism': ('✗', 'red')}  # 模式 -> (符号, 颜色)
+BUCKET = 128  # 空间索引格子的最小边长（像素）
+MARGIN = 200  # 可见区域上下多画这么多像素内的项，滚动时不露白
+MEASURE_NAMES = 20  # 只测量字数最多的这些姓名
+WHEEL_UNITS = 3  # 滚轮每格滚动的学生行数
+NAME_BG = '#d9d9d9'
+NAME_OUTLINE = '#a3a3a3'
+# 与控件布局相近的间距（像素）
+PAD = 10
+ROW_GAP = 4
+GROUP_GAP = 20
+
+
+class SpatialIndex:
+    """网格空间索引：按矩形覆盖的格子登记目标，点查询和区域查询只看相关格子"""
+
+    def __init__(self, size=BUCKET):
+        self.size = size
+        self._cells = {}  # (列, 行) -> [(矩形, 目标)]
+
+    def _span(self, low, high):
+        return range(int(low // self.size), int(high // self.size) + 1)
+
+    def insert(self, rect, target):
+        x0, y0, x1, y1 = rect
+        entry = (rect, target)
+        for gx in self._span(x0, x1):
+            for gy in self._span(y0, y1):
+                self._cells.setdefault((gx, gy), []).append(entry)
+
+    def at(self, x, y):
+        """包含点 (x, y) 的目标，没有时返回 None"""
+        for (x0, y0, x1, y1), target in self._cells.get((int(x // self.size), int(y // self.size)), ()):
+            if x0 <= x < x1 and y0 <= y < y1:
+                return target
+        return None
+
+    def query(self, x0, y0, x1, y1):
+        """与矩形相交的目标：{目标: 矩形}"""
+        found = {}
+        for gx in self._span(x0, x1):
+            for gy in self._span(y0, y1):
+                for rect, target in self._cells.get((gx, gy), ()):
+                    if rect[0] < x1 and x0 < rect[2] and rect[1] < y1 and y0 < rect[3]:
+                        found[target] = rect
+        return found
+
+
+class CanvasBoard:
+    """在一个画布上显示一个表扬榜
+
+    fonts 是共享的 {'group', 'name', 'check'} 字体；点击学生时调用
+    on_student(姓名)，点击组名时调用 on_group(组内学生姓名列表)。
+    """
+
+    def __init__(self, parent, fonts, state, on_student, on_group, bg):
+        self.fonts = fonts
+        self.state = state
+        self.on_student = on_student
+        self.on_group = on_group
+        self.widget = tk.Frame(parent, bg=bg)
+        self.canvas = tk.Canvas(self.widget, bg=bg, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self.widget, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.canvas.bind('<Configure>', self._on_configure)
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<MouseWheel>', self._on_wheel)
+        self.canvas.bind('<Button-4>', lambda e: self.canvas.yview_scroll(-WHEEL_UNITS, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self.canvas.yview_scroll(WHEEL_UNITS, 'units'))
+
+        self.roster = None
+        self.index = SpatialIndex()
+        self._members = {}  # 组号 -> 组内学生姓名列表
+        self._labels = {}  # 目标 -> 显示的文字（学生姓名或组名）
+        self._rects = {}  # 目标 -> 矩形
+        self._highlight = {}  # 学生姓名 -> 高亮颜色
+        self._shown = {}  # 目标 -> 画布项元组（只有画出的目标）
+        self._pools = {'student': [], 'group': []}  # 回收的画布项
+        self._width = 0  # 按此宽度计算的布局
+        self._height = 0  # 整个表扬榜的高度
+        self._name_width = 0
+        self._job = None
+
+    # ---- 名单和布局 ----
+
+    def set_roster(self, roster):
+        """换成新名单，重新计算布局"""
+        self.roster = roster
+        self.relayout()
+
+    def relayout(self):
+        """按画布宽度和共享字体计算所有学生和组的位置，再画出可见部分"""
+        self._cancel()
+        self._width = width = self.canvas.winfo_width()
+        groups = self.roster.groups if self.roster is not None else []
+        name_font, check_font, group_font = self.fonts['name'], self.fonts['check'], self.fonts['group']
+
+        names = sorted((student.name for group in groups for student in group.students),
+                       key=len, reverse=True)[:MEASURE_NAMES]
+        name_width = max(map(name_font.measure, names), default=0) + 2 * PAD
+        check_width = max(check_font.measure('✓'), check_font.measure('✗')) + 2 * PAD
+        cell_height = max(name_font.metrics('linespace'), check_font.metrics('linespace')) + 2 * PAD
+        title_height = group_font.metrics('linespace') + 2 * PAD
+        title_width = max((group_font.measure(group.title) for group in groups), default=0) + 2 * PAD
+        column_width = max(name_width + check_width, title_width) + GROUP_GAP
+        columns = max(1, min(len(groups), width // column_width))
+        left = max(0, (width - columns * column_width) // 2) + GROUP_GAP // 2
+        self._name_width = name_width
+
+        index = SpatialIndex(max(BUCKET, cell_height + ROW_GAP))
+        self._members = {}
+        self._labels = {}
+        self._rects = rects = {}
+        y = GROUP_GAP // 2
+        for start in range(0, len(groups), columns):
+            row = groups[start:start + columns]
+            title_top = y + max(len(group.students) for group in row) * (cell_height + ROW_GAP)
+            for column, group in enumerate(row):
+                x = left + column * column_width
+                for i, student in enumerate(group.students):
+                    top = y + i * (cell_height + ROW_GAP)
+                    target = ('student', student.key)
+                    rect = rects[target] = (x, top, x + name_width + check_width, top + cell_height)
+                    index.insert(rect, target)
+                    self._labels[target] = student.name
+                # 组名在组的下方，同一行的组名对齐
+                target = ('group', group.label)
+                rect = rects[target] = (x, title_top, x + column_width - GROUP_GAP, title_top + title_height)
+                index.insert(rect, target)
+                self._labels[target] = group.title
+                self._members[group.label] = [student.key for student in group.students]
+            y = title_top + title_height + GROUP_GAP
+        self.index = index
+        self._height = y
+
+        # 已画出的项全部回收，按新位置重新画
+        for target, items in self._shown.items():
+            self._hide(target[0], items)
+        self._shown = {}
+        self.canvas.configure(scrollregion=(0, 0, width, y), yscrollincrement=cell_height + ROW_GAP)
+        self.render()
+
+    # ---- 绘制 ----
+
+    def render(self):
+        """只为可见区域附近的目标保留画布项"""
+        self._job = None
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        visible = self.index.query(0, top - MARGIN, max(self._width, 1), bottom + MARGIN)
+        for target in [target for target in self._shown if target not in visible]:
+            self._hide(target[0], self._shown.pop(target))
+        for target, rect in visible.items():
+            if target not in self._shown:
+                self._shown[target] = self._draw(target, rect)
+
+    def _draw(self, target, rect):
+        kind, key = target
+        canvas = self.canvas
+        x0, y0, x1, y1 = rect
+        middle = (y0 + y1) / 2
+        pool = self._pools[kind]
+        if kind == 'group':
+            coords = ((x0 + x1) / 2, middle)
+            if pool:
+                items = pool.pop()
+                canvas.coords(items[0], *coords)
+                canvas.itemconfigure(items[0], text=self._labels[target], state='normal')
+            else:
+                items = (canvas.create_text(*coords, text=self._labels[target],
+                                            font=self.fonts['group'], tags=('group',)),)
+            return items
+
+        box_coords = (x0, y0, x0 + self._name_width, y1)
+        name_coords = (x0 + PAD, middle)
+        check_coords = (x0 + self._name_width + PAD, middle)
+        if pool:
+            items = pool.pop()
+            for item, coords in zip(items, (box_coords, name_coords, check_coords)):
+                canvas.coords(item, *coords)
+                canvas.itemconfigure(item, state='normal')
+            canvas.itemconfigure(items[1], text=self._labels[target])
+            canvas.itemconfigure(items[0], fill=self._highlight.get(key, NAME_BG))
+        else:
+            items = (
+                canvas.create_rectangle(*box_coords, fill=self._highlight.get(key, NAME_BG),
+                                        outline=NAME_OUTLINE,
+                                        width=2, tags=('student', 'box')),
+                canvas.create_text(*name_coords, text=self._labels[target], anchor='w',
+                                   font=self.fonts['name'], tags=('student', 'name')),
+                canvas.create_text(*check_coords, text='', anchor='w',
+                                   font=self.fonts['check'], tags=('student', 'check')),
+            )
+        self._paint_check(key, items[2])
+        return items
+
+    def _hide(self, kind, items):
+        for item in items:
+            self.canvas.itemconfigure(item, state='hidden')
+        self._pools[kind].append(items)
+
+    def _paint_check(self, student, item):
+        symbol, color = MARKS[self.state.mode]
+        marked = student in self.state and self.state.get(student)
+        self.canvas.itemconfigure(item, text=symbol if marked else '', fill=color)
+
+    def update_student(self, student):
+        """学生的标记变化：画出时更新对勾，没画出时画出时再读取状态"""
+        items = self._shown.get(('student', student))
+        if items is not None:
+            self._paint_check(student, items[2])
+
+    def refresh(self):
+        """模式变化或整体重绘：更新所有画出的对勾"""
+        for (kind, key), items in self._shown.items():
+            if kind == 'student':
+                self._paint_check(key, items[2])
+
+    def highlight(self, colors):
+        """把 {学生姓名: 颜色} 中的学生姓名框改为对应颜色，其他学生恢复原色"""
+        changed = set(self._highlight) | set(colors)
+        self._highlight = dict(colors)
+        for student in changed:
+            items = self._shown.get(('student', student))
+            if items is not None:
+                self.canvas.itemconfigure(items[0], fill=self._highlight.get(student, NAME_BG))
+
+    def see(self, student):
+        """滚动到学生所在位置（已在可见区域内时不滚动）"""
+        rect = self._rects.get(('student', student))
+        if rect is None:
+            return
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        if top <= rect[1] and rect[3] <= top + height:
+            return
+        if self._height:
+            self.canvas.yview_moveto(max(0.0, rect[1] - height / 2) / self._height)
+
+    # ---- 事件 ----
+
+    def _schedule(self, callback):
+        if self._job is None:
+            self._job = self.canvas.after_idle(callback)
+
+    def _cancel(self):
+        if self._job is not None:
+            self.canvas.after_cancel(self._job)
+            self._job = None
+
+    def _on_configure(self, event):
+        if self.roster is None:
+            return
+        if event.width != self._width:
+            self._cancel()
+            self._schedule(self.relayout)  # 宽度变化时每行的组数可能变化
+        else:
+            self._schedule(self.render)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule(self.render)
+
+    def _on_wheel(self, event):
+        self.canvas.yview_scroll(-WHEEL_UNITS if event.delta > 0 else WHEEL_UNITS, 'units')
+
+    def _on_click(self, event):
+        target = self.index.at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if target is None:
+            return
+        kind, key = target
+        if kind == 'student':
+            self.on_student(key)
+        else:
+            self.on_group(self._members[key])
@@ -0,0 +1,30 @@
+"""可选功能的开关：命令行参数 --flag[=值] 或环境变量
+
+启动耗时记录、性能监测和实时展示服务都用同样的规则：命令行参数优先，
+环境变量的值为 1、true 或 yes 时与只给出参数相同。
+"""
+import os
+import sys
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def flag_value(flag, env_var, argv=None, environ=None):
+    """返回开关的值：未开启时为 None，开启但没有给出值时为空字符串
+
+    同一参数给出多次时以最后一次为准。
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    environ = os.environ if environ is None else environ
+
+    value = None
+    for arg in argv:
+        if arg == flag:
+            value = ''
+        elif arg.startswith(flag + '='):
+            value = arg.split('=', 1)[1]
+    if value is None and environ.get(env_var):
+        value = environ[env_var]
+        if value in TRUE_VALUES:
+            value = ''
+    return value
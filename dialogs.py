@@ -0,0 +1,384 @@
+"""首选项、历史记录、合并统计和趋势分析对话框（第一次打开时才导入）"""
+import queue
+import threading
+import tkinter as tk
+from datetime import datetime
+from tkinter import filedialog, messagebox, ttk
+
+import locales
+
+
+def show_preferences(app):
+    """显示首选项对话框"""
+    prefs_window = tk.Toplevel(app.root)
+    prefs_window.title(app.translations['preferences'])
+    prefs_window.geometry('400x350')
+    prefs_window.resizable(False, False)
+    prefs_window.transient(app.root)
+    prefs_window.grab_set()
+    
+    # 语言设置
+    lang_label = tk.Label(prefs_window, text=app.translations['language'], font=('宋体', 12))
+    lang_label.grid(row=0, column=0, padx=10, pady=10, sticky='w')
+    
+    lang_values = [f'{code} ({locales.LANGUAGE_NAMES.get(code, code)})'
+                   for code in app.locales.languages()]
+    lang_var = tk.StringVar(value=next(
+        (value for value in lang_values if value.split(' ')[0] == app.current_language),
+        app.current_language))
+    lang_combo = ttk.Combobox(
+        prefs_window,
+        textvariable=lang_var,
+        values=lang_values,
+        state='readonly',
+        width=20
+    )
+    lang_combo.grid(row=0, column=1, padx=10, pady=10, sticky='w')
+    
+    # 日期格式设置
+    date_label = tk.Label(prefs_window, text=app.translations['date_format'], font=('宋体', 12))
+    date_label.grid(row=1, column=0, padx=10, pady=10, sticky='w')
+    
+    date_var = tk.StringVar(value=app.preferences.get('date_format', '年月日'))
+    date_combo = ttk.Combobox(
+        prefs_window,
+        textvariable=date_var,
+        values=['年月日', '月日年', '日月年'],
+        state='readonly',
+        width=20
+    )
+    date_combo.grid(row=1, column=1, padx=10, pady=10, sticky='w')
+    
+    # 时间格式设置
+    time_label = tk.Label(prefs_window, text=app.translations['time_format'], font=('宋体', 12))
+    time_label.grid(row=2, column=0, padx=10, pady=10, sticky='w')
+    
+    time_var = tk.StringVar(value=app.preferences.get('time_format', '时分秒'))
+    time_combo = ttk.Combobox(
+        prefs_window,
+        textvariable=time_var,
+        values=['时分秒', '时分'],
+        state='readonly',
+        width=20
+    )
+    time_combo.grid(row=2, column=1, padx=10, pady=10, sticky='w')
+    
+    # 显示方式设置
+    display_label = tk.Label(prefs_window, text=app.translations['display_mode'], font=('宋体', 12))
+    display_label.grid(row=3, column=0, padx=10, pady=10, sticky='w')
+    
+    display_names = {mode: app.translations[f'display_{mode}'] for mode in app.display_modes}
+    display_var = tk.StringVar(value=display_names.get(
+        app.preferences.get('display_mode', 'auto'), display_names['auto']))
+    display_combo = ttk.Combobox(
+        prefs_window,
+        textvariable=display_var,
+        values=list(display_names.values()),
+        state='readonly',
+        width=20
+    )
+    display_combo.grid(row=3, column=1, padx=10, pady=10, sticky='w')
+    
+    # 操作日志设置
+    journal_var = tk.BooleanVar(value=app.preferences.get('journal', True))
+    journal_check = tk.Checkbutton(
+        prefs_window,
+        text=app.translations['journal_mode'],
+        variable=journal_var,
+        font=('宋体', 12)
+    )
+    journal_check.grid(row=4, column=0, columnspan=2, padx=10, pady=10, sticky='w')
+    
+    # 确定和取消按钮
+    button_frame = tk.Frame(prefs_window)
+    button_frame.grid(row=5, column=0, columnspan=2, pady=20)
+    
+    def apply_preferences():
+        # 提取语言代码
+        lang_code = lang_var.get().split(' ')[0]
+        
+        # 更新并保存首选项，只应用有变化的设置
+        previous = dict(app.preferences)
+        app.preferences.update({
+            'language': lang_code,
+            'date_format': date_var.get(),
+            'time_format': time_var.get(),
+            'journal': journal_var.get(),
+            'display_mode': next((mode for mode, name in display_names.items()
+                                  if name == display_var.get()), 'auto')
+        })
+        app.save_preferences()
+        app.apply_preferences(previous)
+        
+        prefs_window.destroy()
+        app.show_status(app.translations['preferences_updated'])
+    
+    ok_button = tk.Button(button_frame, text=app.translations['ok'], command=apply_preferences, width=10)
+    ok_button.pack(side='left', padx=10)
+    
+    cancel_button = tk.Button(button_frame, text=app.translations['cancel'], command=prefs_window.destroy, width=10)
+    cancel_button.pack(side='left', padx=10)
+
+
+def show_history(app):
+    """显示历史记录查询对话框"""
+    archive = app.history
+    if archive is None:
+        messagebox.showerror(app.translations['error'], app.translations['history_unavailable'])
+        return
+    
+    history_window = tk.Toplevel(app.root)
+    history_window.title(app.translations['history'])
+    history_window.geometry('560x480')
+    history_window.transient(app.root)
+    
+    # 查询条件
+    today = datetime.now().strftime('%Y-%m-%d')
+    all_subjects = app.translations['all_subjects']
+    
+    tk.Label(history_window, text=app.translations['student'],
+             font=('宋体', 12)).grid(row=0, column=0, padx=10, pady=5, sticky='w')
+    student_var = tk.StringVar()
+    ttk.Combobox(history_window, textvariable=student_var,
+                 values=[''] + list(app.state.names), width=20
+                 ).grid(row=0, column=1, padx=10, pady=5, sticky='w')
+    
+    tk.Label(history_window, text=app.translations['subject'],
+             font=('宋体', 12)).grid(row=1, column=0, padx=10, pady=5, sticky='w')
+    subject_var = tk.StringVar(value=all_subjects)
+    ttk.Combobox(history_window, textvariable=subject_var,
+                 values=[all_subjects] + archive.subjects(),
+                 state='readonly', width=20
+                 ).grid(row=1, column=1, padx=10, pady=5, sticky='w')
+    
+    tk.Label(history_window, text=app.translations['start_date'],
+             font=('宋体', 12)).grid(row=2, column=0, padx=10, pady=5, sticky='w')
+    start_var = tk.StringVar(value=today[:4] + '-01-01')
+    tk.Entry(history_window, textvariable=start_var, width=22
+             ).grid(row=2, column=1, padx=10, pady=5, sticky='w')
+    
+    tk.Label(history_window, text=app.translations['end_date'],
+             font=('宋体', 12)).grid(row=3, column=0, padx=10, pady=5, sticky='w')
+    end_var = tk.StringVar(value=today)
+    tk.Entry(history_window, textvariable=end_var, width=22
+             ).grid(row=3, column=1, padx=10, pady=5, sticky='w')
+    
+    # 查询结果
+    summary_label = tk.Label(history_window, text='', font=('宋体', 12), anchor='w')
+    summary_label.grid(row=5, column=0, columnspan=3, padx=10, pady=5, sticky='we')
+    result_tree = ttk.Treeview(history_window, columns=('c0', 'c1', 'c2'),
+                               show='headings', height=12)
+    result_tree.grid(row=6, column=0, columnspan=3, padx=10, pady=5, sticky='nsew')
+    history_window.grid_rowconfigure(6, weight=1)
+    history_window.grid_columnconfigure(2, weight=1)
+    
+    def run_query():
+        student = student_var.get().strip()
+        subject = subject_var.get()
+        subject = None if subject == all_subjects else subject
+        start, end = start_var.get().strip(), end_var.get().strip()
+        
+        result_tree.delete(*result_tree.get_children())
+        praise_text = app.translations['praise_count']
+        criticism_text = app.translations['criticism_count']
+        boards = archive.board_count(start, end, subject)
+        if student:
+            # 单个学生：每张表扬榜的记录
+            summary = archive.student_summary(student, start, end, subject)
+            headings = (app.translations['date'],
+                        app.translations['subject'], '')
+            rows = [(day, subj, '✓' if praise else '✗' if criticism else '')
+                    for day, subj, praise, criticism
+                    in archive.student_history(student, start, end, subject)]
+            summary_label.config(text=f"{student}: {praise_text} {summary['praise']}  "
+                                      f"{criticism_text} {summary['criticism']}  / {boards}")
+        else:
+            # 全部学生：按表扬次数排序的汇总
+            headings = (app.translations['student'], praise_text, criticism_text)
+            rows = archive.totals(start, end, subject)
+            summary_label.config(text=f"{app.translations['board_count']}: {boards}")
+        for column, heading in zip(('c0', 'c1', 'c2'), headings):
+            result_tree.heading(column, text=heading)
+        for row in rows:
+            result_tree.insert('', 'end', values=row)
+    
+    tk.Button(history_window, text=app.translations['query'],
+              command=run_query, width=10).grid(row=4, column=1, padx=10, pady=10, sticky='w')
+    run_query()
+
+
+def show_merge(app):
+    """选择多个表扬榜文件，在后台合并后显示每个学生和每组的统计"""
+    import aggregate
+    import multiprocessing
+    import storage
+    paths = filedialog.askopenfilenames(
+        filetypes=[("Praise board files", " ".join("*" + ext for ext in storage.BOARD_EXTS)),
+                   ("All files", "*.*")],
+        title=app.translations['merge_boards']
+    )
+    if not paths:
+        return
+    group_of = aggregate.group_map(app.roster)
+    
+    merge_window = tk.Toplevel(app.root)
+    merge_window.title(app.translations['merge_boards'])
+    merge_window.geometry('560x520')
+    merge_window.transient(app.root)
+    
+    summary_label = tk.Label(merge_window, text=app.translations['merging'],
+                             font=('宋体', 12), anchor='w', justify='left')
+    summary_label.pack(fill='x', padx=10, pady=5)
+    
+    t = app.translations
+    notebook = ttk.Notebook(merge_window)
+    notebook.pack(fill='both', expand=True, padx=10, pady=5)
+    
+    def make_tree(headings):
+        tree = ttk.Treeview(notebook, columns=('c0', 'c1', 'c2', 'c3'), show='headings')
+        for column, heading in zip(('c0', 'c1', 'c2', 'c3'), headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=120)
+        return tree
+    
+    # 每个学生 / 每组（组名、人数、表扬、批评）
+    student_tree = make_tree((t['group'], t['student'], t['praise_count'], t['criticism_count']))
+    group_tree = make_tree((t['group'], t['student_count'], t['praise_count'], t['criticism_count']))
+    notebook.add(student_tree, text=app.translations['student'])
+    notebook.add(group_tree, text=app.translations['group'])
+    
+    result = {}
+    
+    def export():
+        totals = result.get('totals')
+        if totals is None:
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension='.csv',
+            filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json")],
+            title=app.translations['export']
+        )
+        if not file_path:
+            return
+        try:
+            totals.write(file_path, group_of)
+        except OSError as e:
+            messagebox.showerror(app.translations['error'], app.translations['save_error'] + str(e))
+            return
+        app.show_status(app.translations['save_success'])
+    
+    export_button = tk.Button(merge_window, text=app.translations['export'],
+                              command=export, width=10, state='disabled')
+    export_button.pack(pady=10)
+    
+    # 在后台线程中合并（可能使用进程池），界面线程定时取结果
+    results = queue.Queue()
+    
+    def run():
+        try:
+            # 界面进程有 Tk 和其他线程，工作进程用 spawn 启动，不 fork 整个进程
+            results.put(aggregate.merge_boards(paths, mp_context=multiprocessing.get_context('spawn')))
+        except Exception as e:
+            results.put(e)
+    
+    def poll():
+        if not merge_window.winfo_exists():
+            return
+        try:
+            totals = results.get_nowait()
+        except queue.Empty:
+            merge_window.after(100, poll)
+            return
+        if isinstance(totals, Exception):
+            summary_label.config(text=app.translations['load_error'] + str(totals), fg='red')
+            return
+        result['totals'] = totals
+        boards = '  '.join(f'{subject} {count}' for subject, count in sorted(totals.boards.items()))
+        summary_label.config(text=f"{app.translations['board_count']}: "
+                                  f"{sum(totals.boards.values())}  ({boards})")
+        for row in totals.students(group_of):
+            student_tree.insert('', 'end', values=(row['group'], row['student'],
+                                                   row['praise'], row['criticism']))
+        for row in totals.groups(group_of):
+            group_tree.insert('', 'end', values=(row['group'], row['students'],
+                                                 row['praise'], row['criticism']))
+        export_button.config(state='normal')
+    
+    threading.Thread(target=run, daemon=True).start()
+    poll()
+
+
+def show_analytics(app):
+    """选择表扬榜目录，在后台分析后显示学生、学科、每周和小组的比率"""
+    import aggregate
+    import analytics
+    import storage
+    directory = filedialog.askdirectory(title=app.translations['analytics'])
+    if not directory:
+        return
+    group_of = aggregate.group_map(app.roster)
+    t = app.translations
+    
+    analytics_window = tk.Toplevel(app.root)
+    analytics_window.title(t['analytics'])
+    analytics_window.geometry('720x520')
+    analytics_window.transient(app.root)
+    
+    summary_label = tk.Label(analytics_window, text=t['analyzing'],
+                             font=('宋体', 12), anchor='w')
+    summary_label.pack(fill='x', padx=10, pady=5)
+    notebook = ttk.Notebook(analytics_window)
+    notebook.pack(fill='both', expand=True, padx=10, pady=5)
+    
+    def add_table(title, headings, rows):
+        columns = [f'c{i}' for i in range(len(headings))]
+        tree = ttk.Treeview(notebook, columns=columns, show='headings')
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=90)
+        for row in rows:
+            tree.insert('', 'end', values=row)
+        notebook.add(tree, text=title)
+    
+    def percent(rate):
+        return f'{rate * 100:.1f}%'
+    
+    def show(report):
+        summary_label.config(text=f"{t['board_count']}: {report['boards']}")
+        add_table(t['student'],
+                  (t['student'], t['group'], t['praise_rate'], t['criticism_rate'],
+                   t['criticism_streak'], t['trend']),
+                  [(row['student'], row['group'], percent(row['praise_rate']),
+                    percent(row['criticism_rate']), row['longest_streak'],
+                    analytics.sparkline(row['trend']))
+                   for row in report['students']])
+        for key, title in (('subjects', t['subject']), ('by_week', t['week']), ('groups', t['group'])):
+            name = {'subjects': 'subject', 'by_week': 'week', 'groups': 'group'}[key]
+            add_table(title, (title, t['praise_rate'], t['criticism_rate']),
+                      [(row[name], percent(row['praise_rate']), percent(row['criticism_rate']))
+                       for row in report[key]])
+    
+    # 在后台线程中分析，界面线程定时取结果
+    results = queue.Queue()
+    
+    def run():
+        try:
+            results.put(analytics.analyze(storage.find_boards([directory]), group_of))
+        except Exception as e:
+            results.put(e)
+    
+    def poll():
+        if not analytics_window.winfo_exists():
+            return
+        try:
+            report = results.get_nowait()
+        except queue.Empty:
+            analytics_window.after(100, poll)
+            return
+        if isinstance(report, Exception):
+            summary_label.config(text=t['load_error'] + str(report), fg='red')
+        else:
+            show(report)
+    
+    threading.Thread(target=run, daemon=True).start()
+    poll()
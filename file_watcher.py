@@ -0,0 +1,181 @@
+"""监视名单、首选项和语言包文件的修改
+
+在 Tk 事件循环中检查文件的修改时间和大小，有变化时调用回调。Linux 上
+用 inotify 监视文件所在目录（通过 Tk 的文件事件，不另开线程），收到
+通知后稍等片刻再检查，编辑器分几步写入时只触发一次；其他系统上每
+POLL_MS 检查一次。回调只在文件确实变化后调用（删除文件不触发，文件
+重新出现时触发）。
+"""
+import os
+import struct
+
+POLL_MS = 2000  # 没有 inotify 时的检查间隔
+SETTLE_MS = 100  # 收到 inotify 通知后等这么久再检查
+
+# inotify 常量（linux/inotify.h）
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def file_stamp(path):
+    """文件的 (修改时间, 大小, inode)，不存在时返回 None
+
+    用 os.replace 原子替换的文件 inode 会变，修改时间精度较低时也能发现。
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class Inotify:
+    """最简单的 inotify 封装：监视目录，读取有变化的文件名"""
+
+    def __init__(self, libc):
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError('inotify_init1 failed')
+        self._dirs = {}  # 目录 -> wd
+        self._paths = {}  # wd -> 目录
+
+    @classmethod
+    def create(cls):
+        """可用时返回 Inotify，否则返回 None"""
+        if not hasattr(os, 'uname') or os.uname().sysname != 'Linux':
+            return None
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.inotify_init1, libc.inotify_add_watch  # 检查是否存在
+            return cls(libc)
+        except (OSError, AttributeError):
+            return None
+
+    def add_directory(self, directory):
+        if directory in self._dirs:
+            return True
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return False
+        self._dirs[directory] = wd
+        self._paths[wd] = directory
+        return True
+
+    def read(self):
+        """读取所有待处理的通知，返回有变化的文件路径集合"""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                directory = self._paths.get(wd)
+                if directory is not None and name:
+                    changed.add(os.path.join(directory, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """在 Tk 事件循环中监视文件，有修改时调用 callback(路径)"""
+
+    def __init__(self, root, interval=POLL_MS):
+        self.root = root
+        self.interval = interval
+        self._watches = {}  # 绝对路径 -> [时间戳, 回调]
+        self._job = None
+        self._inotify = Inotify.create()
+        if self._inotify is not None:
+            try:
+                root.tk.createfilehandler(self._inotify.fd, 1, self._on_inotify)  # 1: READABLE
+            except (AttributeError, RuntimeError):
+                self._inotify.close()
+                self._inotify = None
+        self._polling = False  # 有文件所在目录无法用 inotify 监视时也按间隔检查
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    def watch(self, path, callback):
+        """开始监视文件（已在监视时只替换回调）"""
+        path = os.path.abspath(path)
+        watch = self._watches.get(path)
+        if watch is not None:
+            watch[1] = callback
+            return
+        self._watches[path] = [file_stamp(path), callback]
+        if self._inotify is None or not self._inotify.add_directory(os.path.dirname(path)):
+            self._polling = True
+        self._schedule()
+
+    def unwatch(self, path):
+        self._watches.pop(os.path.abspath(path), None)
+
+    def watched(self):
+        return set(self._watches)
+
+    def refresh(self, path):
+        """重新记录文件的时间戳（程序自己写入文件后调用，不触发回调）"""
+        path = os.path.abspath(path)
+        watch = self._watches.get(path)
+        if watch is not None:
+            watch[0] = file_stamp(path)
+
+    def check(self):
+        """检查所有文件，对有变化的文件调用回调"""
+        self._job = None
+        for path in list(self._watches):
+            watch = self._watches.get(path)
+            if watch is None:
+                continue  # 在前面的回调中取消了监视
+            stamp = file_stamp(path)
+            if stamp == watch[0]:
+                continue
+            watch[0] = stamp
+            if stamp is not None:
+                watch[1](path)
+        self._schedule()
+
+    def close(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        if self._inotify is not None:
+            self.root.tk.deletefilehandler(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+
+    def _schedule(self, delay=None):
+        if self._job is not None:
+            if delay is None:
+                return
+            self.root.after_cancel(self._job)
+        elif delay is None:
+            if not self._polling or not self._watches:
+                return
+            delay = self.interval
+        self._job = self.root.after(delay, self.check)
+
+    def _on_inotify(self, fd, mask):
+        if any(path in self._watches for path in self._inotify.read()):
+            self._schedule(SETTLE_MS)
@@ -0,0 +1,145 @@
+"""表扬榜历史存档（SQLite，按日期、学科、学生建索引）"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+HISTORY_FILE = 'history.db'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS boards (
+    id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    file TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    UNIQUE (file, day)
+);
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS marks (
+    board_id INTEGER NOT NULL REFERENCES boards(id) ON DELETE CASCADE,
+    student_id INTEGER NOT NULL REFERENCES students(id),
+    praise INTEGER NOT NULL,
+    criticism INTEGER NOT NULL,
+    PRIMARY KEY (board_id, student_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS boards_day ON boards (day, subject);
+CREATE INDEX IF NOT EXISTS boards_subject ON boards (subject, day);
+CREATE INDEX IF NOT EXISTS marks_student ON marks (student_id, board_id);
+'''
+
+
+class BoardHistory:
+    """历史存档
+
+    同一文件同一天多次保存只保留最后一次；只存有标记的学生，
+    size 记录当时的总人数。可在后台保存线程和界面线程中共用。
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.executescript(SCHEMA)
+        self._student_ids = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _student_id(self, name):
+        student_id = self._student_ids.get(name)
+        if student_id is None:
+            self._conn.execute('INSERT OR IGNORE INTO students (name) VALUES (?)', (name,))
+            student_id = self._conn.execute(
+                'SELECT id FROM students WHERE name = ?', (name,)).fetchone()[0]
+            self._student_ids[name] = student_id
+        return student_id
+
+    def record(self, data, file_path, saved_at=None):
+        """记录一次保存（data 为保存文件的字典结构）"""
+        saved_at = saved_at or datetime.now()
+        students = data.get('students', {})
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM boards WHERE file = ? AND day = ?',
+                (os.path.abspath(file_path), saved_at.strftime('%Y-%m-%d')))
+            board_id = self._conn.execute(
+                'INSERT INTO boards (day, saved_at, subject, mode, file, size) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (saved_at.strftime('%Y-%m-%d'), saved_at.isoformat(timespec='seconds'),
+                 data.get('subject', ''), data.get('mode', 'praise'),
+                 os.path.abspath(file_path), len(students))).lastrowid
+            self._conn.executemany(
+                'INSERT INTO marks (board_id, student_id, praise, criticism) VALUES (?, ?, ?, ?)',
+                [(board_id, self._student_id(name), bool(state.get('praise')),
+                  bool(state.get('criticism')))
+                 for name, state in students.items()
+                 if state.get('praise') or state.get('criticism')])
+            return board_id
+
+    @staticmethod
+    def _board_filter(start, end, subject):
+        clauses, params = [], []
+        if start:
+            clauses.append('b.day >= ?')
+            params.append(start)
+        if end:
+            clauses.append('b.day <= ?')
+            params.append(end)
+        if subject:
+            clauses.append('b.subject = ?')
+            params.append(subject)
+        return (' AND '.join(clauses) or '1'), params
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def subjects(self):
+        """已存档的学科"""
+        return [row[0] for row in self._query(
+            'SELECT DISTINCT subject FROM boards ORDER BY subject', ())]
+
+    def student_summary(self, student, start=None, end=None, subject=None):
+        """统计学生在日期范围（'YYYY-MM-DD'，含两端）内的表扬和批评次数"""
+        where, params = self._board_filter(start, end, subject)
+        row = self._query(
+            'SELECT COALESCE(SUM(m.praise), 0), COALESCE(SUM(m.criticism), 0) '
+            'FROM marks m JOIN boards b ON b.id = m.board_id '
+            f'WHERE m.student_id = (SELECT id FROM students WHERE name = ?) AND {where}',
+            [student] + params)[0]
+        return {'praise': row[0], 'criticism': row[1]}
+
+    def student_history(self, student, start=None, end=None, subject=None):
+        """学生在日期范围内每张表扬榜上的记录 [(日期, 学科, 表扬, 批评)]"""
+        where, params = self._board_filter(start, end, subject)
+        return self._query(
+            'SELECT b.day, b.subject, m.praise, m.criticism '
+            'FROM marks m JOIN boards b ON b.id = m.board_id '
+            f'WHERE m.student_id = (SELECT id FROM students WHERE name = ?) AND {where} '
+            'ORDER BY b.day, b.subject',
+            [student] + params)
+
+    def totals(self, start=None, end=None, subject=None):
+        """日期范围内每个学生的表扬和批评总数 [(姓名, 表扬, 批评)]，按表扬次数排序"""
+        where, params = self._board_filter(start, end, subject)
+        return self._query(
+            'SELECT s.name, SUM(m.praise), SUM(m.criticism) '
+            'FROM marks m JOIN boards b ON b.id = m.board_id '
+            'JOIN students s ON s.id = m.student_id '
+            f'WHERE {where} GROUP BY m.student_id '
+            'ORDER BY SUM(m.praise) DESC, SUM(m.criticism), s.name',
+            params)
+
+    def board_count(self, start=None, end=None, subject=None):
+        """日期范围内存档的表扬榜数量"""
+        where, params = self._board_filter(start, end, subject)
+        return self._query(f'SELECT COUNT(*) FROM boards b WHERE {where}', params)[0][0]
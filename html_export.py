@@ -0,0 +1,227 @@
+"""把保存的表扬榜导出为静态 HTML（每个文件一页，另有目录页）
+
+只重新生成源文件修改时间或内容哈希有变化的页面，记录保存在输出目录的
+清单文件中；需要生成的页面较多时用进程池并行渲染。
+
+    python html_export.py 表扬榜目录 -o html
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import string
+import sys
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import storage
+
+MANIFEST_FILE = '.export_manifest.json'
+INDEX_PAGE = 'index.html'
+PARALLEL_THRESHOLD = 8  # 少于这么多页时直接渲染，省去启动进程池的开销
+
+STYLE = '''body{font-family:"Microsoft YaHei",sans-serif;background:#87CEED;margin:2em}
+table{border-collapse:collapse;background:#fff}
+th,td{border:1px solid #999;padding:.4em 1em;font-size:1.2em}
+td.p{color:green;text-align:center}td.c{color:red;text-align:center}
+.meta{color:#333}'''
+
+# 模板在导入时编译一次
+PAGE = string.Template('''<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>$title</title><style>$style</style></head>
+<body>
+<h1>$title</h1>
+<p class="meta">$meta</p>
+<table>
+<tr><th>姓名</th><th>表扬</th><th>批评</th></tr>
+$rows
+</table>
+<p><a href="$index">返回目录</a></p>
+</body>
+</html>
+''')
+ROW = '<tr><td>{}</td><td class="p">{}</td><td class="c">{}</td></tr>'.format
+INDEX = string.Template('''<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>表扬榜存档</title><style>$style</style></head>
+<body>
+<h1>表扬榜存档</h1>
+<table>
+<tr><th>日期</th><th>学科</th><th>文件</th><th>表扬</th><th>批评</th></tr>
+$rows
+</table>
+</body>
+</html>
+''')
+INDEX_ROW = ('<tr><td>{}</td><td>{}</td><td><a href="{}">{}</a></td>'
+             '<td class="p">{}</td><td class="c">{}</td></tr>').format
+
+
+def file_digest(path):
+    """文件内容的 SHA-1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_board(source, page_path, modified):
+    """渲染一个表扬榜文件，返回目录页用的摘要；不是表扬榜文件时返回 None
+
+    在工作进程中运行，所以是模块级函数。
+    """
+    try:
+        data = storage.read_board(source)
+    except (OSError, ValueError, UnicodeDecodeError):
+        return None
+    students = data.get('students') if isinstance(data, dict) else None
+    if not isinstance(students, dict) or not all(isinstance(state, dict) for state in students.values()):
+        return None
+    subject = data.get('subject', '')
+    if not isinstance(subject, str):
+        return None
+
+    praise = criticism = 0
+    rows = []
+    for name, state in students.items():
+        p = bool(state.get('praise'))
+        c = bool(state.get('criticism'))
+        praise += p
+        criticism += c
+        rows.append(ROW(html.escape(name), '✓' if p else '', '✗' if c else ''))
+    title = html.escape(f'{subject} {modified}'.strip())
+    page = PAGE.substitute(
+        title=title, style=STYLE, index=INDEX_PAGE, rows='\n'.join(rows),
+        meta=html.escape(f'{os.path.basename(source)} · 表扬 {praise} 人 · 批评 {criticism} 人'))
+    with open(page_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return {'subject': subject, 'praise': praise, 'criticism': criticism}
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def page_name(source, taken):
+    """按源文件名生成页面文件名，重名时加序号"""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    name = f'{stem}.html'
+    number = 2
+    while name in taken or name == INDEX_PAGE:
+        name = f'{stem}-{number}.html'
+        number += 1
+    return name
+
+
+def write_index(output_dir, manifest):
+    entries = sorted((entry for entry in manifest.values() if entry.get('page')),
+                     key=lambda entry: entry['modified'], reverse=True)
+    rows = '\n'.join(
+        INDEX_ROW(entry['modified'], html.escape(entry['subject']),
+                  html.escape(urllib.parse.quote(entry['page'])),
+                  html.escape(entry['file']), entry['praise'], entry['criticism'])
+        for entry in entries)
+    with open(os.path.join(output_dir, INDEX_PAGE), 'w', encoding='utf-8') as f:
+        f.write(INDEX.substitute(style=STYLE, rows=rows))
+
+
+def export(sources, output_dir, jobs=None, force=False):
+    """导出表扬榜，返回各类文件的数量统计"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir)
+    boards = storage.find_boards(sources, exclude=output_dir)
+    stats = {'rendered': 0, 'unchanged': 0, 'skipped': 0, 'removed': 0}
+
+    # 删除已不存在的源文件对应的页面
+    current = set(boards)
+    for source in [source for source in manifest if source not in current]:
+        page = manifest.pop(source).get('page')
+        if page:
+            try:
+                os.remove(os.path.join(output_dir, page))
+            except FileNotFoundError:
+                pass
+        stats['removed'] += 1
+
+    # 先比较修改时间和大小，有变化时再比较内容哈希
+    taken = {entry['page'] for entry in manifest.values() if entry.get('page')}
+    todo = []
+    for source in boards:
+        st = os.stat(source)
+        entry = manifest.get(source)
+        page_ok = entry is not None and (
+            entry.get('page') is None or os.path.exists(os.path.join(output_dir, entry['page'])))
+        if page_ok and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            stats['unchanged'] += 1
+            continue
+        digest = file_digest(source)
+        if page_ok and entry['sha1'] == digest:
+            entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+            stats['unchanged'] += 1
+            continue
+        page = entry['page'] if entry and entry.get('page') else page_name(source, taken)
+        taken.add(page)
+        modified = datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M')
+        todo.append((source, page, modified, st, digest))
+
+    args = [(source, os.path.join(output_dir, page), modified)
+            for source, page, modified, st, digest in todo]
+    if len(todo) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            summaries = list(pool.map(render_board, *zip(*args), chunksize=4))
+    else:
+        summaries = [render_board(*arg) for arg in args]
+
+    for (source, page, modified, st, digest), summary in zip(todo, summaries):
+        entry = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest}
+        if summary is None:
+            entry['page'] = None  # 不是表扬榜文件，记下来以免每次重新检查
+            taken.discard(page)
+            stats['skipped'] += 1
+            # 以前是表扬榜时生成的页面
+            try:
+                os.remove(os.path.join(output_dir, page))
+                stats['removed'] += 1
+            except FileNotFoundError:
+                pass
+        else:
+            entry.update(summary, page=page, modified=modified, file=os.path.basename(source))
+            stats['rendered'] += 1
+        manifest[source] = entry
+
+    if stats['rendered'] or stats['removed'] or not os.path.exists(
+            os.path.join(output_dir, INDEX_PAGE)):
+        write_index(output_dir, manifest)
+    save_manifest(output_dir, manifest)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把表扬榜导出为静态 HTML')
+    parser.add_argument('sources', nargs='+', help='表扬榜文件或目录')
+    parser.add_argument('-o', '--output', default='html', help='输出目录（默认 html）')
+    parser.add_argument('-j', '--jobs', type=int, help='并行渲染的进程数')
+    parser.add_argument('--force', action='store_true', help='忽略清单，全部重新生成')
+    args = parser.parse_args(argv)
+    stats = export(args.sources, args.output, args.jobs, args.force)
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
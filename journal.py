@@ -0,0 +1,226 @@
+"""表扬榜操作日志（追加写入、分批落盘、后台压缩）"""
+import json
+import os
+import threading
+
+JOURNAL_SUFFIX = '.journal'
+
+
+def journal_path(board_path):
+    """返回表扬榜文件对应的日志文件路径"""
+    return board_path + JOURNAL_SUFFIX
+
+
+def encode_record(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def record_for_event(state, event, *args):
+    """把 BoardState 的变化事件转换为日志记录，不需要记录时返回 None"""
+    if event == 'mark':
+        student, mode, value = args
+        return {'op': 'mark', 'student': student, 'mode': mode, 'value': value}
+    if event == 'batch':
+        return {'op': 'batch', 'changes': args[0]}
+    if event == 'mode':
+        return {'op': 'mode', 'value': args[0]}
+    if event == 'subject':
+        return {'op': 'subject', 'value': args[0]}
+    if event == 'load':
+        return {'op': 'snapshot', 'data': state.to_dict()}
+    return None
+
+
+def stream_record_for_event(state, event, *args):
+    """转换为推送给其他程序（实时展示、同步）的记录
+
+    日志不记录名单变化（重放时名单来自名单文件），接收方没有名单，
+    所以名单变化时发送整个快照。
+    """
+    if event in ('roster', 'add', 'remove'):
+        return {'op': 'snapshot', 'data': state.to_dict()}
+    return record_for_event(state, event, *args)
+
+
+def apply_record(state, record):
+    """把一条日志记录应用到 BoardState（记录都是绝对值，重复应用结果不变）"""
+    op = record.get('op')
+    if op == 'mark':
+        if record['student'] in state:
+            state.set(record['student'], record['value'], record['mode'])
+    elif op == 'batch':
+        state.set_many([(student, mode, value) for student, mode, value in record['changes']
+                        if student in state])
+    elif op == 'mode':
+        state.set_mode(record['value'])
+    elif op == 'subject':
+        state.set_subject(record['value'])
+    elif op == 'snapshot':
+        state.load_dict(record['data'])
+
+
+def replay(path, state):
+    """把日志文件中的记录依次应用到 state，返回应用的记录数"""
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # 断电时写了一半的最后一行
+            apply_record(state, record)
+            count += 1
+    return count
+
+
+class BoardJournal:
+    """追加写入的操作日志
+
+    每次修改追加一行JSON，每 batch_size 条（或调用 sync 时）fsync 一次；
+    上次压缩后日志增长超过 compact_threshold 字节时，可在后台线程中
+    把它压缩为一条快照记录。
+    表扬榜文件本身只在用户保存时才会改写。
+    """
+
+    def __init__(self, board_path, batch_size=20, compact_threshold=256 * 1024,
+                 truncate=False):
+        self.path = journal_path(board_path)
+        self.batch_size = batch_size
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'w' if truncate else 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._compacted_size = 0  # 上次压缩后快照记录的大小
+        self._generation = 0  # 日志文件每次被改写时加一
+        self._compactor = None
+
+    @property
+    def unsynced(self):
+        return self._unsynced
+
+    def append(self, record):
+        """追加一条记录，攒够一批后落盘"""
+        with self._lock:
+            self._file.write(encode_record(record))
+            self._unsynced += 1
+            if self._unsynced >= self.batch_size:
+                self._sync_locked()
+
+    def sync(self):
+        """把尚未落盘的记录写入磁盘"""
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def size(self):
+        with self._lock:
+            return self._file.tell()
+
+    def needs_compaction(self):
+        return (self._compactor is None
+                and self.size() - self._compacted_size >= self.compact_threshold)
+
+    def compact(self, snapshot):
+        """在后台线程中把日志压缩为一条快照记录
+
+        snapshot 必须在调用线程上取得（BoardState.to_dict()），
+        压缩期间追加的记录会被接到新日志后面。
+        """
+        if self._compactor is not None:
+            return
+        with self._lock:
+            self._sync_locked()
+            offset = self._file.tell()
+        self._compactor = threading.Thread(
+            target=self._compact, args=(snapshot, offset), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, snapshot, offset):
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as tmp:
+                tmp.write(encode_record({'op': 'snapshot', 'data': snapshot}))
+                snapshot_size = tmp.tell()
+                tmp.flush()
+                os.fsync(tmp.fileno())
+                with self._lock:
+                    # 接上压缩期间追加的记录，然后原子替换
+                    tmp.write(self._read_tail(offset))
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                    self._replace_locked(tmp_path)
+                    self._compacted_size = snapshot_size
+        except OSError:
+            # 压缩失败时保留原日志，继续追加
+            with self._lock:
+                if self._file.closed:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            self._compactor = None
+
+    def _read_tail(self, offset):
+        self._file.flush()
+        with open(self.path, 'rb') as old:
+            old.seek(offset)
+            return old.read().decode('utf-8')
+
+    def _replace_locked(self, tmp_path):
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._generation += 1
+
+    def checkpoint(self):
+        """记录当前日志位置，保存完成后传给 reset 只清除此前的记录"""
+        with self._lock:
+            return (self._generation, self._file.tell())
+
+    def wait(self):
+        """等待正在进行的压缩完成"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def reset(self, checkpoint=None):
+        """表扬榜已保存后清除日志
+
+        给出 checkpoint 时只清除该位置之前的记录；若日志在此期间已被
+        压缩改写，则保留全部记录（记录都是绝对值，重放结果不变）。
+        """
+        self.wait()
+        with self._lock:
+            if checkpoint is None:
+                self._file.close()
+                self._file = open(self.path, 'w', encoding='utf-8')
+                self._unsynced = 0
+                self._generation += 1
+            elif checkpoint[0] == self._generation:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as tmp:
+                    tmp.write(self._read_tail(checkpoint[1]))
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                self._replace_locked(tmp_path)
+            else:
+                return
+            self._compacted_size = 0
+
+    def close(self, discard=False):
+        """关闭日志，discard 为 True 时删除日志文件"""
+        self.wait()
+        with self._lock:
+            if not discard:
+                self._sync_locked()
+            self._file.close()
+            if discard and os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,276 @@
+"""表扬榜实时展示服务（可选，只用标准库）
+
+在后台线程中运行 asyncio HTTP 服务，提供只读的表扬榜页面，并通过
+Server-Sent Events 推送状态变化。推送的内容与操作日志的记录相同
+（mark/batch/mode/subject/snapshot），每次变化只在界面线程序列化一次，
+再由事件循环线程把同一份字节放入每个观看者的队列，不会阻塞界面。
+
+用 --live[=[主机:]端口] 或环境变量 PRAISE_BOARD_LIVE 开启，
+默认只监听 127.0.0.1:8765；走廊屏幕等其他设备观看时监听 0.0.0.0。
+
+    GET /        表扬榜页面
+    GET /events  事件流（连接后先收到一条快照）
+    GET /state   当前状态 JSON
+"""
+import asyncio
+import json
+import threading
+
+import cli_flags
+import journal
+
+ENV_VAR = 'PRAISE_BOARD_LIVE'
+FLAG = '--live'
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+QUEUE_SIZE = 256  # 每个观看者最多积压的事件数，超过时断开（浏览器会自动重连）
+KEEPALIVE_SECONDS = 15
+MAX_REQUEST_BYTES = 8192
+
+PAGE = '''<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><meta name="viewport" content="width=device-width">
+<title>班级表扬榜</title>
+<style>
+body{font-family:"Microsoft YaHei",sans-serif;background:#87CEED;margin:1em}
+h1{font-size:2.5em;margin:.2em 0}
+#board{display:flex;flex-wrap:wrap;gap:.6em}
+.s{background:#fff;border:2px ridge #ccc;padding:.4em .8em;font-size:1.8em;min-width:5em}
+.s b{margin-left:.4em}
+.praise b{color:green}.criticism b{color:red}
+</style></head>
+<body><h1 id="subject"></h1><div id="board"></div>
+<script>
+let board = {subject: '', mode: 'praise', students: {}};
+const cells = new Map();
+function mark(name) {
+  const cell = cells.get(name), state = board.students[name];
+  if (!cell || !state) return;
+  const on = state[board.mode];
+  cell.lastChild.textContent = on ? (board.mode === 'praise' ? '\\u2713' : '\\u2717') : '';
+}
+function render() {
+  document.getElementById('subject').textContent = board.subject;
+  const root = document.getElementById('board');
+  root.className = board.mode;
+  root.textContent = '';
+  cells.clear();
+  for (const name of Object.keys(board.students)) {
+    const cell = document.createElement('div');
+    cell.className = 's';
+    cell.append(name, document.createElement('b'));
+    root.append(cell);
+    cells.set(name, cell);
+    mark(name);
+  }
+}
+const events = new EventSource('/events');
+events.onmessage = (e) => {
+  const r = JSON.parse(e.data);
+  if (r.op === 'snapshot') { board = r.data; render(); }
+  else if (r.op === 'mark') {
+    if (board.students[r.student]) { board.students[r.student][r.mode] = r.value; mark(r.student); }
+  } else if (r.op === 'batch') {
+    for (const [name, mode, value] of r.changes) {
+      if (board.students[name]) { board.students[name][mode] = value; mark(name); }
+    }
+  } else if (r.op === 'mode') {
+    board.mode = r.value;
+    document.getElementById('board').className = r.value;
+    for (const name of cells.keys()) mark(name);
+  } else if (r.op === 'subject') {
+    board.subject = r.value;
+    document.getElementById('subject').textContent = r.value;
+  }
+};
+</script></body></html>
+'''.encode('utf-8')
+
+
+def encode_event(record):
+    """编码为一条 SSE 消息"""
+    return ('data: ' + journal.encode_record(record) + '\n').encode('utf-8')
+
+
+def _response(status, content_type, body):
+    head = (f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n')
+    return head.encode('ascii') + body
+
+
+class LiveBoardServer:
+    """在后台线程中运行的只读表扬榜 HTTP/SSE 服务"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._clients = set()  # 每个观看者的 asyncio.Queue
+        self._board = {'subject': '', 'mode': 'praise', 'students': {}}
+        self._snapshot = None  # 当前状态编码后的快照消息，状态变化时作废
+
+    # ---- 界面线程调用 ----
+
+    def start(self, snapshot=None):
+        """启动服务，端口被占用等错误以 OSError 抛出"""
+        if snapshot is not None:
+            self._board = snapshot
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            loop = self._loop = asyncio.new_event_loop()
+            try:
+                self._server = loop.run_until_complete(
+                    asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                errors.append(e)
+                ready.set()
+                loop.close()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+            loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread = None
+            raise errors[0]
+
+    def publish(self, record):
+        """推送一条记录：在调用线程编码一次，由事件循环线程分发给所有观看者"""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._broadcast, record, encode_event(record))
+
+    def on_state_event(self, state, event, *args):
+        """BoardState 观察者回调"""
+        record = journal.stream_record_for_event(state, event, *args)
+        if record is not None:
+            self.publish(record)
+
+    def stop(self):
+        """断开所有观看者并结束服务线程"""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join()
+        self._thread = None
+
+    @property
+    def url(self):
+        host = 'localhost' if self.host in ('', '0.0.0.0', '127.0.0.1') else self.host
+        return f'http://{host}:{self.port}/'
+
+    # ---- 事件循环线程 ----
+
+    def _broadcast(self, record, message):
+        op = record['op']
+        if op == 'snapshot':
+            self._board = record['data']
+        elif op == 'mark':
+            student = self._board['students'].get(record['student'])
+            if student is not None:
+                student[record['mode']] = record['value']
+        elif op == 'batch':
+            students = self._board['students']
+            for name, mode, value in record['changes']:
+                if name in students:
+                    students[name][mode] = value
+        elif op in ('mode', 'subject'):
+            self._board[op] = record['value']
+        self._snapshot = None
+
+        for client in tuple(self._clients):
+            try:
+                client.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(client)
+
+    def _drop(self, client):
+        """跟不上的观看者：清空队列并通知其连接结束"""
+        self._clients.discard(client)
+        while not client.empty():
+            client.get_nowait()
+        client.put_nowait(None)
+
+    def _shutdown(self):
+        for client in tuple(self._clients):
+            self._drop(client)
+        self._server.close()
+        self._loop.call_later(0.1, self._loop.stop)
+
+    def _snapshot_message(self):
+        if self._snapshot is None:
+            self._snapshot = encode_event({'op': 'snapshot', 'data': self._board})
+        return self._snapshot
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                request = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            if len(request) > MAX_REQUEST_BYTES:
+                return
+            parts = request.split(b'\r\n', 1)[0].split()
+            method, path = (parts[0], parts[1].split(b'?')[0]) if len(parts) >= 2 else (b'', b'')
+            if method != b'GET':
+                writer.write(_response('405 Method Not Allowed', 'text/plain', b''))
+            elif path == b'/':
+                writer.write(_response('200 OK', 'text/html; charset=utf-8', PAGE))
+            elif path == b'/state':
+                body = json.dumps(self._board, ensure_ascii=False).encode('utf-8')
+                writer.write(_response('200 OK', 'application/json; charset=utf-8', body))
+            elif path == b'/events':
+                await self._stream(writer)
+            else:
+                writer.write(_response('404 Not Found', 'text/plain', b''))
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer):
+        client = asyncio.Queue(QUEUE_SIZE)
+        self._clients.add(client)
+        try:
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n'
+                         b'Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n')
+            writer.write(self._snapshot_message())
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(client.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    message = b': ping\n\n'
+                if message is None:
+                    return
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self._clients.discard(client)
+
+
+def from_environment(argv=None, environ=None):
+    """根据命令行参数和环境变量返回 (主机, 端口)，未开启时返回 None，端口无效时抛出 ValueError"""
+    value = cli_flags.flag_value(FLAG, ENV_VAR, argv, environ)
+    if value is None:
+        return None
+    return parse_address(value)
+
+
+def parse_address(value):
+    """把 [主机:]端口 转换为 (主机, 端口)，省略的部分使用默认值；端口无效时抛出 ValueError"""
+    host, _, port = value.rpartition(':')
+    if not port:
+        return host or DEFAULT_HOST, DEFAULT_PORT
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f'无效的端口: {port!r}')
+    return host or DEFAULT_HOST, int(port)
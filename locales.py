@@ -0,0 +1,388 @@
+"""界面文字目录
+
+内置语言的文字集中在 TRANSLATIONS 中；locales/<语言代码>.json 可以覆盖
+或补充文字（也可以新增语言）。语言包在第一次使用时才读取，解析结果
+按源文件的修改时间缓存在 locales/catalog.cache（marshal 格式）中。
+"""
+import json
+import marshal
+import os
+
+LOCALE_DIR = 'locales'
+CACHE_FILE = 'catalog.cache'
+DEFAULT_LANGUAGE = 'zh_CN'
+LANGUAGE_NAMES = {
+    'zh_CN': '中文简体',
+    'zh_TW': '中文繁體',
+    'en_US': 'English US',
+    'en_UK': 'English UK',
+}
+
+TRANSLATIONS = {
+    'zh_CN': {
+        'class_display_board': '班级实时表现公示栏',
+        'file': '文件',
+        'save': '保存',
+        'save_as': '另存为',
+        'open': '打开',
+        'preferences': '首选项',
+        'fullscreen': '全屏',
+        'exit': '退出',
+        'language': '语言',
+        'date_format': '日期格式',
+        'time_format': '时间格式',
+        'save_success': '数据已成功保存！',
+        'save_error': '保存数据时出错: ',
+        'load_success': '数据已成功加载！',
+        'load_error': '加载数据时出错: ',
+        'save_changes': '保存更改',
+        'save_before_exit': '是否保存更改后再退出？',
+        'save_before_load': '是否保存当前更改？',
+        'journal_mode': '实时记录操作（防止意外丢失）',
+        'saving': '正在保存…',
+        'history': '历史记录',
+        'history_unavailable': '无法打开历史存档',
+        'student': '学生',
+        'subject': '学科',
+        'all_subjects': '全部学科',
+        'start_date': '开始日期',
+        'end_date': '结束日期',
+        'query': '查询',
+        'date': '日期',
+        'praise_count': '表扬',
+        'criticism_count': '批评',
+        'board_count': '表扬榜数量',
+        'student_count': '人数',
+        'import_roster': '导入名单',
+        'choose_class': '选择班级',
+        'preferences_updated': '首选项已更新',
+        'success': '成功',
+        'error': '错误',
+        'ok': '确定',
+        'cancel': '取消',
+        'new_board': '新建标签页',
+        'close_board': '关闭标签页',
+        'save_before_close': '是否保存更改后再关闭？',
+        'edit': '编辑',
+        'undo': '撤销',
+        'redo': '重做',
+        'reset_marks': '清除所有标记',
+        'invert_marks': '反转标记',
+        'copy_praise': '把表扬复制到批评',
+        'merge_boards': '合并统计',
+        'merging': '正在合并…',
+        'group': '小组',
+        'export': '导出',
+        'analytics': '趋势分析',
+        'analyzing': '正在分析…',
+        'praise_rate': '表扬率',
+        'criticism_rate': '批评率',
+        'criticism_streak': '最长连续批评',
+        'trend': '每周趋势',
+        'week': '周',
+        'display_mode': '显示方式',
+        'display_auto': '自动',
+        'display_widgets': '标签',
+        'display_canvas': '单画布（适合人数多）',
+        'find': '查找学生',
+        'no_match': '没有找到',
+        'save_merged': '已保存，并合并了其他电脑对此文件的修改'
+    },
+    'zh_TW': {
+        'class_display_board': '班級實時表現公示欄',
+        'file': '文件',
+        'save': '保存',
+        'save_as': '另存為',
+        'open': '打開',
+        'preferences': '首選項',
+        'fullscreen': '全螢幕',
+        'exit': '退出',
+        'language': '語言',
+        'date_format': '日期格式',
+        'time_format': '時間格式',
+        'save_success': '資料已成功保存！',
+        'save_error': '保存資料時出錯: ',
+        'load_success': '資料已成功載入！',
+        'load_error': '載入資料時出錯: ',
+        'save_changes': '保存更改',
+        'save_before_exit': '是否保存更改後再退出？',
+        'save_before_load': '是否保存當前更改？',
+        'journal_mode': '即時記錄操作（防止意外遺失）',
+        'saving': '正在保存…',
+        'history': '歷史記錄',
+        'history_unavailable': '無法打開歷史存檔',
+        'student': '學生',
+        'subject': '學科',
+        'all_subjects': '全部學科',
+        'start_date': '開始日期',
+        'end_date': '結束日期',
+        'query': '查詢',
+        'date': '日期',
+        'praise_count': '表揚',
+        'criticism_count': '批評',
+        'board_count': '表揚榜數量',
+        'student_count': '人數',
+        'import_roster': '導入名單',
+        'choose_class': '選擇班級',
+        'preferences_updated': '首選項已更新',
+        'success': '成功',
+        'error': '錯誤',
+        'ok': '確定',
+        'cancel': '取消',
+        'new_board': '新增分頁',
+        'close_board': '關閉分頁',
+        'save_before_close': '是否保存更改後再關閉？',
+        'edit': '編輯',
+        'undo': '復原',
+        'redo': '重做',
+        'reset_marks': '清除所有標記',
+        'invert_marks': '反轉標記',
+        'copy_praise': '把表揚複製到批評',
+        'merge_boards': '合併統計',
+        'merging': '正在合併…',
+        'group': '小組',
+        'export': '匯出',
+        'analytics': '趨勢分析',
+        'analyzing': '正在分析…',
+        'praise_rate': '表揚率',
+        'criticism_rate': '批評率',
+        'criticism_streak': '最長連續批評',
+        'trend': '每週趨勢',
+        'week': '週',
+        'display_mode': '顯示方式',
+        'display_auto': '自動',
+        'display_widgets': '標籤',
+        'display_canvas': '單畫布（適合人數多）',
+        'find': '查找學生',
+        'no_match': '沒有找到',
+        'save_merged': '已保存，並合併了其他電腦對此檔案的修改'
+    },
+    'en_US': {
+        'class_display_board': 'Class Performance Board',
+        'file': 'File',
+        'save': 'Save',
+        'save_as': 'Save As',
+        'open': 'Open',
+        'preferences': 'Preferences',
+        'fullscreen': 'Fullscreen',
+        'exit': 'Exit',
+        'language': 'Language',
+        'date_format': 'Date Format',
+        'time_format': 'Time Format',
+        'save_success': 'Data saved successfully!',
+        'save_error': 'Error saving data: ',
+        'load_success': 'Data loaded successfully!',
+        'load_error': 'Error loading data: ',
+        'save_changes': 'Save Changes',
+        'save_before_exit': 'Save changes before exiting?',
+        'save_before_load': 'Save current changes?',
+        'journal_mode': 'Record changes as they happen (crash protection)',
+        'saving': 'Saving…',
+        'history': 'History',
+        'history_unavailable': 'Cannot open the history archive',
+        'student': 'Student',
+        'subject': 'Subject',
+        'all_subjects': 'All subjects',
+        'start_date': 'Start date',
+        'end_date': 'End date',
+        'query': 'Search',
+        'date': 'Date',
+        'praise_count': 'Praise',
+        'criticism_count': 'Criticism',
+        'board_count': 'Boards',
+        'student_count': 'Students',
+        'import_roster': 'Import Roster',
+        'choose_class': 'Choose Class',
+        'preferences_updated': 'Preferences updated',
+        'success': 'Success',
+        'error': 'Error',
+        'ok': 'OK',
+        'cancel': 'Cancel',
+        'new_board': 'New Tab',
+        'close_board': 'Close Tab',
+        'save_before_close': 'Save changes before closing?',
+        'edit': 'Edit',
+        'undo': 'Undo',
+        'redo': 'Redo',
+        'reset_marks': 'Reset All Marks',
+        'invert_marks': 'Invert Marks',
+        'copy_praise': 'Copy Praise to Criticism',
+        'merge_boards': 'Merge Boards',
+        'merging': 'Merging…',
+        'group': 'Group',
+        'export': 'Export',
+        'analytics': 'Trends',
+        'analyzing': 'Analyzing…',
+        'praise_rate': 'Praise Rate',
+        'criticism_rate': 'Criticism Rate',
+        'criticism_streak': 'Longest Criticism Streak',
+        'trend': 'Weekly Trend',
+        'week': 'Week',
+        'display_mode': 'Display Mode',
+        'display_auto': 'Automatic',
+        'display_widgets': 'Widgets',
+        'display_canvas': 'Single canvas (large classes)',
+        'find': 'Find Student',
+        'no_match': 'No match',
+        'save_merged': 'Saved and merged changes made to this file on another computer'
+    },
+    'en_UK': {
+        'class_display_board': 'Class Performance Board',
+        'file': 'File',
+        'save': 'Save',
+        'save_as': 'Save As',
+        'open': 'Open',
+        'preferences': 'Preferences',
+        'fullscreen': 'Fullscreen',
+        'exit': 'Exit',
+        'language': 'Language',
+        'date_format': 'Date Format',
+        'time_format': 'Time Format',
+        'save_success': 'Data saved successfully!',
+        'save_error': 'Error saving data: ',
+        'load_success': 'Data loaded successfully!',
+        'load_error': 'Error loading data: ',
+        'save_changes': 'Save Changes',
+        'save_before_exit': 'Save changes before exiting?',
+        'save_before_load': 'Save current changes?',
+        'journal_mode': 'Record changes as they happen (crash protection)',
+        'saving': 'Saving…',
+        'history': 'History',
+        'history_unavailable': 'Cannot open the history archive',
+        'student': 'Student',
+        'subject': 'Subject',
+        'all_subjects': 'All subjects',
+        'start_date': 'Start date',
+        'end_date': 'End date',
+        'query': 'Search',
+        'date': 'Date',
+        'praise_count': 'Praise',
+        'criticism_count': 'Criticism',
+        'board_count': 'Boards',
+        'student_count': 'Students',
+        'import_roster': 'Import Roster',
+        'choose_class': 'Choose Class',
+        'preferences_updated': 'Preferences updated',
+        'success': 'Success',
+        'error': 'Error',
+        'ok': 'OK',
+        'cancel': 'Cancel',
+        'new_board': 'New Tab',
+        'close_board': 'Close Tab',
+        'save_before_close': 'Save changes before closing?',
+        'edit': 'Edit',
+        'undo': 'Undo',
+        'redo': 'Redo',
+        'reset_marks': 'Reset All Marks',
+        'invert_marks': 'Invert Marks',
+        'copy_praise': 'Copy Praise to Criticism',
+        'merge_boards': 'Merge Boards',
+        'merging': 'Merging…',
+        'group': 'Group',
+        'export': 'Export',
+        'analytics': 'Trends',
+        'analyzing': 'Analysing…',
+        'praise_rate': 'Praise Rate',
+        'criticism_rate': 'Criticism Rate',
+        'criticism_streak': 'Longest Criticism Streak',
+        'trend': 'Weekly Trend',
+        'week': 'Week',
+        'display_mode': 'Display Mode',
+        'display_auto': 'Automatic',
+        'display_widgets': 'Widgets',
+        'display_canvas': 'Single canvas (large classes)',
+        'find': 'Find Student',
+        'no_match': 'No match',
+        'save_merged': 'Saved and merged changes made to this file on another computer'
+    }
+}
+
+
+def _valid_pack(pack):
+    """语言包必须是 {键: 文字} 对象"""
+    return isinstance(pack, dict) and all(isinstance(value, str) for value in pack.values())
+
+
+class LocaleCatalog:
+    """按需加载的语言目录"""
+
+    def __init__(self, directory=LOCALE_DIR):
+        self.directory = directory
+        self.cache_path = os.path.join(directory, CACHE_FILE)
+        self._packs = {}  # 语言代码 -> 合并后的文字
+        self._cache = None  # 缓存文件内容，第一次需要时才读取
+
+    def languages(self):
+        """可用的语言代码（内置语言和 locales 目录中的语言包）"""
+        codes = list(TRANSLATIONS)
+        try:
+            for filename in sorted(os.listdir(self.directory)):
+                code, ext = os.path.splitext(filename)
+                if ext == '.json' and code not in codes:
+                    codes.append(code)
+        except OSError:
+            pass
+        return codes
+
+    def get(self, lang_code):
+        """返回语言的全部文字，缺少的键用默认语言补齐"""
+        pack = self._packs.get(lang_code)
+        if pack is None:
+            pack = self._packs[lang_code] = self._load(lang_code)
+        return pack
+
+    def pack_path(self, lang_code):
+        """语言包文件的路径（文件可以不存在）"""
+        return os.path.join(self.directory, f'{lang_code}.json')
+
+    def invalidate(self, lang_code):
+        """语言包文件修改后调用，下次 get 时重新读取"""
+        self._packs.pop(lang_code, None)
+
+    def _load(self, lang_code):
+        base = dict(TRANSLATIONS[DEFAULT_LANGUAGE])
+        base.update(TRANSLATIONS.get(lang_code, {}))
+
+        lang_file = self.pack_path(lang_code)
+        try:
+            stat = os.stat(lang_file)
+        except OSError:
+            return base  # 没有语言包，只用内置文字
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cache = self._read_cache()
+        cached = cache.get(lang_code)
+        if cached is not None and cached[0] == stamp:
+            pack = cached[1]
+        else:
+            try:
+                with open(lang_file, 'r', encoding='utf-8') as f:
+                    pack = json.load(f)
+            except (OSError, ValueError):
+                return base
+            if not _valid_pack(pack):
+                return base  # 不是 {键: 文字}，可能是保存错了，只用内置文字
+            cache[lang_code] = (stamp, pack)
+            self._write_cache(cache)
+        if not _valid_pack(pack):
+            return base
+        base.update(pack)
+        return base
+
+    def _read_cache(self):
+        if self._cache is None:
+            try:
+                with open(self.cache_path, 'rb') as f:
+                    self._cache = marshal.load(f)
+            except (OSError, EOFError, ValueError, TypeError):
+                self._cache = {}
+        return self._cache
+
+    def _write_cache(self, cache):
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass  # 缓存写不进去时下次重新解析即可
@@ -0,0 +1,147 @@
+"""学生姓名检索（前缀和拼音首字母）
+
+每名学生登记几个检索词：完整姓名、去掉姓之后的名字、拼音首字母（如
+张三丰 -> zsf、sf），全部放在一个排好序的列表中，按前缀查询时用二分
+查找定位，耗时与名单人数基本无关。名单变化时只增删有变化的学生。
+
+拼音首字母按 GB2312 一级汉字（按拼音排序）的编码区间计算，不需要
+额外的库；二级汉字和繁体字没有首字母，仍可按汉字检索。
+"""
+import bisect
+
+MAX_RESULTS = 20
+REBUILD_RATIO = 4  # 新增的学生多于已有检索词的 1/REBUILD_RATIO 时整体重新排序
+
+# GB2312 一级汉字中每个拼音首字母开始的编码
+_GB2312_STARTS = [
+    (0xB0A1, 'a'), (0xB0C5, 'b'), (0xB2C1, 'c'), (0xB4EE, 'd'), (0xB6EA, 'e'),
+    (0xB7A2, 'f'), (0xB8C1, 'g'), (0xB9FE, 'h'), (0xBBF7, 'j'), (0xBFA6, 'k'),
+    (0xC0AC, 'l'), (0xC2E8, 'm'), (0xC4C3, 'n'), (0xC5B6, 'o'), (0xC5BE, 'p'),
+    (0xC6DA, 'q'), (0xC8BB, 'r'), (0xC8F6, 's'), (0xCBFA, 't'), (0xCDDA, 'w'),
+    (0xCEF4, 'x'), (0xD1B9, 'y'), (0xD4D1, 'z'),
+]
+_GB2312_CODES = [code for code, letter in _GB2312_STARTS]
+_GB2312_END = 0xD7F9  # 一级汉字的最后一个编码
+_initials = {}  # 字 -> 首字母（没有时为空字符串）
+
+
+def initial_of(char):
+    """一个字的拼音首字母；字母和数字返回其小写，其他字符返回空字符串"""
+    letter = _initials.get(char)
+    if letter is not None:
+        return letter
+    letter = ''
+    if char.isascii():
+        if char.isalnum():
+            letter = char.lower()
+    else:
+        try:
+            encoded = char.encode('gb2312')
+        except UnicodeEncodeError:
+            encoded = b''
+        if len(encoded) == 2:
+            code = encoded[0] << 8 | encoded[1]
+            if _GB2312_CODES[0] <= code <= _GB2312_END:
+                letter = _GB2312_STARTS[bisect.bisect_right(_GB2312_CODES, code) - 1][1]
+    _initials[char] = letter
+    return letter
+
+
+def pinyin_initials(text):
+    """姓名的拼音首字母，如 张三丰 -> zsf"""
+    return ''.join(initial_of(char) for char in text)
+
+
+def normalize(text):
+    return ''.join(text.split()).lower()
+
+
+def search_terms(name):
+    """学生的检索词：完整姓名、名字、各个词开头的部分和拼音首字母"""
+    text = normalize(name)
+    if not text:
+        return ()
+    terms = {text}
+    words = name.lower().split()
+    if len(words) > 1:
+        # 西文姓名：从每个词开头检索
+        for i in range(1, len(words)):
+            terms.add(''.join(words[i:]))
+    elif not text.isascii():
+        # 中文姓名：从姓之后的每个字开头检索（复姓也能用名字找到）
+        terms.update(text[i:] for i in range(1, len(text)))
+    initials = pinyin_initials(text)
+    if initials and initials != text:
+        terms.add(initials)
+        terms.update(initials[i:] for i in range(1, len(initials)))
+    return tuple(terms)
+
+
+class NameIndex:
+    """按前缀检索学生的有序索引"""
+
+    def __init__(self, roster=None):
+        self._terms = []  # 排好序的 (检索词, 学生姓名 key)
+        self._students = {}  # key -> (显示的姓名, 检索词)
+        if roster is not None:
+            self.update(roster)
+
+    def __len__(self):
+        return len(self._students)
+
+    def add(self, key, name):
+        """登记一名学生（已登记时先移除）"""
+        if key in self._students:
+            self.remove(key)
+        terms = search_terms(name)
+        self._students[key] = (name, terms)
+        for term in terms:
+            bisect.insort(self._terms, (term, key))
+
+    def remove(self, key):
+        entry = self._students.pop(key, None)
+        if entry is None:
+            return
+        for term in entry[1]:
+            i = bisect.bisect_left(self._terms, (term, key))
+            if i < len(self._terms) and self._terms[i] == (term, key):
+                del self._terms[i]
+
+    def update(self, roster):
+        """按新名单增删有变化的学生"""
+        names = {student.key: student.name for group in roster.groups for student in group.students}
+        for key in [key for key, (name, terms) in self._students.items() if names.get(key) != name]:
+            self.remove(key)
+        added = [(key, name) for key, name in names.items() if key not in self._students]
+        if len(added) * REBUILD_RATIO <= len(self._terms):
+            for key, name in added:
+                self.add(key, name)
+            return
+        # 第一次建立或大量新增：一次排序比逐个插入快
+        for key, name in added:
+            terms = search_terms(name)
+            self._students[key] = (name, terms)
+            self._terms.extend((term, key) for term in terms)
+        self._terms.sort()
+
+    def name(self, key):
+        return self._students[key][0]
+
+    def search(self, text, limit=MAX_RESULTS):
+        """以 text 开头的学生（key），最多 limit 个，检索词按字母顺序"""
+        query = normalize(text)
+        if not query:
+            return []
+        terms = self._terms
+        results = []
+        seen = set()
+        i = bisect.bisect_left(terms, (query,))
+        while i < len(terms) and len(results) < limit:
+            term, key = terms[i]
+            if not term.startswith(query):
+                break
+            if key not in seen:
+                seen.add(key)
+                results.append(key)
+            i += 1
+        return results
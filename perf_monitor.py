@@ -0,0 +1,204 @@
+"""热点路径性能监测（默认关闭）
+
+设置环境变量 PRAISE_BOARD_PERF（值为 1 或样本输出路径），或用 --perf[=路径]
+启动时，记录指定方法每次调用的耗时和事件循环延迟（after 实际触发时间与
+预定时间之差），样本放入固定大小的环形缓冲区，可导出为 JSON lines 文件
+（默认 perf_samples.jsonl，退出时也会导出）。
+
+隐藏快捷键：Ctrl+Alt+P 显示/隐藏 p50/p99 浮层，Ctrl+Alt+D 导出样本。
+未开启时使用 NullMonitor，不包装任何方法，没有额外开销。
+"""
+import collections
+import functools
+import json
+import math
+import os
+import time
+
+import cli_flags
+
+ENV_VAR = 'PRAISE_BOARD_PERF'
+FLAG = '--perf'
+DEFAULT_OUTPUT = 'perf_samples.jsonl'
+RING_SIZE = 4096  # 环形缓冲区保留的样本数
+LAG_INTERVAL_MS = 100  # 事件循环延迟的采样间隔
+OVERLAY_REFRESH_MS = 500  # 浮层刷新间隔
+LOOP_LAG = 'loop_lag'
+
+
+class LatencyHistogram:
+    """对数分桶的耗时直方图（每个 2 倍区间分 BUCKETS_PER_OCTAVE 个桶）
+
+    记录为 O(1)，百分位数的误差不超过一个桶宽（约 19%）。
+    """
+
+    BUCKETS_PER_OCTAVE = 4
+
+    def __init__(self):
+        self.buckets = collections.Counter()  # 桶序号 -> 次数
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        us = ms * 1000
+        bucket = math.floor(math.log2(us) * self.BUCKETS_PER_OCTAVE) if us >= 1 else -1
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        """第 p（0~100）百分位的耗时上界（毫秒）"""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                upper = 2 ** ((bucket + 1) / self.BUCKETS_PER_OCTAVE) / 1000
+                return min(upper, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class PerfMonitor:
+    """耗时直方图、事件循环延迟和最近样本的环形缓冲区"""
+
+    enabled = True
+
+    def __init__(self, output=DEFAULT_OUTPUT, ring_size=RING_SIZE):
+        self.output = output
+        self.histograms = {}
+        self.samples = collections.deque(maxlen=ring_size)
+        self._root = None
+        self._lag_due = None
+        self._overlay = None
+
+    def record(self, name, ms):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.add(ms)
+        self.samples.append((time.time(), name, ms))
+
+    def wrap(self, name, func):
+        """返回记录每次调用耗时的包装函数"""
+        record = self.record
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, (clock() - start) * 1000)
+        return timed
+
+    def instrument(self, obj, names):
+        """用实例属性替换 obj 的指定方法（须在方法被绑定到控件和回调之前调用）"""
+        for name in names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def attach(self, root):
+        """开始采样事件循环延迟并绑定隐藏快捷键"""
+        self._root = root
+        root.bind('<Control-Alt-p>', lambda e: self.toggle_overlay())
+        root.bind('<Control-Alt-P>', lambda e: self.toggle_overlay())
+        root.bind('<Control-Alt-d>', lambda e: self.dump())
+        root.bind('<Control-Alt-D>', lambda e: self.dump())
+        self._schedule_lag()
+
+    def _schedule_lag(self):
+        self._lag_due = time.perf_counter() + LAG_INTERVAL_MS / 1000
+        self._root.after(LAG_INTERVAL_MS, self._lag_tick)
+
+    def _lag_tick(self):
+        self.record(LOOP_LAG, max(0.0, (time.perf_counter() - self._lag_due) * 1000))
+        self._schedule_lag()
+
+    def summary(self):
+        """[(名称, 次数, p50, p99, 最大值)]，按名称排序"""
+        return [(name, h.count, h.percentile(50), h.percentile(99), h.max)
+                for name, h in sorted(self.histograms.items())]
+
+    def dump(self, path=None):
+        """把环形缓冲区中的样本写入 JSON lines 文件，返回写入的样本数"""
+        path = path or self.output
+        samples = list(self.samples)
+        with open(path, 'w', encoding='utf-8') as f:
+            for timestamp, name, ms in samples:
+                f.write(json.dumps({'time': round(timestamp, 6), 'name': name,
+                                    'ms': round(ms, 4)}) + '\n')
+        if self._overlay is not None:
+            self._overlay.note = f'{len(samples)} samples -> {os.path.abspath(path)}'
+        return len(samples)
+
+    def toggle_overlay(self):
+        if self._overlay is None:
+            self._overlay = PerfOverlay(self._root, self)
+        self._overlay.toggle()
+
+
+class PerfOverlay:
+    """浮在窗口右上角的耗时统计"""
+
+    def __init__(self, root, monitor):
+        import tkinter as tk
+        self.root = root
+        self.monitor = monitor
+        self.note = ''
+        self.label = tk.Label(root, font=('Courier', 10), justify='left', anchor='nw',
+                              bg='black', fg='#00FF00', padx=8, pady=6)
+        self._job = None
+
+    def toggle(self):
+        if self._job is None:
+            self.label.place(relx=1.0, rely=0.0, anchor='ne')
+            self.label.lift()
+            self.refresh()
+        else:
+            self.root.after_cancel(self._job)
+            self._job = None
+            self.label.place_forget()
+
+    def refresh(self):
+        lines = [f'{"name":<22}{"n":>7}{"p50 ms":>10}{"p99 ms":>10}{"max ms":>10}']
+        for name, count, p50, p99, worst in self.monitor.summary():
+            lines.append(f'{name:<22}{count:>7}{p50:>10.3f}{p99:>10.3f}{worst:>10.3f}')
+        if self.note:
+            lines.append(self.note)
+        self.label.config(text='\n'.join(lines))
+        self._job = self.root.after(OVERLAY_REFRESH_MS, self.refresh)
+
+
+class NullMonitor:
+    """未开启监测时使用，所有操作都不做任何事"""
+
+    enabled = False
+
+    def record(self, name, ms):
+        pass
+
+    def instrument(self, obj, names):
+        pass
+
+    def attach(self, root):
+        pass
+
+    def dump(self, path=None):
+        return 0
+
+
+def from_environment(argv=None, environ=None):
+    """根据命令行参数和环境变量创建监测器，未开启时返回 NullMonitor"""
+    output = cli_flags.flag_value(FLAG, ENV_VAR, argv, environ)
+    if output is None:
+        return NullMonitor()
+    return PerfMonitor(output or DEFAULT_OUTPUT)
@@ -1,45 +1,312 @@
+import time
+_IMPORT_START = time.perf_counter()  # 启动耗时记录的起点
+
 import tkinter as tk
-from tkinter import font, ttk, filedialog, messagebox
+from tkinter import ttk
 import functools
-import time
 import json
 import os
-import locale
+import queue
+import sys
+import threading
 from datetime import datetime
 
+from board_state import MODES, BoardState, UndoStack
+import cli_flags
+import journal
+import locales
+import storage
+_IMPORT_END = time.perf_counter()
+
+AUTOSAVE_FILE = 'autosave.json'  # 未命名表扬榜的日志位置
+PREFERENCES_FILE = 'preferences.json'
+JOURNAL_SYNC_MS = 2000  # 日志最长多久落盘一次
+SAVE_POLL_MS = 50  # 后台保存进行中时检查结果的间隔
+STATUS_CLEAR_MS = 3000  # 状态栏提示显示时长
+GROUPS_PER_ROW = 6  # 每行最多显示的组数
+DISPLAY_MODES = ('auto', 'widgets', 'canvas')  # 首选项 display_mode 的取值
+CANVAS_THRESHOLD = 300  # 自动模式下人数超过此值时用单画布显示
+TICK_SLACK_MS = 5  # 时钟在边界之后稍晚一点触发，保证已跨过边界
+WEEKDAYS = '一二三四五六日'
+BG = '#87CEED'  # 背景色
+HIGHLIGHT_COLOR = '#FFF3A0'  # 搜索结果
+SELECTED_COLOR = '#FFC940'  # 搜索结果中选中的学生
+# 所有表扬榜共用的命名字体的初始描述（窗口大小变化后由 board_layout 统一缩放）
+GROUP_FONT = ('黑体', 30, 'bold')
+NAME_FONT = ('楷体', 30)
+CHECK_FONT = ('Arial', 30)
+BOARD_FILETYPES = [("JSON files", "*.json"),
+                   ("Praise board binary files", "*" + storage.binary_board.BINARY_EXT),
+                   ("All files", "*.*")]
+# 开启性能监测时记录耗时的方法
+HOT_PATHS = ('toggle_check', 'update_check_display', 'mark_modified',
+             'update_time', '_save_to_file', 'load_data', 'relayout')
+
+
+class RedrawScheduler:
+    """界面刷新调度器
+
+    状态变化只标记脏区域（标题、单个学生、整个面板），
+    在 after_idle 中统一刷新一次，批量操作只产生一次重绘。
+    """
+
+    def __init__(self, root, redraw_title, redraw_student, redraw_board):
+        self.root = root
+        self.redraw_title = redraw_title
+        self.redraw_student = redraw_student
+        self.redraw_board = redraw_board
+        self._title = False
+        self._board = False
+        self._students = set()
+        self._pending = None
+
+    def mark_title(self):
+        self._title = True
+        self._schedule()
+
+    def mark_student(self, student):
+        if not self._board:
+            self._students.add(student)
+        self._schedule()
+
+    def mark_board(self):
+        self._board = True
+        self._students.clear()
+        self._schedule()
+
+    def _schedule(self):
+        if self._pending is None:
+            self._pending = self.root.after_idle(self.flush)
+
+    def flush(self):
+        """立即执行所有待刷新的更新"""
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        title, board, students = self._title, self._board, self._students
+        self._title = self._board = False
+        self._students = set()
+
+        if board:
+            self.redraw_board()
+        else:
+            for student in students:
+                self.redraw_student(student)
+        if title:
+            self.redraw_title()
+
+
+class AlignedTicker:
+    """按墙上时钟边界对齐的周期任务
+
+    每次都根据当前时间计算到下一个整秒/整分钟的延迟，不会累积漂移；
+    窗口最小化时暂停，恢复显示时立即执行一次。
+    """
+
+    def __init__(self, root, period, callback):
+        self.root = root
+        self.period = period
+        self.callback = callback
+        self._job = None
+        self._paused = False
+        root.bind('<Unmap>', self._on_unmap, add='+')
+        root.bind('<Map>', self._on_map, add='+')
+
+    def start(self):
+        """立即执行一次并开始计时"""
+        self._cancel()
+        self.callback()
+        self._schedule()
+
+    def _schedule(self):
+        delay = self.period - time.time() % self.period
+        self._job = self.root.after(int(delay * 1000) + TICK_SLACK_MS, self._tick)
+
+    def _cancel(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        self._job = None
+        self.callback()
+        self._schedule()
+
+    def _on_unmap(self, event):
+        if event.widget is self.root and not self._paused:
+            self._paused = True
+            self._cancel()
+
+    def _on_map(self, event):
+        if event.widget is self.root and self._paused:
+            self._paused = False
+            self.start()
+
+
+def make_clock_formatter(date_format, time_format):
+    """根据首选项生成时间显示函数，以及需要的刷新周期（秒）"""
+    date_pattern = {
+        '年月日': '%Y年%m月%d日',
+        '月日年': '%m月%d日%Y年',
+    }.get(date_format, '%d日%m月%Y年')
+    if time_format == '时分秒':
+        time_pattern, period = '%H:%M:%S', 1
+    else:  # 时分
+        time_pattern, period = '%H:%M', 60
+    pattern = f'{date_pattern} {time_pattern} 星期'
+
+    def format_clock(now):
+        return now.strftime(pattern) + WEEKDAYS[now.weekday()]
+
+    return format_clock, period
+
+
+def live_server_address():
+    """开启实时展示服务时返回 (主机, 端口)，否则返回 None（未开启时不导入 asyncio）"""
+    value = cli_flags.flag_value('--live', 'PRAISE_BOARD_LIVE')
+    if value is None:
+        return None
+    import live_server
+    try:
+        return live_server.parse_address(value)
+    except ValueError as e:
+        print(f'实时展示服务未开启: {e}', file=sys.stderr)
+        return None
+
+
+def sync_server_url(preferences):
+    """同步的上传地址：环境变量 PRAISE_BOARD_SYNC 优先，其次是首选项 sync_url，都没有时为空"""
+    return os.environ.get('PRAISE_BOARD_SYNC') or preferences.get('sync_url', '')
+
+
+class BoardTab:
+    """工作区中的一个表扬榜：名单、状态、文件和控件
+
+    控件在第一次显示时才创建，之后切换标签页时只隐藏，不重建。
+    """
+
+    def __init__(self, board_roster, frame, autosave):
+        self.roster = board_roster
+        self.state = BoardState(board_roster.names())
+        self.undo = UndoStack(self.state)
+        self.frame = frame
+        self.autosave = autosave  # 未保存过时日志使用的文件名
+        self.built = False
+        self.check_labels = {}  # 学生姓名 -> 对勾标签
+        self.check_display = {}  # 学生姓名 -> 当前显示的 (文本, 颜色)
+        self.current_file = None  # 当前文件路径
+        self.modified = False  # 跟踪数据是否已修改
+        self.revision = 0  # 每次状态变化加一，用于判断保存后是否又有修改
+        self.journal = None
+        self.shown_label = None  # 标签页上当前显示的文字
+        self.group_widgets = {}  # 组号 -> [组框架, 组名标签, 学生容器, 组内学生姓名列表]
+        self.student_rows = {}  # 学生姓名 -> (学生条目框架, 姓名标签, 组号)
+        self.pending_roster = None  # 不是当前表扬榜时名单文件被修改，切换到它时再更新控件
+        self.view = None  # 单画布显示时的 canvas_board.CanvasBoard，控件显示时为 None
+        self.search_index = None  # name_search.NameIndex，第一次查找时建立
+        self.highlight = {}  # 学生姓名 -> 搜索结果的高亮颜色
+        self.columns = 0  # 当前每行的组数
+        self.metrics = None  # 名单的字体尺寸（board_layout.ResponsiveLayout.measure），第一次布局时测量
+
+    @property
+    def label(self):
+        """标签页文字"""
+        if self.current_file:
+            text = os.path.basename(self.current_file)
+        else:
+            text = self.roster.name or self.state.subject or '-'
+        return text + (' *' if self.modified else '')
+
+
+def _board_attribute(name):
+    """转发到当前表扬榜（self.board）的属性"""
+    return property(lambda self: getattr(self.board, name),
+                    lambda self, value: setattr(self.board, name, value))
+
+
 class PraiseBoard:
-    def __init__(self, root):
+    # 每个表扬榜各自的数据，切换标签页时只需替换 self.board
+    state = _board_attribute('state')
+    roster = _board_attribute('roster')
+    main_frame = _board_attribute('frame')
+    check_labels = _board_attribute('check_labels')
+    _check_display = _board_attribute('check_display')
+    current_file = _board_attribute('current_file')
+    modified = _board_attribute('modified')
+    revision = _board_attribute('revision')
+    journal = _board_attribute('journal')
+    display_modes = DISPLAY_MODES
+
+    def __init__(self, root, trace=None, perf=None, live=None):
         self.root = root
         self.root.title('班级表扬榜')
-        self.root.configure(bg='#87CEED')
+        self.root.configure(bg=BG)
+        
+        # 启动耗时记录（未开启时什么也不做）
+        if trace is None:
+            import startup_trace
+            trace = startup_trace.NullTrace()
+        self.trace = trace
+        
+        # 热点路径性能监测（未开启时不包装任何方法）；须在方法绑定到菜单和控件之前
+        if perf is None:
+            import perf_monitor
+            perf = perf_monitor.NullMonitor()
+        self.perf = perf
+        self.perf.instrument(self, HOT_PATHS)
         
         # 全屏状态变量
         self.fullscreen = False
+        self.watcher = None  # 文件监视在界面创建后才开始
         
         # 初始化首选项
-        self.preferences = self.load_preferences()
+        with self.trace.phase('preferences'):
+            self.preferences = self.load_preferences()
         
         # 应用语言设置
-        self.current_language = self.preferences.get('language', 'zh_CN')
-        self.translations = self.load_translations(self.current_language)
+        with self.trace.phase('locale'):
+            self.locales = locales.LocaleCatalog()
+            self.current_language = self.preferences.get('language', 'zh_CN')
+            self.translations = self.load_translations(self.current_language)
         
         # 创建菜单栏
-        self.create_menu()
+        with self.trace.phase('menu'):
+            self.create_menu()
         
-        # 模式状态变量
+        # 共享字体：窗口大小变化停止后统一调整字号和每行组数
+        import board_layout
+        self.layout = board_layout.ResponsiveLayout(
+            root, {'group': GROUP_FONT, 'name': NAME_FONT, 'check': CHECK_FONT}, self.relayout)
+        self.fonts = self.layout.fonts
+
+        # 工作区中的表扬榜（每个标签页一个），界面只观察当前表扬榜的状态模型
+        self.boards = []
+        self.board = None
+        self._title_text = None
+        self.redraw = RedrawScheduler(root, self.update_title,
+                                      self.update_check_display, self.toggle_mode)
+
+        # 模式状态变量（仅供单选按钮使用，变化同步到状态模型）
         self.mode = tk.StringVar(value='praise')
-        self.mode.trace('w', self.mark_modified)  # 跟踪模式变化
-        self.students = {}
-        self.current_file = None  # 当前文件路径
-        self.modified = False  # 跟踪数据是否已修改
+        self.mode.trace('w', lambda *args: self.state.set_mode(self.mode.get()))
+        
+        # 历史存档（每次保存自动记录，第一次使用时才打开）
+        self._history = None
+        self._history_lock = threading.Lock()
+        
+        # 后台保存
+        self.saver = storage.BackgroundSaver(writer=self.write_board)
+        self.shared_files = {}  # 绝对路径 -> shared_board.SharedBoard（保存线程读取）
+        self._save_poll_job = None
+        self._status_clear_job = None
         
         # 模式选择控件
         # 创建标题框架
-        title_frame = tk.Frame(root, bg='#87CEED')
+        title_frame = tk.Frame(root, bg=BG)
         title_frame.pack(fill='x', padx=20, pady=10)
 
         # 模式选择控件
-        mode_frame = tk.Frame(title_frame, bg='#87CEED')
+        mode_frame = tk.Frame(title_frame, bg=BG)
         mode_frame.pack(side='left', pady=10)
 
         # 学科下拉菜单
@@ -51,194 +318,622 @@ class PraiseBoard:
             width=10
         )
         self.subject_combo.pack(side='left', padx=20)
-        self.subject_combo.bind('<<ComboboxSelected>>', lambda e: self.mark_modified())
+        self.subject_combo.bind('<<ComboboxSelected>>', lambda e: self.state.set_subject(self.subject_combo.get()))
         
         tk.Radiobutton(mode_frame, text='✓', variable=self.mode, value='praise',
-                      font=('宋体', 18), bg='#87CEED',fg='green').pack(side='left', padx=20)
+                      font=('宋体', 18), bg=BG,fg='green').pack(side='left', padx=20)
         tk.Radiobutton(mode_frame, text='✗', variable=self.mode, value='criticism',
-                      font=('宋体', 18), bg='#87CEED',fg='red').pack(side='left', padx=20)
-
-        main_frame = tk.Frame(root, bg='#87CEED')
-        main_frame.pack(padx=20, pady=20, fill='both', expand=True)
-
-        # 创建两行分组框架
-        row1_frame = tk.Frame(main_frame, bg='#87CEED')
-        row1_frame.pack(fill='x')
-        row2_frame = tk.Frame(main_frame, bg='#87CEED')
-        row2_frame.pack(fill='x')
-        
-        # 创建6列分组框架（每行6组）
-        group_frames = []
-        for row_num in range(2):
-            for col_num in range(6):
-                group_frame = tk.Frame(row1_frame if row_num == 0 else row2_frame, bg='#87CEED')
-                group_frame.grid(row=0, column=col_num, padx=10, sticky='nsew', pady=(0, 10))
-                if row_num == 0:
-                    row1_frame.grid_columnconfigure(col_num, weight=1)
-                else:
-                    row2_frame.grid_columnconfigure(col_num, weight=1)
-                
-                # 计算组号（第一行：1-6组；第二行：7-12组）
-                group_num = row_num * 6 + col_num + 1
-                group_title = f'第{group_num}组'
-                tk.Label(group_frame, 
-                        text=group_title,
-                        font=('黑体', 30, 'bold'),
-                        bg='#87CEED',
-                        pady=10).pack(side='bottom', anchor='s', fill='x')
-                
-                # 创建组内学生容器（后打包填充上方空间）
-                student_container = tk.Frame(group_frame, bg='#87CEED')
-                student_container.pack(fill='both', expand=True)
-                
-                group_frames.append((group_frame, student_container))
-            
-        # 从文件按分组读取学生姓名
-        with open('students_name.txt', 'r', encoding='utf-8') as f:
-            all_students = [name.strip() for name in f.readlines()]
-            groups = [all_students[i*4:(i+1)*4] for i in range(12)]  # 12组，每组4人
-
-        # 动态生成学生标签
-        for group_idx, group_students in enumerate(groups):
-            group_frame, student_container = group_frames[group_idx]
-            
-            for student_idx, student_name in enumerate(group_students):
-                # 创建学生条目容器
-                container = tk.Frame(student_container, bg='#87CEED')
-                container.pack(fill='x', pady=2)
-            
-                # 学生姓名标签
-                lbl = tk.Label(container,
-                            text=student_name,
-                            font=('楷体', 30),
-                            padx=10,
-                            pady=10,
-                            relief='ridge')
-                lbl.pack(side='left')
-                lbl.bind('<Button-1>', functools.partial(self.toggle_check, student_name))
-                
-                # 对勾标签
-                check_label = tk.Label(container,
-                                      text='',
-                                      font=('Arial', 30),
-                                      fg='green',
-                                      padx=10,
-                                      bg='#87CEED')
-                check_label.pack(side='left', padx=5)
-                
-                # 初始化状态存储
-                self.students[student_name] = {
-                    'praise': tk.BooleanVar(value=False),
-                    'criticism': tk.BooleanVar(value=False),
-                    'check_label': check_label,
-                }
-                # 跟踪学生状态变化
-                self.students[student_name]['praise'].trace('w', self.mark_modified)
-                self.students[student_name]['criticism'].trace('w', self.mark_modified)
+                      font=('宋体', 18), bg=BG,fg='red').pack(side='left', padx=20)
+
+        # 状态栏（显示保存进度等非模态提示）
+        self.status_label = tk.Label(root, text='', font=('宋体', 12),
+                                     bg=BG, anchor='e', padx=20)
+        self.status_label.pack(side='bottom', fill='x')
+
+        # 每个表扬榜一个标签页，切换时只显示对应页面
+        self.notebook = ttk.Notebook(root)
+        self.notebook.pack(padx=20, pady=20, fill='both', expand=True)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.live = None
+        self.sync = None  # sync_outbox.SyncOutbox，设置了上传地址时才创建
+        self._merging = False  # 正在应用其他程序的修改：不记日志、不同步
+        self._journal_sync_job = None
+        self.search_bar = None  # 第一次查找时创建
+        self._name_bg = None  # 姓名标签的原背景色
+
+        # 按名单生成分组和学生标签
+        with self.trace.phase('roster'):
+            board_roster = self.load_roster()
+        with self.trace.phase('widgets'):
+            self.add_board(board_roster)
+        
+        # 实时展示服务（可选，(主机, 端口) 或 None）
+        if live is not None:
+            self.start_live_server(*live)
+
+        # 操作日志：恢复上次未保存的修改
+        with self.trace.phase('journal'):
+            self.open_journal()
+
+        # 同步到学校服务器（可选）；在重放日志之后开始，重放的修改上次已经发送过
+        self.start_sync()
+        
+        # 名单、首选项和语言包文件被修改后自动重新读取
+        import file_watcher
+        self.watcher = file_watcher.FileWatcher(root)
+        self.watch_files()
         
         # 时间显示标签
         self.time_label = tk.Label(title_frame,
-                                text=self.translations.get('class_display_board', '班级实时表现公示栏'),
+                                text=self.translations['class_display_board'],
                                 font=('黑体', 30, 'bold'),
-                                bg='#87CEED',
+                                bg=BG,
                                 padx=20,
                                 pady=15)
         self.time_label.pack(side='left', expand=True, fill='x')
         self.time_label.pack(side='right', padx=20)
-        self.update_time()
+        self._time_text = None
+        self.clock = AlignedTicker(root, 1, self.update_time)
+        self.apply_clock_preferences()
         
         # 绑定退出事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.perf.attach(root)
+
+    def start_live_server(self, host, port):
+        """启动实时展示服务，状态变化推送给所有观看者"""
+        import live_server
+        server = live_server.LiveBoardServer(host, port)
+        try:
+            server.start(self.state.to_dict())
+        except OSError as e:
+            self.show_status(str(e), error=True)
+            return
+        self.live = server
+        self.show_status(server.url)
+
+    def publish_live(self, event, *args):
+        """把当前表扬榜的状态变化推送给实时展示服务"""
+        if self.live is not None:
+            self.live.on_state_event(self.state, event, *args)
+
+    def start_sync(self):
+        """按上传地址开始、重新开始或停止同步（只写本地发件箱，不等待网络）"""
+        url = sync_server_url(self.preferences)
+        if self.sync is not None:
+            if self.sync.transport.url == url:
+                return
+            self.sync.stop()
+            self.sync = None
+        if not url:
+            return
+        import sqlite3
+        import sync_outbox
+        try:
+            outbox = sync_outbox.SyncOutbox(sync_outbox.HttpTransport(url))
+        except sqlite3.Error as e:
+            self.show_status(str(e), error=True)
+            return
+        outbox.start()
+        self.sync = outbox
+
+    def publish_sync(self, event, *args):
+        """把当前表扬榜的状态变化写入同步发件箱"""
+        if self.sync is not None and not self._merging:
+            board = os.path.basename(self.current_file or self.board.autosave)
+            self.sync.on_state_event(self.state, event, *args, board=board)
+
+    def add_board(self, board_roster):
+        """新建一个表扬榜标签页并切换到它（日志由调用者打开）"""
+        used = {tab.autosave for tab in self.boards}
+        autosave, number = AUTOSAVE_FILE, 2
+        while autosave in used:
+            name, ext = os.path.splitext(AUTOSAVE_FILE)
+            autosave = f'{name}_{number}{ext}'
+            number += 1
+        tab = BoardTab(board_roster, tk.Frame(self.notebook, bg=BG), autosave)
+        # 观察状态变化（只有当前表扬榜会被修改）
+        tab.state.subscribe(self.on_state_changed)
+        tab.state.subscribe(self.record_journal)
+        tab.state.subscribe(self.publish_live)
+        tab.state.subscribe(self.publish_sync)
+        self.boards.append(tab)
+        self.notebook.add(tab.frame, text=tab.label)
+        self.select_board(tab)
+        return tab
+
+    def select_board(self, tab):
+        """切换到指定表扬榜：只替换当前表扬榜并显示其页面，不重建控件"""
+        if tab is self.board:
+            return
+        if self.board is not None:
+            # 刷新离开的表扬榜的待更新控件，日志落盘
+            self.redraw.flush()
+            if self.board.highlight:
+                self.highlight_students([])
+            if self._journal_sync_job is not None:
+                self.root.after_cancel(self._journal_sync_job)
+            self.sync_journal()
+        self.board = tab
+        if not tab.built:
+            self.build_board()
+        elif tab.pending_roster is not None:
+            self.update_roster(tab.pending_roster)
+        if self.notebook.select() != str(tab.frame):
+            self.notebook.select(tab.frame)
+        if self.mode.get() != tab.state.mode:
+            self.mode.set(tab.state.mode)
+        self.subject_combo.set(tab.state.subject)
+        self.redraw.mark_title()
+        self.layout.refresh()
+        if self.search_bar is not None:
+            self.search_bar.search()
+        self.apply_merges()  # 在后台时保存的合并结果
+        if self.live is not None:
+            self.live.publish({'op': 'snapshot', 'data': tab.state.to_dict()})
+
+    def on_tab_changed(self, event):
+        selected = self.notebook.select()
+        for tab in self.boards:
+            if str(tab.frame) == selected:
+                self.select_board(tab)
+                return
+
+    def new_board(self):
+        """按首选项中的名单新建表扬榜"""
+        self.add_board(self.load_roster())
+        self.open_journal()
+        self.watch_files()
+
+    def confirm_discard(self, message_key):
+        """当前表扬榜有未保存的修改时询问是否保存，返回是否可以继续"""
+        from tkinter import messagebox
+        if not self.modified:
+            return True
+        response = messagebox.askyesnocancel(
+            self.translations['save_changes'],
+            self.translations[message_key]
+        )
+        if response is None:  # 取消
+            return False
+        if response:  # 是
+            return bool(self.save_data())
+        return True
+
+    def close_board(self):
+        """关闭当前标签页（至少保留一个）"""
+        if len(self.boards) < 2 or not self.confirm_discard('save_before_close'):
+            return
+        if not self.wait_for_saves():
+            return
+        tab = self.board
+        self.close_journal(discard=True)
+        index = self.boards.index(tab)
+        self.boards.remove(tab)
+        if tab.current_file and all(other.current_file != tab.current_file for other in self.boards):
+            self.shared_files.pop(os.path.abspath(tab.current_file), None)
+        self.select_board(self.boards[min(index, len(self.boards) - 1)])
+        self.notebook.forget(tab.frame)
+        tab.frame.destroy()
+        self.watch_files()
+
+    def load_roster(self):
+        """读取首选项中指定的名单文件和班级"""
+        import roster
+        try:
+            rosters = roster.load_rosters(self.preferences.get('roster_file', roster.ROSTER_FILE))
+        except OSError:
+            rosters = {}
+        return roster.pick_roster(rosters, self.preferences.get('roster_class'))
+
+    def build_board(self):
+        """按当前名单生成分组和学生标签，每行最多 GROUPS_PER_ROW 组"""
+        for child in self.main_frame.winfo_children():
+            child.destroy()
+        board = self.board
+        board.built = True
+        board.group_widgets = {}
+        board.student_rows = {}
+        board.columns = 0
+        board.metrics = None
+        board.view = None
+        board.highlight = {}
+        self.check_labels = {}
+        self._check_display = {}
+        
+        if self.use_canvas(self.roster):
+            # 单画布显示：不创建学生控件，只画可见的学生
+            import canvas_board
+            board.view = canvas_board.CanvasBoard(self.main_frame, self.fonts, self.state,
+                                                  self.toggle_check, self.toggle_group, BG)
+            board.view.widget.pack(fill='both', expand=True)
+            board.view.set_roster(self.roster)
+            self.sync_roster_state()
+            return
+        
+        for group in self.roster.groups:
+            student_container = self.create_group(group)
+            # 动态生成学生标签
+            for student in group.students:
+                self.create_student(student_container, student, group.label)
+        self.arrange_groups(max(1, min(GROUPS_PER_ROW, len(board.group_widgets))))
+        self.sync_roster_state()
+
+    def use_canvas(self, board_roster):
+        """按首选项 display_mode 决定是否用单画布显示（auto：人数超过 CANVAS_THRESHOLD 时）"""
+        mode = self.preferences.get('display_mode', 'auto')
+        if mode == 'auto':
+            return len(board_roster) > CANVAS_THRESHOLD
+        return mode == 'canvas'
+
+    def create_group(self, group):
+        """创建一组的框架和组名标签，返回学生容器"""
+        group_frame = tk.Frame(self.main_frame, bg=BG)
+        group_frame.grid(padx=10, sticky='nsew', pady=(0, 10))
+        
+        group_label = tk.Label(group_frame,
+                text=group.title,
+                font=self.fonts['group'],
+                bg=BG,
+                pady=10)
+        group_label.pack(side='bottom', anchor='s', fill='x')
+        # 点击组名切换整组
+        keys = [student.key for student in group.students]
+        group_label.bind('<Button-1>', functools.partial(self.toggle_group, keys))
+        
+        # 创建组内学生容器（后打包填充上方空间）
+        student_container = tk.Frame(group_frame, bg=BG)
+        student_container.pack(fill='both', expand=True)
+        self.board.group_widgets[group.label] = [group_frame, group_label, student_container, []]
+        return student_container
+
+    def create_student(self, student_container, student, group_label):
+        """在组内末尾创建一名学生的姓名和对勾标签"""
+        # 创建学生条目容器
+        container = tk.Frame(student_container, bg=BG)
+        container.pack(fill='x', pady=2)
+    
+        # 学生姓名标签
+        lbl = tk.Label(container,
+                    text=student.name,
+                    font=self.fonts['name'],
+                    padx=10,
+                    pady=10,
+                    relief='ridge')
+        lbl.pack(side='left')
+        lbl.bind('<Button-1>', functools.partial(self.toggle_check, student.key))
+        
+        # 对勾标签
+        check_label = tk.Label(container,
+                              text='',
+                              font=self.fonts['check'],
+                              fg='green',
+                              padx=10,
+                              bg=BG)
+        check_label.pack(side='left', padx=5)
+        self.check_labels[student.key] = check_label
+        self.board.student_rows[student.key] = (container, lbl, group_label)
+        self.board.group_widgets[group_label][3].append(student.key)
+
+    def sync_roster_state(self):
+        """更新状态模型的名单（保留仍在名单中的学生的标记），再显示所有标记"""
+        names = self.roster.names()
+        if list(self.state.names) != names:
+            self.state.set_roster(names)
+        self.board.metrics = None
+        self.redraw.mark_board()
+        self.layout.refresh()
+        if self.board.search_index is not None:
+            self.board.search_index.update(self.roster)
+        if self.search_bar is not None:
+            self.search_bar.search()
+
+    def update_roster(self, new_roster):
+        """换成新名单：只增删有变化的组和学生控件，其他学生的控件和标记保留"""
+        board = self.board
+        board.pending_roster = None
+        self.roster = new_roster
+        if not board.built:
+            return  # 第一次显示时按新名单创建
+        if self.use_canvas(new_roster) != (board.view is not None):
+            self.build_board()  # 人数变化后换了显示方式
+            return
+        if board.view is not None:
+            board.view.set_roster(new_roster)
+            self.sync_roster_state()
+            return
+        placement = {student.key: group.label
+                     for group in new_roster.groups for student in group.students}
+        
+        # 删除离开名单或换了组的学生（控件不能移到别的组，在新组中重建）
+        for key, (container, lbl, group_label) in list(board.student_rows.items()):
+            if placement.get(key) != group_label:
+                container.destroy()
+                del board.student_rows[key]
+                del self.check_labels[key]
+                self._check_display.pop(key, None)
+                board.group_widgets[group_label][3].remove(key)
+        for label in set(board.group_widgets) - {group.label for group in new_roster.groups}:
+            board.group_widgets.pop(label)[0].destroy()
+        
+        for group in new_roster.groups:
+            widgets = board.group_widgets.get(group.label)
+            if widgets is None:
+                self.create_group(group)
+                widgets = board.group_widgets[group.label]
+            else:
+                if widgets[1].cget('text') != group.title:
+                    widgets[1].config(text=group.title)
+                widgets[1].bind('<Button-1>', functools.partial(
+                    self.toggle_group, [student.key for student in group.students]))
+            for student in group.students:
+                row = board.student_rows.get(student.key)
+                if row is None:
+                    self.create_student(widgets[2], student, group.label)
+                elif row[1].cget('text') != student.name:
+                    row[1].config(text=student.name)
+            # 组内顺序有变化时按新顺序重新打包
+            keys = [student.key for student in group.students]
+            if widgets[3] != keys:
+                for key in keys:
+                    board.student_rows[key][0].pack_forget()
+                for key in keys:
+                    board.student_rows[key][0].pack(fill='x', pady=2)
+                widgets[3] = keys
+        
+        self.arrange_groups(max(1, min(board.columns or GROUPS_PER_ROW, len(board.group_widgets))))
+        self.sync_roster_state()
+
+    def arrange_groups(self, columns):
+        """把各组按每行 columns 组排列（只移动已有的框架）"""
+        board = self.board
+        for index, group in enumerate(self.roster.groups):
+            board.group_widgets[group.label][0].grid(row=index // columns, column=index % columns)
+        for column in range(max(columns, board.columns)):
+            board.frame.grid_columnconfigure(column, weight=1 if column < columns else 0)
+        board.columns = columns
+
+    def relayout(self):
+        """窗口大小停止变化后，按当前表扬榜的名单和页面大小调整共享字号和每行组数"""
+        board = self.board
+        if board is None or not board.built:
+            return
+        if board.view is not None:
+            board.view.relayout()  # 单画布可以滚动，不缩放字号，只按新宽度排列
+            return
+        groups = self.roster.groups
+        if board.metrics is None:
+            board.metrics = self.layout.measure(groups)
+        columns = self.layout.apply([len(group.students) for group in groups], board.metrics,
+                                    board.frame.winfo_width(), board.frame.winfo_height(),
+                                    GROUPS_PER_ROW)
+        if columns != board.columns:
+            self.arrange_groups(columns)
+
+    def import_roster(self):
+        """导入名单文件（CSV/TSV/TXT），名单中有多个班级时选择一个"""
+        from tkinter import filedialog, messagebox
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Roster files", "*.csv *.tsv *.txt"), ("All files", "*.*")],
+            title=self.translations['import_roster']
+        )
+        if not file_path:
+            return
+        import roster
+        try:
+            rosters = roster.load_rosters(file_path)
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror(self.translations['error'], self.translations['load_error'] + str(e))
+            return
+        if not rosters:
+            return
+        
+        def apply_roster(class_name):
+            self.preferences['roster_file'] = os.path.abspath(file_path)
+            self.preferences['roster_class'] = class_name
+            self.save_preferences()
+            self.update_roster(rosters[class_name])
+            self.watch_files()
+        
+        if len(rosters) == 1:
+            apply_roster(next(iter(rosters)))
+            return
+        
+        # 多个班级：选择要显示的班级
+        class_window = tk.Toplevel(self.root)
+        class_window.title(self.translations['choose_class'])
+        class_window.resizable(False, False)
+        class_window.transient(self.root)
+        class_window.grab_set()
+        
+        class_var = tk.StringVar(value=next(iter(rosters)))
+        ttk.Combobox(class_window, textvariable=class_var, values=list(rosters),
+                     state='readonly', width=20).pack(padx=20, pady=10)
+        
+        def on_ok():
+            class_window.destroy()
+            apply_roster(class_var.get())
+        
+        tk.Button(class_window, text=self.translations['ok'], command=on_ok, width=10).pack(pady=10)
 
     def load_preferences(self):
         """加载首选项设置"""
-        preferences_file = 'preferences.json'
         default_preferences = {
             'language': 'zh_CN',
             'date_format': '年月日',
-            'time_format': '时分秒'
+            'time_format': '时分秒',
+            'journal': True
         }
         
-        if os.path.exists(preferences_file):
-            try:
-                with open(preferences_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
+        preferences = self.read_preferences()
+        if preferences is not None:
+            return preferences
         
         # 如果文件不存在或读取失败，使用默认设置并保存
         self.save_preferences(default_preferences)
         return default_preferences
 
+    def read_preferences(self):
+        """读取首选项文件，不存在或无法解析时返回 None"""
+        try:
+            with open(PREFERENCES_FILE, 'r', encoding='utf-8') as f:
+                preferences = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return preferences if isinstance(preferences, dict) else None
+
+    def apply_preferences(self, previous):
+        """应用与 previous 相比有变化的首选项"""
+        preferences = self.preferences
+        
+        def changed(key, default=None):
+            return preferences.get(key, default) != previous.get(key, default)
+        
+        # 重新加载语言并更新界面（包括时间格式）
+        if changed('language', 'zh_CN'):
+            self.current_language = preferences.get('language', 'zh_CN')
+            self.translations = self.load_translations(self.current_language)
+            self.update_ui_language()
+        elif changed('date_format') or changed('time_format'):
+            self.apply_clock_preferences()
+        
+        # 开启或关闭操作日志
+        if changed('journal', True):
+            if preferences.get('journal', True) and self.journal is None:
+                self.open_journal(truncate=True)
+            elif not preferences.get('journal', True):
+                self.close_journal(discard=True)
+        
+        # 换了显示方式：当前表扬榜立即重建，其他表扬榜切换到时再重建
+        if changed('display_mode', 'auto'):
+            for tab in self.boards:
+                if tab is not self.board:
+                    tab.built = False
+                    if tab.pending_roster is not None:
+                        tab.roster, tab.pending_roster = tab.pending_roster, None
+            self.build_board()
+        
+        # 换了名单文件或班级时更新当前表扬榜
+        if changed('roster_file') or changed('roster_class'):
+            self.update_roster(self.load_roster())
+        if changed('sync_url', ''):
+            self.start_sync()
+        self.watch_files()
+
+    def watch_files(self):
+        """监视首选项、当前语言包和各表扬榜的名单文件，取消不再需要的监视"""
+        import roster
+        wanted = {
+            os.path.abspath(PREFERENCES_FILE): self.reload_preferences,
+            os.path.abspath(self.locales.pack_path(self.current_language)): self.reload_locale,
+        }
+        wanted.setdefault(os.path.abspath(self.preferences.get('roster_file', roster.ROSTER_FILE)),
+                          self.reload_roster_file)
+        for tab in self.boards:
+            if tab.roster.path:
+                wanted.setdefault(tab.roster.path, self.reload_roster_file)
+        for path in self.watcher.watched() - set(wanted):
+            self.watcher.unwatch(path)
+        for path, callback in wanted.items():
+            self.watcher.watch(path, callback)
+
+    def reload_preferences(self, path):
+        """首选项文件在程序外被修改：只应用有变化的设置（自己保存的不会有变化）"""
+        preferences = self.read_preferences()
+        if preferences is None or preferences == self.preferences:
+            return  # 写到一半或内容相同
+        previous, self.preferences = self.preferences, preferences
+        self.apply_preferences(previous)
+
+    def reload_locale(self, path):
+        """当前语言的语言包被修改：重新读取并原地更新界面文字"""
+        self.locales.invalidate(self.current_language)
+        self.translations = self.load_translations(self.current_language)
+        self.update_ui_language()
+
+    def reload_roster_file(self, path):
+        """名单文件被修改：更新使用该名单的表扬榜，只增删有变化的学生"""
+        import roster
+        try:
+            rosters = roster.load_rosters(path)
+        except (OSError, UnicodeDecodeError):
+            return
+        default_path = os.path.abspath(self.preferences.get('roster_file', roster.ROSTER_FILE))
+        for tab in self.boards:
+            if (tab.roster.path or default_path) != path:
+                continue
+            if tab.roster.path is None:
+                # 启动时名单文件还不存在
+                new_roster = roster.pick_roster(rosters, self.preferences.get('roster_class'))
+            else:
+                new_roster = rosters.get(tab.roster.name)
+            if new_roster is None or not len(new_roster):
+                continue  # 班级已不在名单中或文件写到一半，保留原名单
+            if tab is self.board:
+                self.update_roster(new_roster)
+            elif tab.built:
+                tab.pending_roster = new_roster
+            else:
+                tab.roster = new_roster
+
     def save_preferences(self, preferences=None):
         """保存首选项设置"""
         if preferences is None:
             preferences = self.preferences
             
         try:
-            with open('preferences.json', 'w', encoding='utf-8') as f:
+            with open(PREFERENCES_FILE, 'w', encoding='utf-8') as f:
                 json.dump(preferences, f, ensure_ascii=False, indent=4)
+            if self.watcher is not None:
+                self.watcher.refresh(PREFERENCES_FILE)  # 自己写入的不触发重新读取
             return True
         except:
             return False
 
     def load_translations(self, lang_code):
-        """加载语言翻译文件"""
-        lang_file = f'locales/{lang_code}.json'
-        default_translations = {
-            'class_display_board': '班级实时表现公示栏',
-            'file': '文件',
-            'save': '保存',
-            'save_as': '另存为',
-            'open': '打开',
-            'preferences': '首选项',
-            'fullscreen': '全屏',
-            'exit': '退出',
-            'language': '语言',
-            'date_format': '日期格式',
-            'time_format': '时间格式',
-            'save_success': '数据已成功保存！',
-            'save_error': '保存数据时出错: ',
-            'load_success': '数据已成功加载！',
-            'load_error': '加载数据时出错: ',
-            'save_changes': '保存更改',
-            'save_before_exit': '是否保存更改后再退出？',
-            'save_before_load': '是否保存当前更改？'
-        }
-        
-        # 如果语言文件存在，加载它
-        if os.path.exists(lang_file):
-            try:
-                with open(lang_file, 'r', encoding='utf-8') as f:
-                    translations = json.load(f)
-                    # 确保所有必要的键都存在
-                    for key in default_translations:
-                        if key not in translations:
-                            translations[key] = default_translations[key]
-                    return translations
-            except:
-                pass
-        
-        # 如果文件不存在或读取失败，返回默认翻译
-        return default_translations
+        """加载语言文字（语言包按需读取并缓存）"""
+        return self.locales.get(lang_code)
 
     def create_menu(self):
         """创建菜单栏"""
         menubar = tk.Menu(self.root)
         self.root.config(menu=menubar)
         
+        # 菜单项文字键，切换语言时原地更新
+        self.menu_labels = []
+        
         # 文件菜单
         file_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label=self.translations.get('file', '文件'), menu=file_menu)
-        file_menu.add_command(label=self.translations.get('save', '保存'), command=self.save_data, accelerator="Ctrl+S")
-        file_menu.add_command(label=self.translations.get('save_as', '另存为'), command=self.save_as_data, accelerator="Ctrl+Shift+S")
-        file_menu.add_command(label=self.translations.get('open', '打开'), command=self.load_data, accelerator="Ctrl+O")
+        self.add_menu_item(menubar, 'cascade', 'file', menu=file_menu)
+        self.add_menu_item(file_menu, 'command', 'save', command=self.save_data, accelerator="Ctrl+S")
+        self.add_menu_item(file_menu, 'command', 'save_as', command=self.save_as_data, accelerator="Ctrl+Shift+S")
+        self.add_menu_item(file_menu, 'command', 'open', command=self.load_data, accelerator="Ctrl+O")
+        self.add_menu_item(file_menu, 'command', 'history', command=self.show_history, accelerator="Ctrl+H")
+        self.add_menu_item(file_menu, 'command', 'merge_boards', command=self.show_merge)
+        self.add_menu_item(file_menu, 'command', 'analytics', command=self.show_analytics)
+        self.add_menu_item(file_menu, 'command', 'import_roster', command=self.import_roster)
+        file_menu.add_separator()
+        self.add_menu_item(file_menu, 'command', 'new_board', command=self.new_board, accelerator="Ctrl+T")
+        self.add_menu_item(file_menu, 'command', 'close_board', command=self.close_board, accelerator="Ctrl+W")
         file_menu.add_separator()
-        file_menu.add_command(label=self.translations.get('preferences', '首选项'), command=self.show_preferences)
+        self.add_menu_item(file_menu, 'command', 'preferences', command=self.show_preferences)
         file_menu.add_separator()
-        file_menu.add_command(label=self.translations.get('fullscreen', '全屏'), command=self.toggle_fullscreen, accelerator="Alt+Enter")
+        self.add_menu_item(file_menu, 'command', 'fullscreen', command=self.toggle_fullscreen, accelerator="Alt+Enter")
         file_menu.add_separator()
-        file_menu.add_command(label=self.translations.get('exit', '退出'), command=self.on_closing, accelerator="Ctrl+Q")
+        self.add_menu_item(file_menu, 'command', 'exit', command=self.on_closing, accelerator="Ctrl+Q")
+        
+        # 编辑菜单（批量操作，每个操作是一个撤销步骤）
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        self.add_menu_item(menubar, 'cascade', 'edit', menu=edit_menu)
+        self.add_menu_item(edit_menu, 'command', 'undo', command=self.undo, accelerator="Ctrl+Z")
+        self.add_menu_item(edit_menu, 'command', 'redo', command=self.redo, accelerator="Ctrl+Y")
+        edit_menu.add_separator()
+        self.add_menu_item(edit_menu, 'command', 'find', command=self.show_search, accelerator="Ctrl+F")
+        edit_menu.add_separator()
+        self.add_menu_item(edit_menu, 'command', 'reset_marks', command=lambda: self.state.reset())
+        self.add_menu_item(edit_menu, 'command', 'invert_marks', command=lambda: self.state.invert())
+        self.add_menu_item(edit_menu, 'command', 'copy_praise',
+                           command=lambda: self.state.copy_marks('praise', 'criticism'))
         
         # 绑定快捷键
         self.root.bind('<Alt-Return>', lambda e: self.toggle_fullscreen())
@@ -249,134 +944,121 @@ class PraiseBoard:
         self.root.bind('<Control-Shift-s>', lambda e: self.save_as_data())
         self.root.bind('<Control-o>', lambda e: self.load_data())
         self.root.bind('<Control-O>', lambda e: self.load_data())
+        self.root.bind('<Control-h>', lambda e: self.show_history())
+        self.root.bind('<Control-H>', lambda e: self.show_history())
+        self.root.bind('<Control-t>', lambda e: self.new_board())
+        self.root.bind('<Control-T>', lambda e: self.new_board())
+        self.root.bind('<Control-w>', lambda e: self.close_board())
+        self.root.bind('<Control-W>', lambda e: self.close_board())
         self.root.bind('<Control-q>', lambda e: self.on_closing())
         self.root.bind('<Control-Q>', lambda e: self.on_closing())
+        self.root.bind('<Control-z>', lambda e: self.undo())
+        self.root.bind('<Control-Z>', lambda e: self.undo())
+        self.root.bind('<Control-y>', lambda e: self.redo())
+        self.root.bind('<Control-Y>', lambda e: self.redo())
+        self.root.bind('<Control-f>', lambda e: self.show_search())
+        self.root.bind('<Control-F>', lambda e: self.show_search())
+
+    def add_menu_item(self, parent, kind, key, **options):
+        """添加菜单项并记录其文字键"""
+        parent.add(kind, label=self.translations[key], **options)
+        self.menu_labels.append((parent, parent.index('end'), key))
 
     def show_preferences(self):
         """显示首选项对话框"""
-        prefs_window = tk.Toplevel(self.root)
-        prefs_window.title(self.translations.get('preferences', '首选项'))
-        prefs_window.geometry('400x300')
-        prefs_window.resizable(False, False)
-        prefs_window.transient(self.root)
-        prefs_window.grab_set()
-        
-        # 语言设置
-        lang_label = tk.Label(prefs_window, text=self.translations.get('language', '语言'), font=('宋体', 12))
-        lang_label.grid(row=0, column=0, padx=10, pady=10, sticky='w')
-        
-        lang_var = tk.StringVar(value=self.preferences.get('language', 'zh_CN'))
-        lang_combo = ttk.Combobox(
-            prefs_window,
-            textvariable=lang_var,
-            values=[
-                'zh_CN (中文简体)',
-                'zh_TW (中文繁體)',
-                'en_US (English US)',
-                'en_UK (English UK)'
-            ],
-            state='readonly',
-            width=20
-        )
-        lang_combo.grid(row=0, column=1, padx=10, pady=10, sticky='w')
-        
-        # 日期格式设置
-        date_label = tk.Label(prefs_window, text=self.translations.get('date_format', '日期格式'), font=('宋体', 12))
-        date_label.grid(row=1, column=0, padx=10, pady=10, sticky='w')
-        
-        date_var = tk.StringVar(value=self.preferences.get('date_format', '年月日'))
-        date_combo = ttk.Combobox(
-            prefs_window,
-            textvariable=date_var,
-            values=['年月日', '月日年', '日月年'],
-            state='readonly',
-            width=20
-        )
-        date_combo.grid(row=1, column=1, padx=10, pady=10, sticky='w')
-        
-        # 时间格式设置
-        time_label = tk.Label(prefs_window, text=self.translations.get('time_format', '时间格式'), font=('宋体', 12))
-        time_label.grid(row=2, column=0, padx=10, pady=10, sticky='w')
-        
-        time_var = tk.StringVar(value=self.preferences.get('time_format', '时分秒'))
-        time_combo = ttk.Combobox(
-            prefs_window,
-            textvariable=time_var,
-            values=['时分秒', '时分'],
-            state='readonly',
-            width=20
-        )
-        time_combo.grid(row=2, column=1, padx=10, pady=10, sticky='w')
-        
-        # 确定和取消按钮
-        button_frame = tk.Frame(prefs_window)
-        button_frame.grid(row=3, column=0, columnspan=2, pady=20)
-        
-        def apply_preferences():
-            # 提取语言代码
-            lang_code = lang_var.get().split(' ')[0]
-            
-            # 更新首选项
-            self.preferences = {
-                'language': lang_code,
-                'date_format': date_var.get(),
-                'time_format': time_var.get()
-            }
-            
-            # 保存首选项
-            self.save_preferences()
-            
-            # 重新加载语言
-            self.current_language = lang_code
-            self.translations = self.load_translations(lang_code)
-            
-            # 更新界面
-            self.update_ui_language()
-            
-            prefs_window.destroy()
-            messagebox.showinfo("成功", "首选项已更新，部分更改可能需要重启程序生效")
-        
-        ok_button = tk.Button(button_frame, text="确定", command=apply_preferences, width=10)
-        ok_button.pack(side='left', padx=10)
-        
-        cancel_button = tk.Button(button_frame, text="取消", command=prefs_window.destroy, width=10)
-        cancel_button.pack(side='left', padx=10)
+        import dialogs
+        dialogs.show_preferences(self)
+
+    def show_history(self):
+        """显示历史记录查询对话框"""
+        import dialogs
+        dialogs.show_history(self)
+
+    def show_merge(self):
+        """合并多个表扬榜文件并统计"""
+        import dialogs
+        dialogs.show_merge(self)
+
+    def show_analytics(self):
+        """表扬榜趋势分析"""
+        import dialogs
+        dialogs.show_analytics(self)
+
+    def show_search(self):
+        """打开查找学生的搜索栏"""
+        if self.search_bar is None:
+            import search_bar
+            self.search_bar = search_bar.SearchBar(self, BG)
+        self.search_bar.show()
+
+    def search_index(self):
+        """当前表扬榜的姓名检索索引（第一次使用时建立，之后随名单增量更新）"""
+        board = self.board
+        if board.search_index is None:
+            import name_search
+            board.search_index = name_search.NameIndex(self.roster)
+        return board.search_index
+
+    def highlight_students(self, students, selected=None):
+        """高亮当前表扬榜上的搜索结果（selected 用更深的颜色），清除之前的高亮"""
+        board = self.board
+        colors = dict.fromkeys(students, HIGHLIGHT_COLOR)
+        if selected is not None:
+            colors[selected] = SELECTED_COLOR
+        if board.view is not None:
+            board.view.highlight(colors)
+            if selected is not None:
+                board.view.see(selected)
+        else:
+            for student in set(board.highlight) | set(colors):
+                row = board.student_rows.get(student)
+                if row is None:
+                    continue  # 已离开名单
+                if self._name_bg is None:
+                    self._name_bg = row[1].cget('bg')
+                row[1].config(bg=colors.get(student, self._name_bg))
+        board.highlight = colors
 
     def update_ui_language(self):
         """更新UI语言"""
         # 更新窗口标题
-        title = self.translations.get('class_display_board', '班级表扬榜')
-        if self.current_file:
-            title += f' - {os.path.basename(self.current_file)}'
-        if self.modified:
-            title += ' *'
-        self.root.title(title)
+        self.redraw.mark_title()
         
         # 更新时间显示标签
-        self.time_label.config(text=self.translations.get('class_display_board', '班级实时表现公示栏'))
+        self.apply_clock_preferences()
         
-        # 注意：菜单项的语言更新需要重新创建菜单，这里暂时不实现
-        # 因为Tkinter的菜单项不支持动态更新文本
+        # 原地更新菜单文字
+        for menu, index, key in self.menu_labels:
+            menu.entryconfig(index, label=self.translations[key])
+        if self.search_bar is not None:
+            self.search_bar.update_language()
 
-    def mark_modified(self, *args):
-        """标记数据已修改"""
-        self.modified = True
-        # 更新窗口标题显示修改状态
-        title = self.translations.get('class_display_board', '班级表扬榜')
+    def update_title(self):
+        """根据当前文件和修改状态刷新窗口标题（内容不变时不调用Tk）"""
+        title = self.translations['class_display_board']
         if self.current_file:
             title += f' - {os.path.basename(self.current_file)}'
         if self.modified:
             title += ' *'
-        self.root.title(title)
+        if title != self._title_text:
+            self._title_text = title
+            self.root.title(title)
+        label = self.board.label
+        if label != self.board.shown_label:
+            self.board.shown_label = label
+            self.notebook.tab(self.main_frame, text=label)
+
+    def mark_modified(self, *args):
+        """标记数据已修改"""
+        self.modified = True
+        # 更新窗口标题显示修改状态（空闲时统一刷新）
+        self.redraw.mark_title()
 
     def unmark_modified(self):
         """标记数据未修改"""
         self.modified = False
         # 更新窗口标题
-        title = self.translations.get('class_display_board', '班级表扬榜')
-        if self.current_file:
-            title += f' - {os.path.basename(self.current_file)}'
-        self.root.title(title)
+        self.redraw.mark_title()
 
     def toggle_fullscreen(self):
         """切换全屏模式"""
@@ -392,287 +1074,412 @@ class PraiseBoard:
         """保存数据到文件"""
         if self.current_file:
             # 如果已经有当前文件，直接保存
-            if self._save_to_file(self.current_file):
-                self.unmark_modified()
-                return True
+            board = self.board
+            revision = board.revision
+            board_journal = board.journal
+            checkpoint = board_journal.checkpoint() if board_journal is not None else None
+
+            def on_saved():
+                # 只清除快照已包含的日志记录
+                if board_journal is not None and board_journal is board.journal:
+                    board_journal.reset(checkpoint)
+                if board.revision == revision:
+                    board.modified = False
+                    self.redraw.mark_title()
+
+            return self._save_to_file(self.current_file, on_saved)
         else:
             # 否则调用另存为
             return self.save_as_data()
-        return False
 
     def save_as_data(self):
         """另存为数据到文件"""
+        from tkinter import filedialog
         # 获取文件保存路径
         file_path = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=BOARD_FILETYPES,
             title="保存表扬榜数据"
         )
         
         if file_path:
-            if self._save_to_file(file_path):
-                self.current_file = file_path
-                self.unmark_modified()
-                return True
+            import shared_board
+            board = self.board
+            revision = board.revision
+            board_journal = board.journal
+            checkpoint = board_journal.checkpoint() if board_journal is not None else None
+            # 另存为：直接覆盖目标文件，之后的保存再与其他程序的修改合并
+            self.shared_files[os.path.abspath(file_path)] = shared_board.SharedBoard(file_path)
+
+            def on_saved():
+                # 写入成功后才切换到新文件；保存失败时仍是原文件和原日志
+                old_file = board.current_file
+                board.current_file = file_path
+                if old_file and os.path.abspath(old_file) != os.path.abspath(file_path) \
+                        and all(other.current_file != old_file for other in self.boards):
+                    self.shared_files.pop(os.path.abspath(old_file), None)
+                if board_journal is not None and board_journal is board.journal:
+                    # 只保留快照之后的记录，日志改名后跟随新文件
+                    board_journal.reset(checkpoint)
+                    board_journal.close()
+                    board.journal = None
+                    try:
+                        os.replace(board_journal.path, journal.journal_path(file_path))
+                        board.journal = journal.BoardJournal(file_path)
+                    except OSError:
+                        pass
+                if board.revision == revision:
+                    board.modified = False
+                self.redraw.mark_title()
+
+            return self._save_to_file(file_path, on_saved)
         return False
 
-    def _save_to_file(self, file_path):
-        """内部保存方法"""
-        try:
-            # 准备保存的数据
-            data_to_save = {
-                'subject': self.subject_combo.get(),
-                'mode': self.mode.get(),
-                'students': {}
-            }
-            
-            # 收集学生状态
-            for student, state in self.students.items():
-                data_to_save['students'][student] = {
-                    'praise': state['praise'].get(),
-                    'criticism': state['criticism'].get()
-                }
-            
-            # 写入文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=4)
-                
-            messagebox.showinfo("成功", self.translations.get('save_success', '数据已成功保存！'))
-            return True
-            
-        except Exception as e:
-            messagebox.showerror("错误", self.translations.get('save_error', '保存数据时出错: ') + str(e))
+    @property
+    def history(self):
+        """历史存档，打开失败时为 None"""
+        with self._history_lock:
+            if self._history is None:
+                import history
+                import sqlite3
+                try:
+                    self._history = history.BoardHistory()
+                except sqlite3.Error:
+                    self._history = False
+            return self._history or None
+
+    def write_board(self, file_path, data):
+        """后台线程：合并其他程序的修改后写入文件，并记入历史存档"""
+        data = self.shared_files[os.path.abspath(file_path)].save(data)
+        archive = self.history
+        if archive is not None:
+            import sqlite3
+            try:
+                archive.record(data, file_path)
+            except sqlite3.Error:
+                pass  # 存档失败不影响保存
+
+    def _save_to_file(self, file_path, on_saved=None):
+        """内部保存方法：在界面线程取状态快照，由后台线程合并其他程序的修改后编码并原子写入"""
+        # 准备保存的数据
+        data_to_save = self.state.to_dict()
+        key = os.path.abspath(file_path)
+        if key not in self.shared_files:
+            import shared_board
+            self.shared_files[key] = shared_board.SharedBoard(file_path)
+        board = self.board
+
+        def after_save():
+            if on_saved is not None:
+                on_saved()
+            if board is self.board:
+                self.apply_merges()
+        
+        # 交给后台线程写入，结果由 poll_saves 处理
+        self.saver.save(file_path, data_to_save, after_save)
+        self.show_status(self.translations['saving'])
+        if self._save_poll_job is None:
+            self._save_poll_job = self.root.after(SAVE_POLL_MS, self.poll_saves)
+        return True
+
+    def apply_merges(self):
+        """把保存时合并进来的其他程序的修改应用到当前表扬榜，返回是否有修改
+
+        只应用保存之后本程序没有再修改的标记；文件中已包含这些修改，
+        应用前没有未保存的修改时应用后仍为未修改。这些修改不是本程序
+        做的：不作为撤销步骤，也不写入日志和同步发件箱。
+        """
+        shared = self.shared_files.get(os.path.abspath(self.current_file)) if self.current_file else None
+        merges = shared.take_merges() if shared is not None else []
+        if not merges:
             return False
+        modified = self.modified
+        state = self.state
+        self._merging = True
+        try:
+            with self.board.undo.paused():
+                for ours, merged in merges:
+                    self._apply_merge(state, ours, merged)
+        finally:
+            self._merging = False
+        if not modified:
+            self.unmark_modified()
+        self.show_status(self.translations['save_merged'])
+        return True
+
+    @staticmethod
+    def _apply_merge(state, ours, merged):
+        for key, setter in (('subject', state.set_subject), ('mode', state.set_mode)):
+            if merged[key] != ours[key] and getattr(state, key) == ours[key]:
+                setter(merged[key])
+        changes = []
+        for student, marks in merged['students'].items():
+            saved = ours['students'].get(student)
+            if saved is None or student not in state:
+                continue
+            changes.extend((student, mode, marks[mode]) for mode in MODES
+                           if marks[mode] != saved[mode] and state.get(student, mode) == saved[mode])
+        if changes:
+            state.set_many(changes)
+
+    def process_save_results(self):
+        """处理已完成的后台保存，返回是否全部成功"""
+        from tkinter import messagebox
+        success = True
+        while True:
+            try:
+                file_path, error, callbacks = self.saver.results.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                # 回调可能换成更具体的提示
+                self.show_status(self.translations['save_success'])
+                for callback in callbacks:
+                    callback()
+            else:
+                success = False
+                message = self.translations['save_error'] + str(error)
+                self.show_status(message, error=True)
+                messagebox.showerror(self.translations['error'], message)
+        return success
+
+    def poll_saves(self):
+        """定时检查后台保存结果"""
+        self._save_poll_job = None
+        self.process_save_results()
+        if self.saver.busy() or not self.saver.results.empty():
+            self._save_poll_job = self.root.after(SAVE_POLL_MS, self.poll_saves)
+
+    def wait_for_saves(self):
+        """等待进行中的保存完成，返回是否全部成功"""
+        self.saver.wait()
+        return self.process_save_results()
+
+    def show_status(self, text, error=False):
+        """在状态栏显示提示，几秒后自动清除"""
+        self.status_label.config(text=text, fg='red' if error else 'black')
+        if self._status_clear_job is not None:
+            self.root.after_cancel(self._status_clear_job)
+        self._status_clear_job = self.root.after(STATUS_CLEAR_MS, self.clear_status)
+
+    def clear_status(self):
+        self._status_clear_job = None
+        self.status_label.config(text='')
 
     def load_data(self):
         """从文件加载数据"""
-        # 检查是否有未保存的更改
-        if self.modified:
-            response = messagebox.askyesnocancel(
-                self.translations.get('save_changes', '保存更改'),
-                self.translations.get('save_before_load', '是否保存当前更改？')
-            )
-            if response is None:  # 取消
-                return
-            elif response:  # 是
-                if not self.save_data():
-                    return  # 如果保存失败，不继续加载
+        from tkinter import filedialog, messagebox
+        # 检查是否有未保存的更改，取消或保存失败时不继续加载
+        if not self.confirm_discard('save_before_load'):
+            return
         
         # 获取文件打开路径
         file_path = filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=BOARD_FILETYPES,
             title="打开表扬榜数据"
         )
         
         if not file_path or not os.path.exists(file_path):
             return
             
-        try:
-            # 读取文件
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        # 等待进行中的保存写完
+        if not self.wait_for_saves():
+            return
             
-            # 恢复学科和模式
-            if 'subject' in data:
-                self.subject_combo.set(data['subject'])
+        import shared_board
+        try:
+            # 读取文件，记下内容作为之后保存时合并的共同祖先
+            data, shared = shared_board.SharedBoard.load(file_path)
             
-            if 'mode' in data:
-                self.mode.set(data['mode'])
+            # 当前表扬榜的修改已保存或被放弃，不再需要它的日志
+            self.close_journal(discard=True)
             
-            # 恢复学生状态
-            if 'students' in data:
-                for student, state in data['students'].items():
-                    if student in self.students:
-                        self.students[student]['praise'].set(state.get('praise', False))
-                        self.students[student]['criticism'].set(state.get('criticism', False))
-                        
-                        # 更新显示
-                        self.update_check_display(student)
+            # 恢复学科、模式和学生状态（界面由 on_state_changed 统一刷新）
+            self.state.load_dict(data)
             
             self.current_file = file_path
+            self.shared_files[shared.path] = shared
             self.unmark_modified()
-            messagebox.showinfo("成功", self.translations.get('load_success', '数据已成功加载！'))
+            
+            # 重放该文件上次未保存的操作
+            self.open_journal()
+            messagebox.showinfo(self.translations['success'], self.translations['load_success'])
             
         except Exception as e:
-            messagebox.showerror("错误", self.translations.get('load_error', '加载数据时出错: ') + str(e))
+            messagebox.showerror(self.translations['error'], self.translations['load_error'] + str(e))
 
     def on_closing(self):
         """窗口关闭事件处理"""
-        # 检查是否有未保存的更改
-        if self.modified:
-            response = messagebox.askyesnocancel(
-                self.translations.get('save_changes', '保存更改'),
-                self.translations.get('save_before_exit', '是否保存更改后再退出？')
-            )
-            if response is None:  # 取消
-                return
-            elif response:  # 是
-                if not self.save_data():
-                    return  # 如果保存失败，不退出
+        # 检查每个表扬榜是否有未保存的更改，取消或保存失败时不退出
+        for tab in list(self.boards):
+            if tab.modified:
+                self.select_board(tab)
+                if not self.confirm_discard('save_before_exit'):
+                    return
+        
+        # 等待进行中的保存写完，保存失败时不退出
+        if not self.wait_for_saves():
+            return
+        self.saver.close()
+        self.watcher.close()
+        if self._history:
+            self._history.close()
+        if self.live is not None:
+            self.live.stop()
+        if self.sync is not None:
+            self.sync.stop()  # 未上传的事件留在发件箱，下次启动时继续上传
         
+        # 正常退出时修改已保存或被放弃，删除所有日志
+        self.close_journal(discard=True)
+        for tab in self.boards:
+            if tab.journal is not None:
+                tab.journal.close(True)
+                tab.journal = None
+        if self.perf.enabled:
+            try:
+                self.perf.dump()
+            except OSError:
+                pass
         self.root.quit()
 
+    def apply_clock_preferences(self):
+        """按首选项生成时间格式，并按需要的精度（秒或分钟）对齐刷新"""
+        self.format_clock, period = make_clock_formatter(
+            self.preferences.get('date_format', '年月日'),
+            self.preferences.get('time_format', '时分秒'))
+        self.clock.period = period
+        self.clock.start()
+
     def update_time(self):
-        """更新时间显示，根据首选项设置格式"""
-        # 获取当前时间
-        now = datetime.now()
-        
-        # 根据日期格式设置格式化日期
-        date_format = self.preferences.get('date_format', '年月日')
-        if date_format == '年月日':
-            date_str = now.strftime('%Y年%m月%d日')
-        elif date_format == '月日年':
-            date_str = now.strftime('%m月%d日%Y年')
-        else:  # 日月年
-            date_str = now.strftime('%d日%m月%Y年')
-        
-        # 根据时间格式设置格式化时间
-        time_format = self.preferences.get('time_format', '时分秒')
-        if time_format == '时分秒':
-            time_str = now.strftime('%H:%M:%S')
-        else:  # 时分
-            time_str = now.strftime('%H:%M')
-        
-        # 获取星期几
-        weekday_map = {'0': '日', '1': '一', '2': '二', '3': '三', '4': '四', '5': '五', '6': '六'}
-        weekday = weekday_map[now.strftime('%w')]
-        
-        # 组合时间字符串
-        current_time = f'{date_str} {time_str} 星期{weekday}'
-        
-        # 更新标签
-        self.time_label.config(text=current_time)
-        self.root.after(1000, self.update_time)
+        """更新时间显示，文本没有变化时不更新标签"""
+        current_time = self.format_clock(datetime.now())
+        if current_time != self._time_text:
+            self._time_text = current_time
+            self.time_label.config(text=current_time)
+
+    def open_journal(self, truncate=False):
+        """打开当前表扬榜的操作日志，先把已有日志重放到状态上"""
+        if not self.preferences.get('journal', True):
+            return
+        board_path = self.current_file or self.board.autosave
+        try:
+            if not truncate:
+                # 重放时日志尚未打开，不会被重复记录；有变化时自动标记为已修改
+                journal.replay(journal.journal_path(board_path), self.state)
+            self.journal = journal.BoardJournal(board_path, truncate=truncate)
+        except (OSError, ValueError, KeyError):
+            self.journal = None
+
+    def close_journal(self, discard=False):
+        """关闭操作日志"""
+        if self._journal_sync_job is not None:
+            self.root.after_cancel(self._journal_sync_job)
+            self._journal_sync_job = None
+        if self.journal is not None:
+            self.journal.close(discard)
+            self.journal = None
+
+    def record_journal(self, event, *args):
+        """把状态变化追加到操作日志"""
+        if self.journal is None or self._merging:
+            return
+        record = journal.record_for_event(self.state, event, *args)
+        if record is None:
+            return
+        self.journal.append(record)
+        if self.journal.unsynced and self._journal_sync_job is None:
+            self._journal_sync_job = self.root.after(JOURNAL_SYNC_MS, self.sync_journal)
+        if self.journal.needs_compaction():
+            self.journal.compact(self.state.to_dict())
+
+    def sync_journal(self):
+        """定时把日志落盘"""
+        self._journal_sync_job = None
+        if self.journal is not None:
+            self.journal.sync()
+
+    def on_state_changed(self, event, *args):
+        """状态模型变化回调，只在这里刷新界面"""
+        self.revision += 1
+        if event == 'mark':
+            student, mode, value = args
+            if mode == self.state.mode:
+                self.redraw.mark_student(student)
+        elif event == 'batch':
+            # 批量修改：一次修改通知，空闲时统一重绘
+            mode = self.state.mode
+            for student, changed_mode, value in args[0]:
+                if changed_mode == mode:
+                    self.redraw.mark_student(student)
+        elif event == 'mode':
+            self.redraw.mark_board()
+        elif event == 'subject':
+            if self.subject_combo.get() != self.state.subject:
+                self.subject_combo.set(self.state.subject)
+        elif event == 'roster':
+            self.redraw.mark_board()
+        elif event == 'load':
+            # 批量恢复后同步控件
+            if self.mode.get() != self.state.mode:
+                self.mode.set(self.state.mode)
+            self.subject_combo.set(self.state.subject)
+            self.redraw.mark_board()
+        self.mark_modified()
 
     def toggle_mode(self):
         # 切换模式时更新所有学生显示
-        for student in self.students:
+        if self.board.view is not None:
+            self.board.view.refresh()
+            return
+        for student in self.check_labels:
             self.update_check_display(student)
 
     def toggle_check(self, student, event=None):
-        current_mode = self.mode.get()
-        current_state = self.students[student][current_mode].get()
-        self.students[student][current_mode].set(not current_state)
-        
-        symbol = '✓' if current_mode == 'praise' else '✗'
-        color = 'green' if current_mode == 'praise' else 'red'
-        display_text = symbol if not current_state else ''
-        self.students[student]['check_label'].config(
-            text=display_text,
-            fg=color
-        )
+        self.state.toggle(student)
+
+    def toggle_group(self, students, event=None):
+        """切换整组学生（全部已标记时全部取消）"""
+        self.state.toggle_group(students)
+
+    def undo(self):
+        self.board.undo.undo()
+
+    def redo(self):
+        self.board.undo.redo()
 
     def update_check_display(self, student):
-        current_mode = self.mode.get()
-        state = self.students[student][current_mode].get()
+        if self.board.view is not None:
+            self.board.view.update_student(student)
+            return
+        current_mode = self.state.mode
+        state = self.state.get(student, current_mode)
         symbol = '✓' if current_mode == 'praise' else '✗'
         color = 'green' if current_mode == 'praise' else 'red'
         display_text = symbol if state else ''
-        self.students[student]['check_label'].config(
+        if self._check_display.get(student) == (display_text, color):
+            return
+        self._check_display[student] = (display_text, color)
+        self.check_labels[student].config(
             text=display_text,
             fg=color
         )
 
 
 if __name__ == '__main__':
-    # 创建locales目录（如果不存在）
-    if not os.path.exists('locales'):
-        os.makedirs('locales')
-    
-    # 创建默认语言文件（如果不存在）
-    default_languages = {
-        'zh_CN': {
-            'class_display_board': '班级实时表现公示栏',
-            'file': '文件',
-            'save': '保存',
-            'save_as': '另存为',
-            'open': '打开',
-            'preferences': '首选项',
-            'fullscreen': '全屏',
-            'exit': '退出',
-            'language': '语言',
-            'date_format': '日期格式',
-            'time_format': '时间格式',
-            'save_success': '数据已成功保存！',
-            'save_error': '保存数据时出错: ',
-            'load_success': '数据已成功加载！',
-            'load_error': '加载数据时出错: ',
-            'save_changes': '保存更改',
-            'save_before_exit': '是否保存更改后再退出？',
-            'save_before_load': '是否保存当前更改？'
-        },
-        'zh_TW': {
-            'class_display_board': '班級實時表現公示欄',
-            'file': '文件',
-            'save': '保存',
-            'save_as': '另存為',
-            'open': '打開',
-            'preferences': '首選項',
-            'fullscreen': '全螢幕',
-            'exit': '退出',
-            'language': '語言',
-            'date_format': '日期格式',
-            'time_format': '時間格式',
-            'save_success': '資料已成功保存！',
-            'save_error': '保存資料時出錯: ',
-            'load_success': '資料已成功載入！',
-            'load_error': '載入資料時出錯: ',
-            'save_changes': '保存更改',
-            'save_before_exit': '是否保存更改後再退出？',
-            'save_before_load': '是否保存當前更改？'
-        },
-        'en_US': {
-            'class_display_board': 'Class Performance Board',
-            'file': 'File',
-            'save': 'Save',
-            'save_as': 'Save As',
-            'open': 'Open',
-            'preferences': 'Preferences',
-            'fullscreen': 'Fullscreen',
-            'exit': 'Exit',
-            'language': 'Language',
-            'date_format': 'Date Format',
-            'time_format': 'Time Format',
-            'save_success': 'Data saved successfully!',
-            'save_error': 'Error saving data: ',
-            'load_success': 'Data loaded successfully!',
-            'load_error': 'Error loading data: ',
-            'save_changes': 'Save Changes',
-            'save_before_exit': 'Save changes before exiting?',
-            'save_before_load': 'Save current changes?'
-        },
-        'en_UK': {
-            'class_display_board': 'Class Performance Board',
-            'file': 'File',
-            'save': 'Save',
-            'save_as': 'Save As',
-            'open': 'Open',
-            'preferences': 'Preferences',
-            'fullscreen': 'Fullscreen',
-            'exit': 'Exit',
-            'language': 'Language',
-            'date_format': 'Date Format',
-            'time_format': 'Time Format',
-            'save_success': 'Data saved successfully!',
-            'save_error': 'Error saving data: ',
-            'load_success': 'Data loaded successfully!',
-            'load_error': 'Error loading data: ',
-            'save_changes': 'Save Changes',
-            'save_before_exit': 'Save changes before exiting?',
-            'save_before_load': 'Save current changes?'
-        }
-    }
-    
-    # 保存语言文件
-    for lang_code, translations in default_languages.items():
-        lang_file = f'locales/{lang_code}.json'
-        if not os.path.exists(lang_file):
-            try:
-                with open(lang_file, 'w', encoding='utf-8') as f:
-                    json.dump(translations, f, ensure_ascii=False, indent=4)
-            except:
-                pass
-    
-    root = tk.Tk()
-    app = PraiseBoard(root)
-    root.mainloop()
\ No newline at end of file
+    import perf_monitor
+    import startup_trace
+    trace = startup_trace.from_environment(origin=_IMPORT_START)
+    trace.add_phase('import', _IMPORT_START, _IMPORT_END)
+    with trace.phase('tk_init'):
+        root = tk.Tk()
+    perf = perf_monitor.from_environment()
+    live = live_server_address()
+    with trace.phase('board'):
+        app = PraiseBoard(root, trace, perf, live)
+    if trace.enabled:
+        # 第一次空闲时界面已完成绘制，写出记录
+        def write_trace():
+            trace.mark('first_idle')
+            trace.write()
+        root.after_idle(write_trace)
+    root.mainloop()
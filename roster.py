@@ -0,0 +1,185 @@
+"""学生名单读取（逐行读取 CSV/TSV/TXT，支持多个班级和任意分组）"""
+import csv
+import os
+from collections import namedtuple
+
+ROSTER_FILE = 'students_name.txt'
+DEFAULT_GROUP_SIZE = 4  # 名单未指定分组时每组人数
+
+# 表头别名 -> 字段名
+COLUMN_ALIASES = {
+    'name': 'name', '姓名': 'name', '名字': 'name',
+    'group': 'group', '组': 'group', '小组': 'group', '组号': 'group',
+    'seat': 'seat', '座号': 'seat', '座位': 'seat', '座位号': 'seat',
+    'id': 'id', '学号': 'id',
+    'class': 'class', '班级': 'class', '班': 'class',
+}
+DEFAULT_COLUMNS = ('name', 'group', 'seat', 'id', 'class')
+
+
+class Student(namedtuple('Student', 'key name group seat id')):
+    """名单中的一名学生，key 是状态和保存文件中使用的唯一名称"""
+    __slots__ = ()
+
+
+class Group:
+    """一个小组"""
+    __slots__ = ('label', 'students')
+
+    def __init__(self, label):
+        self.label = label
+        self.students = []
+
+    @property
+    def title(self):
+        return f'第{self.label}组' if self.label.isdigit() else self.label
+
+
+class Roster:
+    """一个班级的名单，按组保存学生"""
+
+    def __init__(self, name=''):
+        self.name = name
+        self.path = None  # 读取自哪个名单文件（绝对路径），用于文件修改后重新读取
+        self._groups = {}
+        self._ungrouped = []
+        self._keys = set()
+        self._counts = {}  # 姓名 -> 已添加的同名学生数
+        self._layout = None  # groups 的缓存，添加学生后失效
+
+    def add(self, name, group='', seat='', student_id=''):
+        """添加学生；同名学生用学号或同名中的序号区分
+
+        key 只取决于姓名、学号和此前同名学生的个数，名单中增删、调整
+        其他学生后不变，保存的标记仍对应同一名学生。
+        """
+        count = self._counts.get(name, 0) + 1
+        self._counts[name] = count
+        key = name
+        if count > 1 or key in self._keys:
+            label = student_id or str(count)
+            key = f'{name}（{label}）'
+            suffix = 2
+            while key in self._keys:  # 学号重复，或与名单中的其他名字相同
+                key = f'{name}（{label}-{suffix}）'
+                suffix += 1
+        self._keys.add(key)
+        self._layout = None
+        student = Student(key, name, group, seat, student_id)
+        if group:
+            if group not in self._groups:
+                self._groups[group] = Group(group)
+            self._groups[group].students.append(student)
+        else:
+            self._ungrouped.append(student)
+        return student
+
+    @property
+    def groups(self):
+        """按组号排列的分组；未分组的学生每 DEFAULT_GROUP_SIZE 人自动成组"""
+        if self._layout is not None:
+            return self._layout
+        groups = sorted(self._groups.values(), key=lambda g: _sort_key(g.label))
+        for group in groups:
+            group.students.sort(key=lambda s: _sort_key(s.seat))
+        used = {g.label for g in groups}
+        number = 1
+        for start in range(0, len(self._ungrouped), DEFAULT_GROUP_SIZE):
+            while str(number) in used:
+                number += 1
+            group = Group(str(number))
+            group.students = self._ungrouped[start:start + DEFAULT_GROUP_SIZE]
+            groups.append(group)
+            number += 1
+        self._layout = groups
+        return groups
+
+    def names(self):
+        """按显示顺序排列的学生名称（key）"""
+        return [s.key for group in self.groups for s in group.students]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def _sort_key(value):
+    """数字按数值排序，其余按文本排序，空值排最后"""
+    if value.isdigit():
+        return (0, int(value), '')
+    return (1 if value else 2, 0, value)
+
+
+def _header_columns(row):
+    """识别表头，返回字段名元组；不是表头时返回 None"""
+    columns = tuple(COLUMN_ALIASES.get(cell.strip().lower()) for cell in row)
+    return columns if 'name' in columns else None
+
+
+def read_rosters(lines, delimiter=None):
+    """逐行读取名单，返回 {班级名: Roster}（保持出现顺序）
+
+    delimiter 为 None 时按纯文本处理：每行一个姓名，'[班级名]' 行开始
+    一个新班级，'#' 开头的行为注释。否则按 CSV/TSV 解析，第一行可以是
+    表头（name/group/seat/id/class 或 姓名/组/座号/学号/班级），
+    没有表头时按 DEFAULT_COLUMNS 的顺序解释各列。
+    """
+    rosters = {}
+
+    def roster_for(class_name):
+        roster = rosters.get(class_name)
+        if roster is None:
+            roster = rosters[class_name] = Roster(class_name)
+        return roster
+
+    if delimiter is None:
+        current = ''
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('[') and line.endswith(']'):
+                current = line[1:-1].strip()
+                continue
+            roster_for(current).add(line)
+        return rosters
+
+    reader = csv.reader(lines, delimiter=delimiter)
+    positions = None  # 字段名 -> 列号
+    for row in reader:
+        if not row:
+            continue
+        if positions is None:
+            columns = _header_columns(row)
+            header = columns is not None
+            positions = {column: i for i, column in enumerate(columns or DEFAULT_COLUMNS)
+                         if column}
+            getters = [positions.get(c) for c in ('name', 'class', 'group', 'seat', 'id')]
+            if header:
+                continue
+        name, class_name, group, seat, student_id = [
+            row[i].strip() if i is not None and i < len(row) else '' for i in getters]
+        if not name:
+            continue
+        roster = rosters.get(class_name)
+        if roster is None:
+            roster = roster_for(class_name)
+        roster.add(name, group, seat, student_id)
+    return rosters
+
+
+def load_rosters(path):
+    """按扩展名读取名单文件（.csv 逗号分隔，.tsv 制表符分隔，其余为纯文本）"""
+    ext = os.path.splitext(path)[1].lower()
+    delimiter = {'.csv': ',', '.tsv': '\t'}.get(ext)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        rosters = read_rosters(f, delimiter)
+    for roster in rosters.values():
+        roster.path = os.path.abspath(path)
+    return rosters
+
+
+def pick_roster(rosters, class_name=None):
+    """从读取结果中选出指定班级（默认第一个）的名单"""
+    if class_name in rosters:
+        return rosters[class_name]
+    return next(iter(rosters.values()), Roster())
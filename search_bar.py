@@ -0,0 +1,91 @@
+"""查找学生的搜索栏（Ctrl+F 打开，第一次打开时才导入）
+
+输入姓名、名字或拼音首字母，每次按键查询当前表扬榜的 NameIndex，
+在表扬榜上高亮匹配的学生；上下键选择，Enter 切换选中学生的标记，
+Esc 关闭。
+"""
+import tkinter as tk
+
+SHOWN_RESULTS = 8  # 搜索栏中列出的姓名数
+
+
+class SearchBar:
+    """表扬榜上方的搜索栏"""
+
+    def __init__(self, app, bg):
+        self.app = app
+        self.frame = tk.Frame(app.root, bg=bg)
+        self.label = tk.Label(self.frame, text=app.translations['find'], font=('宋体', 14), bg=bg)
+        self.label.pack(side='left')
+        self.text = tk.StringVar()
+        self.entry = tk.Entry(self.frame, textvariable=self.text, font=('宋体', 18), width=16)
+        self.entry.pack(side='left', padx=10)
+        self.results_label = tk.Label(self.frame, text='', font=('宋体', 14), bg=bg, anchor='w')
+        self.results_label.pack(side='left', fill='x', expand=True)
+        self.results = []
+        self.selected = 0
+        self.visible = False
+
+        self.text.trace_add('write', lambda *args: self.search())
+        self.entry.bind('<Return>', self.on_enter)
+        self.entry.bind('<KP_Enter>', self.on_enter)
+        self.entry.bind('<Down>', lambda e: self.move(1))
+        self.entry.bind('<Up>', lambda e: self.move(-1))
+        self.entry.bind('<Escape>', lambda e: self.hide())
+
+    def show(self):
+        if not self.visible:
+            self.frame.pack(before=self.app.notebook, fill='x', padx=20)
+            self.visible = True
+        self.entry.focus_set()
+        self.entry.select_range(0, 'end')
+        self.search()
+
+    def hide(self):
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
+        self.results = []
+        self.app.highlight_students([])
+        self.app.root.focus_set()
+
+    def update_language(self):
+        self.label.config(text=self.app.translations['find'])
+        self.show_results()
+
+    def search(self):
+        """按当前输入查询，选中第一个结果"""
+        if not self.visible:
+            return
+        self.results = self.app.search_index().search(self.text.get())
+        self.selected = 0
+        self.show_results()
+
+    def move(self, step):
+        if self.results:
+            self.selected = (self.selected + step) % len(self.results)
+            self.show_results()
+        return 'break'
+
+    def show_results(self):
+        index = self.app.search_index()
+        if not self.results:
+            text = self.app.translations['no_match'] if self.text.get().strip() else ''
+        else:
+            # 列出选中的学生附近的几个结果，选中的加方括号
+            first = max(0, min(self.selected - SHOWN_RESULTS // 2, len(self.results) - SHOWN_RESULTS))
+            names = []
+            for i in range(first, min(first + SHOWN_RESULTS, len(self.results))):
+                name = index.name(self.results[i])
+                names.append(f'[{name}]' if i == self.selected else name)
+            text = '  '.join(names)
+        self.results_label.config(text=text)
+        selected = self.results[self.selected] if self.results else None
+        self.app.highlight_students(self.results, selected)
+
+    def on_enter(self, event=None):
+        """切换选中学生的标记，然后全选输入，直接输入下一个姓名"""
+        if self.results:
+            self.app.toggle_check(self.results[self.selected])
+        self.entry.select_range(0, 'end')
+        return 'break'
@@ -0,0 +1,218 @@
+"""多个程序同时编辑同一表扬榜文件（如办公室几台电脑共用的文件）
+
+保存时在文件锁（建议锁）内检查磁盘上的文件在本程序上次读写后是否被
+修改：先比较 stat（修改时间、大小、inode），有变化时才读出内容比较
+哈希；内容确实变了就以上次读写的内容为共同祖先，对每名学生的表扬/
+批评标记做三方合并后再写入，不会覆盖其他程序保存的标记。平时点击
+标记不读文件，只有保存时才检查。
+
+保存的文档带有版本号（'version'），每次保存加一。
+"""
+import hashlib
+import os
+import threading
+import time
+
+import storage
+from board_state import MODES
+from file_watcher import file_stamp
+
+LOCK_TIMEOUT = 10  # 等待其他程序释放文件锁的最长时间（秒）
+LOCK_RETRY = 0.05
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_path(path):
+    """文件锁使用的旁路文件：保存时用 os.replace 替换目标文件，锁在目标文件上会随之失效
+
+    锁文件只在加锁期间存在，释放时删除。
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f'.{filename}.lock')
+
+
+class FileLock:
+    """跨进程的建议锁（POSIX 用 flock，Windows 用 msvcrt.locking）
+
+    只约束同样加锁的程序；超时抛出 TimeoutError。释放时删除锁文件，
+    等待中的程序拿到锁后发现锁文件已被删除（或换成了新文件）会重新加锁。
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = lock_path(path)
+        self.timeout = timeout
+        self._file = None
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            lock_file = open(self.path, 'a+b')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                lock_file.close()
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f'文件被其他程序锁定: {self.path}') from None
+                time.sleep(LOCK_RETRY)
+                continue
+            if self._is_current(lock_file):
+                self._file = lock_file
+                return
+            lock_file.close()  # 锁住的是上一个持有者已删除的锁文件
+
+    def _is_current(self, lock_file):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return os.path.samestat(stat, os.fstat(lock_file.fileno()))
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            # 持有锁时删除，没有其他程序在用这个锁文件（Windows 上打开的文件删不掉时保留）
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def digest(payload):
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _read_file(path):
+    """读取文件：返回 (内容, 时间戳)"""
+    with open(path, 'rb') as f:
+        payload = f.read()
+        stat = os.fstat(f.fileno())
+    return payload, (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _merge_value(base, ours, theirs):
+    """只有对方修改时取对方的值，否则取本方的值"""
+    return theirs if ours == base else ours
+
+
+def merge(base, ours, theirs):
+    """三方合并三个表扬榜数据，返回合并结果
+
+    每名学生的每个标记单独合并：只有一方相对 base 修改时取修改后的值；
+    标记只有两种值，双方都修改时结果相同，不会冲突。学科和模式双方都
+    修改时以本方为准。只在一方中的学生：对方新增的保留，对方删除而
+    本方没有修改的删除，一方删除而另一方修改的保留修改。
+    """
+    merged = {key: _merge_value(base.get(key), ours.get(key), theirs.get(key, ours.get(key)))
+              for key in ('subject', 'mode')}
+    base_students = base.get('students', {})
+    our_students = ours.get('students', {})
+    their_students = theirs.get('students', {})
+    students = {}
+    for name in list(our_students) + [name for name in their_students if name not in our_students]:
+        before = base_students.get(name)
+        mine = our_students.get(name)
+        other = their_students.get(name)
+        if mine is None or other is None:
+            kept = mine if other is None else other
+            if before is None or kept != before:
+                students[name] = kept  # 新增，或删除的同时另一方修改了
+            continue
+        before = before or other  # 双方都新增时以本方为准
+        students[name] = {mode: _merge_value(before.get(mode, False), mine.get(mode, False),
+                                             other.get(mode, False))
+                          for mode in MODES}
+    merged['students'] = students
+    return merged
+
+
+class SharedBoard:
+    """本程序打开的一个表扬榜文件：记录上次读写时的时间戳、内容哈希、
+    文档版本和内容（三方合并的共同祖先）
+
+    save 在保存线程中调用，合并结果由界面线程用 take_merges 取出。
+    """
+
+    def __init__(self, path, base=None, stamp=None, payload_digest=None):
+        self.path = os.path.abspath(path)
+        self.base = base  # None：没有读过，保存时直接覆盖（另存为）
+        self.stamp = stamp
+        self.digest = payload_digest
+        self.version = base.get('version', 0) if base else 0
+        self._merges = []  # (本方数据, 合并结果)，合并了其他程序的修改时登记
+        self._merges_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """读取文件，返回 (数据, SharedBoard)
+
+        读取不加锁：保存都是原子替换，读到的总是完整的文件；只读目录中的文件也能打开。
+        """
+        payload, stamp = _read_file(path)
+        data = storage.decode_board(path, payload)
+        return data, cls(path, data, stamp, digest(payload))
+
+    def changed_on_disk(self):
+        """磁盘上的文件在上次读写后是否被修改：返回修改后的数据，没有修改时返回 None
+
+        先比较 stat，只有 stat 变化时才读文件比较哈希（只是被 touch 的文件不算修改）。
+        须在持有文件锁时调用。
+        """
+        if self.base is None or file_stamp(self.path) in (self.stamp, None):
+            return None
+        payload, stamp = _read_file(self.path)
+        if digest(payload) == self.digest:
+            self.stamp = stamp
+            return None
+        return storage.decode_board(self.path, payload)
+
+    def save(self, data):
+        """在锁内合并磁盘上的修改后写入，返回实际写入的数据"""
+        with FileLock(self.path):
+            theirs = self.changed_on_disk()
+            version = self.version
+            if theirs is not None:
+                version = max(version, theirs.get('version', 0))
+                merged = merge(self.base, data, theirs)
+                with self._merges_lock:
+                    self._merges.append((data, merged))
+            else:
+                merged = dict(data)
+            merged['version'] = version + 1
+            payload = storage.encode_board(self.path, merged)
+            storage.write_payload(self.path, payload)
+            self.stamp = file_stamp(self.path)
+        self.digest = digest(payload)
+        self.base = merged
+        self.version = merged['version']
+        return merged
+
+    def take_merges(self):
+        """取出保存时做过的合并（界面线程调用）"""
+        with self._merges_lock:
+            merges, self._merges = self._merges, []
+        return merges
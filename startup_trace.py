@@ -0,0 +1,89 @@
+"""启动耗时记录
+
+设置环境变量 PRAISE_BOARD_PROFILE_STARTUP（值为 1 或输出路径），或用
+--profile-startup[=路径] 启动时，记录导入、首选项和语言、名单、控件
+创建以及第一次空闲的时间点，写入 JSON 文件（默认 startup_profile.json）。
+"""
+import contextlib
+import json
+import platform
+import sys
+import time
+
+import cli_flags
+
+ENV_VAR = 'PRAISE_BOARD_PROFILE_STARTUP'
+FLAG = '--profile-startup'
+DEFAULT_OUTPUT = 'startup_profile.json'
+
+
+class StartupTrace:
+    """记录各启动阶段的开始时间和耗时（毫秒，相对于 origin）"""
+
+    enabled = True
+
+    def __init__(self, output, origin=None):
+        self.output = output
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+        self.marks = {}
+
+    def _now(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = self._now()
+        try:
+            yield
+        finally:
+            self.phases.append({'name': name, 'start_ms': round(start, 3),
+                                'duration_ms': round(self._now() - start, 3)})
+
+    def add_phase(self, name, start, end):
+        """记录一个已知起止时间（perf_counter 秒）的阶段"""
+        self.phases.append({'name': name,
+                            'start_ms': round((start - self.origin) * 1000, 3),
+                            'duration_ms': round((end - start) * 1000, 3)})
+
+    def mark(self, name):
+        self.marks[name] = round(self._now(), 3)
+
+    def write(self):
+        """写出记录，返回文件路径"""
+        report = {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'phases': self.phases,
+            'marks': self.marks,
+            'total_ms': round(self._now(), 3),
+        }
+        with open(self.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        return self.output
+
+
+class NullTrace:
+    """未开启记录时使用，所有操作都不做任何事"""
+
+    enabled = False
+
+    def phase(self, name):
+        return contextlib.nullcontext()
+
+    def add_phase(self, name, start, end):
+        pass
+
+    def mark(self, name):
+        pass
+
+    def write(self):
+        return None
+
+
+def from_environment(argv=None, environ=None, origin=None):
+    """根据命令行参数和环境变量创建记录器，未开启时返回 NullTrace"""
+    output = cli_flags.flag_value(FLAG, ENV_VAR, argv, environ)
+    if output is None:
+        return NullTrace()
+    return StartupTrace(output or DEFAULT_OUTPUT, origin)
@@ -0,0 +1,145 @@
+"""表扬榜文件读写（原子替换、后台保存）"""
+import json
+import os
+import queue
+import threading
+
+import binary_board
+
+
+def is_binary(path):
+    """按扩展名判断是否为二进制格式"""
+    return os.path.splitext(path)[1].lower() == binary_board.BINARY_EXT
+
+
+BOARD_EXTS = ('.json', binary_board.BINARY_EXT)
+
+
+def find_boards(sources, exclude=None):
+    """展开文件和目录，返回其中表扬榜文件（.json/.pboard）的绝对路径
+
+    目录递归查找，跳过隐藏文件和目录以及 exclude 目录。
+    """
+    exclude = os.path.abspath(exclude) if exclude else None
+    found = []
+    for source in sources:
+        source = os.path.abspath(source)
+        if os.path.isfile(source):
+            found.append(source)
+            continue
+        for directory, dirs, files in os.walk(source):
+            dirs[:] = [d for d in dirs
+                       if os.path.join(directory, d) != exclude and not d.startswith('.')]
+            for filename in files:
+                if filename.lower().endswith(BOARD_EXTS) and not filename.startswith('.'):
+                    found.append(os.path.join(directory, filename))
+    return sorted(set(found))
+
+
+def read_board(path):
+    """读取表扬榜文件（按扩展名选择 JSON 或二进制格式）"""
+    if is_binary(path):
+        return binary_board.read(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def encode_board(path, data):
+    """按扩展名把表扬榜数据编码为字节"""
+    if is_binary(path):
+        return binary_board.encode(data)
+    return json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+
+
+def decode_board(path, payload):
+    """按扩展名解码已读入的表扬榜文件内容"""
+    if is_binary(path):
+        return binary_board.decode(payload)
+    return json.loads(payload.decode('utf-8'))
+
+
+def write_board(path, data):
+    """编码后原子写入"""
+    write_payload(path, encode_board(path, data))
+
+
+def write_payload(path, payload):
+    """写入临时文件并 fsync，再用 os.replace 原子替换目标文件"""
+    directory, filename = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f'.{filename}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class BackgroundSaver:
+    """后台保存线程
+
+    save() 只登记在界面线程取得的数据快照，编码和写入在工作线程完成；
+    同一文件尚未开始写入的多次保存合并为一次。写入结果
+    (路径, 异常或None, 回调列表) 放入 results 队列，由界面线程取出处理。
+    """
+
+    def __init__(self, writer=write_board):
+        self.writer = writer
+        self.results = queue.Queue()
+        self._cond = threading.Condition()
+        self._pending = {}  # 路径 -> (数据, 回调列表)
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, path, data, callback=None):
+        """登记一次保存，callback 在写入成功后由界面线程调用"""
+        with self._cond:
+            callbacks = self._pending.pop(path, (None, []))[1]
+            if callback is not None:
+                callbacks.append(callback)
+            self._pending[path] = (data, callbacks)
+            self._cond.notify_all()
+
+    def busy(self):
+        """是否还有未完成的保存"""
+        with self._cond:
+            return bool(self._pending) or self._writing
+
+    def wait(self):
+        """阻塞直到所有已登记的保存写入完成"""
+        with self._cond:
+            while self._pending or self._writing:
+                self._cond.wait()
+
+    def close(self):
+        """写完剩余数据后结束工作线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                data, callbacks = self._pending.pop(path)
+                self._writing = True
+            error = None
+            try:
+                self.writer(path, data)
+            except Exception as e:
+                error = e
+            self.results.put((path, error, callbacks))
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
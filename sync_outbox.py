@@ -0,0 +1,322 @@
+"""把表扬榜的状态变化同步到学校服务器（离线优先，只用标准库）
+
+状态变化在界面线程转换为事件（记录格式与操作日志相同，另加事件 id、
+设备 id、表扬榜名称和时间），立即写入本地 SQLite 发件箱（outbox.db）
+后返回，不等待网络。后台线程从发件箱按顺序取出一批事件，gzip 压缩后
+交给传输对象上传，成功后才删除；失败时按指数退避（带随机抖动）重试。
+事件 id 在写入发件箱时生成，重试时不变，服务器按 id 去重即可保证每个
+事件只处理一次。断网一天积压几千个事件时每批最多 BATCH_SIZE 个，连续
+上传直到发件箱清空。
+
+服务器拒绝的事件（4xx，408/429 除外）重试也不会成功：把这一批逐次对半
+拆开上传，找出被拒绝的事件移到 dead_letters 表，其余事件照常上传；无法
+序列化的记录在写入时就放进 dead_letters 表。
+
+传输对象只需提供 send(body, headers)，失败时抛出异常（不必重试时抛出
+PermanentError）；默认的 HttpTransport 以 POST 上传（Content-Encoding:
+gzip，JSON lines）。
+测试时可以换成其他传输对象，或运行本地替身服务器：
+
+    python sync_outbox.py --serve [端口]
+    python sync_outbox.py             显示发件箱中积压的事件数
+
+用首选项 sync_url 或环境变量 PRAISE_BOARD_SYNC 指定上传地址。
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+import journal
+
+OUTBOX_FILE = 'outbox.db'
+ENV_VAR = 'PRAISE_BOARD_SYNC'
+BATCH_SIZE = 500  # 每次上传的最多事件数
+SEND_DELAY = 1.0  # 有新事件后稍等再上传，连续点击合并为一批
+RETRY_BASE = 1.0  # 第一次重试前等待的秒数，之后每次加倍
+RETRY_MAX = 300.0
+TIMEOUT = 10.0  # 每次上传的超时（秒）
+DEFAULT_PORT = 8766  # 本地替身服务器的端口
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    body TEXT NOT NULL,
+    error TEXT NOT NULL,
+    time TEXT NOT NULL
+);
+'''
+
+
+class PermanentError(Exception):
+    """服务器拒绝了这批事件，原样重试也不会成功"""
+
+
+def retry_delay(failures):
+    """第 failures 次连续失败后等待的秒数（指数退避，带随机抖动避免各教室同时重试）"""
+    delay = min(RETRY_MAX, RETRY_BASE * 2 ** (failures - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')  # WAL 下每次提交不 fsync，断电最多丢最后几个事件
+    conn.execute('PRAGMA busy_timeout = 5000')
+    return conn
+
+
+class HttpTransport:
+    """以 HTTP POST 上传一批事件
+
+    4xx 响应（408 超时和 429 过多请求除外）抛出 PermanentError，
+    其他非 2xx 响应和网络错误以 OSError 抛出，稍后重试。
+    """
+
+    def __init__(self, url, timeout=TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, body, headers):
+        import urllib.request
+        import urllib.error
+        request = urllib.request.Request(self.url, data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code not in (408, 429):
+                raise PermanentError(f'HTTP {e.code} {e.reason}') from e
+            raise
+
+
+class SyncOutbox:
+    """持久化发件箱和后台上传线程
+
+    add 在界面线程调用，只写本地数据库；上传在工作线程中进行。
+    """
+
+    def __init__(self, transport, path=OUTBOX_FILE, batch_size=BATCH_SIZE):
+        self.transport = transport
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = _connect(path)  # 界面线程使用
+        self._conn.executescript(SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'device'").fetchone()
+        if row is None:
+            with self._conn:
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('device', ?)",
+                                   (uuid.uuid4().hex,))
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'device'").fetchone()
+        self.device = row[0]
+        self.failures = 0  # 连续上传失败的次数
+        self.last_error = None
+        self._cond = threading.Condition()
+        self._pending = True  # 发件箱中可能有事件（启动时上传上次留下的）
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, record, board=''):
+        """把一条记录作为事件写入发件箱，返回事件 id
+
+        发件箱已关闭时什么也不做，返回 None；无法序列化的记录移到
+        dead_letters 表，也返回 None。
+        """
+        if self._closed:
+            return None
+        event = {'id': uuid.uuid4().hex, 'device': self.device, 'board': board,
+                 'time': datetime.now().isoformat(timespec='milliseconds')}
+        event.update(record)
+        try:
+            body = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+            body.encode('utf-8')  # 孤立的代理字符上传时才会出错
+        except (TypeError, ValueError) as e:
+            with self._conn:
+                _dead_letter(self._conn, repr(event), e)
+            return None
+        with self._conn:
+            self._conn.execute('INSERT INTO events (body) VALUES (?)', (body,))
+        with self._cond:
+            self._pending = True
+            self._cond.notify()
+        return event['id']
+
+    def on_state_event(self, state, event, *args, board=''):
+        """BoardState 观察者回调"""
+        record = journal.stream_record_for_event(state, event, *args)
+        if record is not None:
+            self.add(record, board)
+
+    def backlog(self):
+        """发件箱中尚未上传的事件数"""
+        return self._conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def dead_letters(self):
+        """被服务器拒绝或无法序列化的事件数"""
+        return self._conn.execute('SELECT COUNT(*) FROM dead_letters').fetchone()[0]
+
+    def stop(self, timeout=1.0):
+        """结束上传线程（最多等 timeout 秒，正在进行的上传不等完）；未上传的事件留到下次启动
+
+        之后的 add（例如关闭窗口前最后的状态变化）什么也不做。
+        """
+        if self._conn is None:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._conn.close()
+        self._conn = None
+
+    # ---- 工作线程 ----
+
+    def _run(self):
+        conn = _connect(self.path)
+        try:
+            while self._wait():
+                self._send_batches(conn)
+        finally:
+            conn.close()
+
+    def _wait(self):
+        """等到有事件（或退避结束）时返回 True，关闭时返回 False"""
+        with self._cond:
+            if self.failures:
+                self._cond.wait_for(lambda: self._closed, retry_delay(self.failures))
+            else:
+                self._cond.wait_for(lambda: self._closed or self._pending)
+                if not self._closed:
+                    self._cond.wait_for(lambda: self._closed, SEND_DELAY)
+            self._pending = False
+            return not self._closed
+
+    def _send_batches(self, conn):
+        """连续上传直到发件箱清空或上传失败"""
+        limit = self.batch_size
+        while not self._closed:
+            rows = conn.execute('SELECT seq, body FROM events ORDER BY seq LIMIT ?',
+                                (limit,)).fetchall()
+            if not rows:
+                return
+            body = gzip.compress(('\n'.join(row[1] for row in rows) + '\n').encode('utf-8'))
+            headers = {'Content-Type': 'application/x-ndjson; charset=utf-8',
+                       'Content-Encoding': 'gzip', 'X-Board-Device': self.device}
+            try:
+                self.transport.send(body, headers)
+            except PermanentError as e:
+                self.failures = 0
+                if len(rows) > 1:
+                    limit = len(rows) // 2  # 对半拆开，找出被拒绝的事件
+                    continue
+                with conn:
+                    _dead_letter(conn, rows[0][1], e)
+                    conn.execute('DELETE FROM events WHERE seq = ?', (rows[0][0],))
+                limit = self.batch_size
+                continue
+            except Exception as e:  # 传输对象可替换，其他错误都稍后重试
+                self.failures += 1
+                self.last_error = e
+                return
+            self.failures = 0
+            self.last_error = None
+            with conn:
+                conn.execute('DELETE FROM events WHERE seq <= ?', (rows[-1][0],))
+
+
+def _dead_letter(conn, body, error):
+    conn.execute('INSERT INTO dead_letters (body, error, time) VALUES (?, ?, ?)',
+                 (body, f'{type(error).__name__}: {error}',
+                  datetime.now().isoformat(timespec='milliseconds')))
+
+
+def make_server(port=DEFAULT_PORT, verbose=False):
+    """本地替身服务器：接收上传，按事件 id 去重
+
+    去重后的事件按收到的顺序放在 server.received 中；不是 JSON lines 或
+    事件没有 id 时回应 400。port 为 0 时由系统分配端口。
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    seen = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            try:
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+                events = [json.loads(line) for line in body.decode('utf-8').splitlines() if line]
+                ids = [event['id'] for event in events]
+            except (OSError, ValueError, TypeError, KeyError):
+                self.send_response(400)
+                self.end_headers()
+                return
+            with lock:
+                new = [event for event, event_id in zip(events, ids) if event_id not in seen]
+                seen.update(event['id'] for event in new)
+                server.received.extend(new)
+                total = len(seen)
+            if verbose:
+                print(f'{self.headers.get("X-Board-Device")}: {len(events)} events, '
+                      f'{len(new)} new, {total} total', flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.received = []
+    return server
+
+
+def serve(port=DEFAULT_PORT):
+    """运行本地替身服务器，打印收到的事件数"""
+    server = make_server(port, verbose=True)
+    print(f'http://127.0.0.1:{server.server_address[1]}/', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='表扬榜同步发件箱')
+    parser.add_argument('--serve', nargs='?', type=int, const=DEFAULT_PORT, metavar='端口',
+                        help='运行本地替身服务器')
+    parser.add_argument('--outbox', default=OUTBOX_FILE, help='显示发件箱中积压的事件数')
+    args = parser.parse_args(argv)
+    if args.serve is not None:
+        serve(args.serve)
+    elif os.path.exists(args.outbox):
+        conn = _connect(args.outbox)
+        print(conn.execute('SELECT COUNT(*) FROM events').fetchone()[0], 'events pending')
+        conn.close()
+    else:
+        print('0 events pending')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""binary_board 的测试：往返编码，以及截断或损坏的文件抛出 ValueError
+
+    python -m pytest test_binary_board.py
+"""
+import os
+import tempfile
+import unittest
+
+import binary_board
+
+DATA = {
+    'subject': '数学',
+    'mode': 'criticism',
+    'students': {
+        f'学生{i}': {'praise': i % 3 == 0, 'criticism': i % 5 == 0} for i in range(21)
+    },
+}
+
+
+class BinaryBoardTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        self.assertEqual(binary_board.decode(binary_board.encode(DATA)), DATA)
+        versioned = dict(DATA, version=7)
+        self.assertEqual(binary_board.decode(binary_board.encode(versioned)), versioned)
+
+    def test_empty_board(self):
+        empty = {'subject': '', 'mode': 'praise', 'students': {}}
+        self.assertEqual(binary_board.decode(binary_board.encode(empty)), empty)
+
+    def test_read_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'board' + binary_board.BINARY_EXT)
+            with open(path, 'wb') as f:
+                f.write(binary_board.encode(DATA))
+            with binary_board.BinaryBoard(path) as board:
+                self.assertEqual(len(board), 21)
+                self.assertEqual(board.subject, '数学')
+                self.assertEqual(board.marked('praise'), list(range(0, 21, 3)))
+                self.assertEqual(board.name(3), '学生3')
+            self.assertEqual(binary_board.read(path), DATA)
+
+    def test_nul_in_name_is_rejected(self):
+        with self.assertRaises(ValueError):
+            binary_board.encode({'students': {'张\0三': {}}})
+
+    def test_every_truncation_is_rejected(self):
+        for data in (DATA, dict(DATA, version=3)):
+            payload = binary_board.encode(data)
+            for size in range(len(payload)):
+                with self.subTest(version='version' in data, size=size):
+                    with self.assertRaises(ValueError):
+                        binary_board.decode(payload[:size])
+
+    def test_corrupt_header_is_rejected(self):
+        payload = bytearray(binary_board.encode(DATA))
+        for offset, value in ((0, ord('X')),  # magic
+                              (4, 9),  # 格式版本
+                              (6, 2)):  # 模式
+            with self.subTest(offset=offset):
+                corrupt = bytearray(payload)
+                corrupt[offset] = value
+                with self.assertRaises(ValueError):
+                    binary_board.decode(bytes(corrupt))
+        with self.assertRaises(ValueError):
+            binary_board.decode(bytes(payload) + b'\0')  # 多余的字节
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""board_batch 的测试：process_board 对文件执行操作并原子写回
+
+    python -m pytest test_board_batch.py
+"""
+import json
+import os
+import tempfile
+import unittest
+
+import board_batch
+import storage
+
+BOARD = {'subject': '语文', 'mode': 'praise', 'version': 4,
+         'students': {'张三': {'praise': False, 'criticism': False},
+                      '李四': {'praise': True, 'criticism': False}}}
+
+
+class ProcessBoardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'board.json')
+        storage.write_board(self.path, BOARD)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_ops(self, ops, path=None, **options):
+        return board_batch.process_board((path or self.path, ops, options))
+
+    def test_ops_are_applied_and_version_bumped(self):
+        ops = [board_batch.parse_op(text) for text in ('mark:张三', 'subject:数学', 'copy:praise:criticism')]
+        result = self.run_ops(ops)
+        self.assertTrue(result['ok'], result)
+        self.assertEqual((result['praise'], result['criticism']), (2, 2))
+        data = storage.read_board(self.path)
+        self.assertEqual(data['subject'], '数学')
+        self.assertEqual(data['version'], 5)
+        self.assertTrue(data['students']['张三']['criticism'])
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, '.board.json.lock')))
+
+    def test_failing_op_leaves_file_unchanged(self):
+        result = self.run_ops([{'op': 'mark', 'student': '张三'}, {'op': 'mark', 'student': '王五'}])
+        self.assertFalse(result['ok'])
+        self.assertIn('王五', result['error'])
+        self.assertEqual(storage.read_board(self.path), BOARD)
+
+    def test_dry_run_and_check_do_not_write(self):
+        result = self.run_ops([{'op': 'reset'}], dry_run=True)
+        self.assertTrue(result['changed'])
+        self.assertNotIn('output', result)
+        self.assertTrue(self.run_ops([], check=True)['ok'])
+        self.assertEqual(storage.read_board(self.path), BOARD)
+
+    def test_check_reports_malformed_board(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'students': {'张三': True}}, f)
+        result = self.run_ops([], check=True)
+        self.assertFalse(result['ok'])
+        self.assertIn('张三', result['error'])
+
+    def test_convert_to_binary_in_output_directory(self):
+        output = os.path.join(self.directory.name, 'out')
+        result = self.run_ops([], output=output, format='pboard')
+        self.assertTrue(result['ok'], result)
+        self.assertEqual(result['output'], os.path.join(output, 'board.pboard'))
+        self.assertEqual(storage.read_board(result['output'])['students'], BOARD['students'])
+
+    def test_create_missing_board(self):
+        path = os.path.join(self.directory.name, 'new.json')
+        self.assertFalse(self.run_ops([{'op': 'add', 'student': '王五'}], path=path)['ok'])
+        result = self.run_ops([{'op': 'add', 'student': '王五'}, {'op': 'mark', 'student': '王五'}],
+                              path=path, create=True)
+        self.assertTrue(result['ok'], result)
+        self.assertEqual(storage.read_board(path)['students'], {'王五': {'praise': True, 'criticism': False}})
+
+    def test_plan_keeps_op_order_per_file(self):
+        other = os.path.join(self.directory.name, 'other.json')
+        ops = [{'op': 'reset'}, {'op': 'mark', 'student': '张三', 'file': other}, {'op': 'invert'}]
+        plan = dict(board_batch.plan([self.path], ops))
+        self.assertEqual(plan[os.path.abspath(self.path)], [{'op': 'reset'}, {'op': 'invert'}])
+        self.assertEqual([op['op'] for op in plan[other]], ['reset', 'mark', 'invert'])
+
+
+if __name__ == '__main__':
+    unittest.main()
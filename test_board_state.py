@@ -0,0 +1,118 @@
+"""board_state 的测试：标记、通知、序列化和撤销/重做
+
+    python -m pytest test_board_state.py
+"""
+import unittest
+
+from board_state import BoardState, UndoStack
+
+NAMES = ['张三', '李四', '王五']
+
+
+class BoardStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = BoardState(NAMES)
+        self.events = []
+        self.state.subscribe(lambda event, *args: self.events.append((event,) + args))
+
+    def test_set_notifies_only_on_change(self):
+        self.state.set('张三', True, 'praise')
+        self.state.set('张三', True, 'praise')
+        self.assertTrue(self.state.get('张三', 'praise'))
+        self.assertFalse(self.state.get('张三', 'criticism'))
+        self.assertEqual(self.events, [('mark', '张三', 'praise', True)])
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.state.set('张三', True, 'reward')
+        with self.assertRaises(ValueError):
+            BoardState(NAMES, mode='reward')
+
+    def test_round_trip_through_dict(self):
+        self.state.set('李四', True, 'criticism')
+        self.state.set_subject('数学')
+        self.state.set_mode('criticism')
+        data = self.state.to_dict()
+        self.assertEqual(data['students']['李四'], {'praise': False, 'criticism': True})
+
+        loaded = BoardState(NAMES + ['赵六'])
+        data['students']['不在名单'] = {'praise': True}
+        loaded.load_dict(data)
+        self.assertEqual((loaded.subject, loaded.mode), ('数学', 'criticism'))
+        self.assertEqual(loaded.marked('criticism'), ['李四'])
+        self.assertNotIn('不在名单', loaded)
+
+    def test_remove_student_keeps_other_marks(self):
+        self.state.set('王五', True, 'praise')
+        self.state.remove_student('张三')
+        self.assertEqual(self.state.names, ('李四', '王五'))
+        self.assertEqual(self.state.index('王五'), 1)
+        self.assertTrue(self.state.get('王五', 'praise'))
+
+    def test_set_many_notifies_once_with_actual_changes(self):
+        self.state.set('张三', True, 'praise')
+        applied = self.state.set_many([('张三', 'praise', True), ('李四', 'praise', 1)])
+        self.assertEqual(applied, [('李四', 'praise', True)])
+        self.assertEqual(self.events[-1], ('batch', [('李四', 'praise', True)]))
+
+    def test_set_many_is_all_or_nothing(self):
+        for changes, error in (([('张三', 'praise', True), ('不存在', 'praise', True)], KeyError),
+                               ([('张三', 'praise', True), ('李四', 'reward', True)], ValueError)):
+            with self.assertRaises(error):
+                self.state.set_many(changes)
+            self.assertFalse(self.state.get('张三', 'praise'))
+        self.assertEqual(self.events, [])
+
+    def test_set_roster_keeps_marks_of_remaining_students(self):
+        self.state.set('李四', True, 'praise')
+        self.state.set_roster(['李四', '赵六'])
+        self.assertEqual(self.state.marked('praise'), ['李四'])
+        self.assertEqual(self.events[-1], ('roster',))
+
+
+class UndoStackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = BoardState(NAMES)
+        self.undo = UndoStack(self.state)
+
+    def test_undo_and_redo_marks(self):
+        self.state.set('张三', True, 'praise')
+        self.state.set_many([('李四', 'criticism', True), ('王五', 'praise', True)])
+        self.assertTrue(self.undo.undo())
+        self.assertEqual(self.state.marked('criticism'), [])
+        self.assertEqual(self.state.marked('praise'), ['张三'])
+        self.assertTrue(self.undo.undo())
+        self.assertFalse(self.undo.undo())
+        self.assertEqual(self.state.count('praise'), 0)
+        self.assertTrue(self.undo.redo())
+        self.assertTrue(self.undo.redo())
+        self.assertEqual(self.state.marked('praise'), ['张三', '王五'])
+        self.assertEqual(self.state.marked('criticism'), ['李四'])
+
+    def test_new_change_clears_redo(self):
+        self.state.set('张三', True, 'praise')
+        self.undo.undo()
+        self.state.set('李四', True, 'praise')
+        self.assertFalse(self.undo.can_redo())
+
+    def test_load_and_roster_changes_clear_history(self):
+        self.state.set('张三', True, 'praise')
+        self.state.add_student('赵六')
+        self.assertFalse(self.undo.can_undo())
+        self.state.set('张三', False, 'praise')
+        self.state.load_dict(self.state.to_dict())
+        self.assertFalse(self.undo.can_undo())
+
+    def test_paused_changes_are_not_undone(self):
+        self.state.set('张三', True, 'praise')
+        with self.undo.paused():
+            self.state.set('李四', True, 'praise')  # 其他程序的修改
+        self.undo.undo()
+        self.assertEqual(self.state.marked('praise'), ['李四'])
+        self.assertFalse(self.undo.can_undo())
+
+
+if __name__ == '__main__':
+    unittest.main()
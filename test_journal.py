@@ -0,0 +1,95 @@
+"""journal 的测试：重放、断电写了一半的最后一行、压缩和按检查点清除
+
+    python -m pytest test_journal.py
+"""
+import os
+import tempfile
+import unittest
+
+import journal
+from board_state import BoardState
+
+NAMES = ['张三', '李四', '王五']
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.board_path = os.path.join(self.directory.name, 'board.json')
+        self.state = BoardState(NAMES)
+        self.log = journal.BoardJournal(self.board_path, batch_size=2, truncate=True)
+        self.state.subscribe(self.record)
+
+    def tearDown(self):
+        self.log.close()
+        self.directory.cleanup()
+
+    def record(self, event, *args):
+        record = journal.record_for_event(self.state, event, *args)
+        if record is not None:
+            self.log.append(record)
+
+    def replayed(self):
+        self.log.sync()
+        state = BoardState(NAMES)
+        count = journal.replay(self.log.path, state)
+        return count, state
+
+    def test_replay_restores_changes(self):
+        self.state.set('张三', True, 'praise')
+        self.state.set_many([('李四', 'criticism', True), ('王五', 'praise', True)])
+        self.state.set_subject('数学')
+        self.state.set_mode('criticism')
+        count, state = self.replayed()
+        self.assertEqual(count, 4)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+
+    def test_torn_last_line_is_ignored(self):
+        self.state.set('张三', True, 'praise')
+        self.state.set('李四', True, 'praise')
+        self.log.sync()
+        with open(self.log.path, 'a', encoding='utf-8') as f:
+            f.write('{"op":"mark","student":"王五","mo')  # 断电时写了一半
+        state = BoardState(NAMES)
+        self.assertEqual(journal.replay(self.log.path, state), 2)
+        self.assertEqual(state.marked('praise'), ['张三', '李四'])
+
+    def test_reset_keeps_records_after_checkpoint(self):
+        self.state.set('张三', True, 'praise')
+        checkpoint = self.log.checkpoint()
+        self.state.set('李四', True, 'praise')  # 保存进行中的修改
+        self.log.reset(checkpoint)
+        count, state = self.replayed()
+        self.assertEqual(count, 1)
+        self.assertEqual(state.marked('praise'), ['李四'])
+
+    def test_reset_after_compaction_keeps_everything(self):
+        self.state.set('张三', True, 'praise')
+        checkpoint = self.log.checkpoint()
+        self.log.compact(self.state.to_dict())
+        self.log.wait()
+        self.state.set('李四', True, 'praise')
+        self.log.reset(checkpoint)  # 日志已被改写，检查点失效
+        count, state = self.replayed()
+        self.assertEqual(count, 2)  # 快照 + 压缩后的修改
+        self.assertEqual(state.marked('praise'), ['张三', '李四'])
+
+    def test_compaction_replaces_history_with_snapshot(self):
+        for _ in range(5):
+            self.state.toggle('王五', 'criticism')
+        self.log.compact(self.state.to_dict())
+        self.log.wait()
+        count, state = self.replayed()
+        self.assertEqual(count, 1)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+
+    def test_close_with_discard_removes_file(self):
+        self.state.set('张三', True, 'praise')
+        self.log.close(discard=True)
+        self.assertFalse(os.path.exists(self.log.path))
+        self.log = journal.BoardJournal(self.board_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
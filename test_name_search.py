@@ -0,0 +1,55 @@
+"""name_search 的测试：前缀、名字和拼音首字母检索，名单变化时增量更新
+
+    python -m pytest test_name_search.py
+"""
+import unittest
+
+import name_search
+import roster
+
+
+def make_roster(names):
+    board_roster = roster.Roster()
+    for name in names:
+        board_roster.add(name)
+    return board_roster
+
+
+class NameSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = name_search.NameIndex(make_roster(['张三丰', '张小明', '李四', '欧阳修', 'Mary Ann']))
+
+    def test_pinyin_initials(self):
+        self.assertEqual(name_search.pinyin_initials('张三丰'), 'zsf')
+        self.assertEqual(name_search.pinyin_initials('李A1'), 'la1')
+        self.assertEqual(name_search.initial_of('・'), '')
+
+    def test_prefix_search(self):
+        self.assertEqual(sorted(self.index.search('张')), ['张三丰', '张小明'])
+        self.assertEqual(self.index.search('李四'), ['李四'])
+        self.assertEqual(self.index.search('王'), [])
+        self.assertEqual(self.index.search('  '), [])
+
+    def test_given_name_and_initials(self):
+        self.assertEqual(self.index.search('三丰'), ['张三丰'])
+        self.assertEqual(self.index.search('修'), ['欧阳修'])
+        self.assertEqual(self.index.search('ZS'), ['张三丰'])
+        self.assertEqual(self.index.search('sf'), ['张三丰'])
+        self.assertEqual(sorted(self.index.search('z')), ['张三丰', '张小明'])
+        self.assertEqual(self.index.search('ann'), ['Mary Ann'])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search('z', limit=1)), 1)
+
+    def test_update_adds_and_removes_students(self):
+        self.index.update(make_roster(['张三丰', '李四', '王五']))
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.search('张'), ['张三丰'])
+        self.assertEqual(self.index.search('ww'), ['王五'])
+        self.assertEqual(self.index.search('xm'), [])
+        self.assertEqual(self.index.name('王五'), '王五')
+
+
+if __name__ == '__main__':
+    unittest.main()
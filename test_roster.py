@@ -0,0 +1,40 @@
+"""roster 的测试：同名学生的 key 唯一且不随名单中的位置变化
+
+    python -m pytest test_roster.py
+"""
+import unittest
+
+import roster
+
+
+def keys(rows):
+    board = roster.Roster()
+    return [board.add(*row).key for row in rows]
+
+
+class RosterKeyTest(unittest.TestCase):
+
+    def test_same_name_and_id_get_unique_keys(self):
+        result = keys([('张三', '', '', '7')] * 3)
+        self.assertEqual(result, ['张三', '张三（7）', '张三（7-2）'])
+
+    def test_key_does_not_depend_on_position(self):
+        self.assertEqual(keys([('张三',), ('李四',), ('张三',), ('张三（3）',)]),
+                         ['张三', '李四', '张三（2）', '张三（3）'])
+        # 在前面插入其他学生后，同名学生的 key 不变
+        self.assertEqual(keys([('王五',), ('张三',), ('赵六',), ('张三',)]),
+                         ['王五', '张三', '赵六', '张三（2）'])
+
+    def test_key_avoids_existing_names(self):
+        self.assertEqual(keys([('张三（2）',), ('张三',), ('张三',)]),
+                         ['张三（2）', '张三', '张三（2-2）'])
+
+    def test_read_rosters_keeps_keys_unique(self):
+        rosters = roster.read_rosters(['张三', '张三', '张三', '[二班]', '张三'])
+        names = rosters[''].names()
+        self.assertEqual(len(set(names)), 3)
+        self.assertEqual(rosters['二班'].names(), ['张三'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""shared_board 的测试：三方合并的各种情况，以及两个程序先后保存同一文件
+
+    python -m pytest test_shared_board.py
+"""
+import os
+import tempfile
+import unittest
+
+import shared_board
+import storage
+
+
+def board(subject='语文', mode='praise', **students):
+    return {'subject': subject, 'mode': mode,
+            'students': {name: {'praise': marks[0], 'criticism': marks[1]}
+                         for name, marks in students.items()}}
+
+
+class MergeTest(unittest.TestCase):
+
+    def test_each_side_keeps_its_own_changes(self):
+        base = board(张三=(False, False), 李四=(False, False))
+        ours = board(张三=(True, False), 李四=(False, False))
+        theirs = board(张三=(False, False), 李四=(False, True))
+        merged = shared_board.merge(base, ours, theirs)
+        self.assertEqual(merged['students'], board(张三=(True, False), 李四=(False, True))['students'])
+
+    def test_same_change_on_both_sides(self):
+        base = board(张三=(False, False))
+        both = board(张三=(True, False))
+        self.assertEqual(shared_board.merge(base, both, both)['students'], both['students'])
+
+    def test_subject_and_mode_conflict_prefers_ours(self):
+        base = board()
+        ours = board(subject='数学')
+        theirs = board(subject='英语', mode='criticism')
+        merged = shared_board.merge(base, ours, theirs)
+        self.assertEqual((merged['subject'], merged['mode']), ('数学', 'criticism'))
+
+    def test_students_added_and_removed(self):
+        base = board(张三=(False, False), 李四=(False, False), 王五=(False, False))
+        # 对方新增赵六、删除李四；本方删除王五，但对方修改了王五
+        ours = board(张三=(False, False), 李四=(False, False))
+        theirs = board(张三=(False, False), 王五=(True, False), 赵六=(False, True))
+        students = shared_board.merge(base, ours, theirs)['students']
+        self.assertEqual(list(students), ['张三', '王五', '赵六'])
+        self.assertEqual(students['王五'], {'praise': True, 'criticism': False})
+
+    def test_added_on_both_sides(self):
+        base = board()
+        ours = board(张三=(True, False))
+        theirs = board(张三=(False, True))
+        self.assertEqual(shared_board.merge(base, ours, theirs)['students']['张三'],
+                         {'praise': True, 'criticism': False})
+
+
+class SharedBoardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'board.json')
+        storage.write_board(self.path, board(张三=(False, False), 李四=(False, False)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_concurrent_saves_are_merged(self):
+        base, first = shared_board.SharedBoard.load(self.path)
+        _, second = shared_board.SharedBoard.load(self.path)
+        first.save(board(张三=(True, False), 李四=(False, False)))
+        written = second.save(board(张三=(False, False), 李四=(False, True)))
+        self.assertEqual(written['students'], board(张三=(True, False), 李四=(False, True))['students'])
+        self.assertEqual(written['version'], 2)
+        self.assertEqual(len(second.take_merges()), 1)
+        self.assertEqual(second.take_merges(), [])
+        self.assertEqual(storage.read_board(self.path), written)
+        self.assertFalse(os.path.exists(shared_board.lock_path(self.path)))
+
+    def test_unchanged_file_is_not_merged(self):
+        _, shared = shared_board.SharedBoard.load(self.path)
+        os.utime(self.path)  # 只是被 touch
+        shared.save(board(张三=(True, False), 李四=(False, False)))
+        shared.save(board(张三=(True, True), 李四=(False, False)))
+        self.assertEqual(shared.take_merges(), [])
+        self.assertEqual(storage.read_board(self.path)['version'], 2)
+
+    def test_lock_times_out(self):
+        with shared_board.FileLock(self.path):
+            with self.assertRaises(TimeoutError):
+                shared_board.FileLock(self.path, timeout=0.1).acquire()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""sync_outbox 的测试：本地替身服务器（端口 0）上的顺序、重试、去重和清空
+
+    python -m pytest test_sync_outbox.py
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import sync_outbox
+from board_state import BoardState
+
+WAIT_SECONDS = 10
+
+
+class FlakyTransport:
+    """前 failures 次上传失败，之后交给 HttpTransport"""
+
+    def __init__(self, url, failures=0):
+        self.http = sync_outbox.HttpTransport(url, timeout=2)
+        self.failures = failures
+        self.attempts = 0
+
+    def send(self, body, headers):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise OSError('网络不可用')
+        self.http.send(body, headers)
+
+
+class SyncOutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        self._delays = sync_outbox.SEND_DELAY, sync_outbox.RETRY_BASE
+        sync_outbox.SEND_DELAY = 0.01
+        sync_outbox.RETRY_BASE = 0.01
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'outbox.db')
+        self.server = sync_outbox.make_server(0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+        self.outboxes = []
+
+    def tearDown(self):
+        for outbox in self.outboxes:
+            outbox.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+        sync_outbox.SEND_DELAY, sync_outbox.RETRY_BASE = self._delays
+
+    def open_outbox(self, transport, batch_size=sync_outbox.BATCH_SIZE):
+        outbox = sync_outbox.SyncOutbox(transport, self.path, batch_size)
+        self.outboxes.append(outbox)
+        return outbox
+
+    def wait_drained(self, outbox):
+        deadline = time.monotonic() + WAIT_SECONDS
+        while outbox.backlog():
+            if time.monotonic() > deadline:
+                self.fail(f'发件箱没有清空: {outbox.backlog()} events, {outbox.last_error!r}')
+            time.sleep(0.01)
+
+    def test_events_arrive_in_order(self):
+        outbox = self.open_outbox(sync_outbox.HttpTransport(self.url), batch_size=7)
+        ids = [outbox.add({'op': 'mark', 'student': str(i), 'mode': 'praise', 'value': True}, 'b')
+               for i in range(30)]
+        outbox.start()
+        self.wait_drained(outbox)
+        self.assertEqual([event['id'] for event in self.server.received], ids)
+        self.assertEqual(self.server.received[0]['board'], 'b')
+        self.assertEqual(self.server.received[0]['device'], outbox.device)
+
+    def test_retry_after_failure(self):
+        transport = FlakyTransport(self.url, failures=2)
+        outbox = self.open_outbox(transport)
+        outbox.start()
+        ids = [outbox.add({'op': 'subject', 'value': str(i)}) for i in range(5)]
+        self.wait_drained(outbox)
+        self.assertGreaterEqual(transport.attempts, 3)
+        self.assertEqual(outbox.failures, 0)
+        self.assertEqual([event['id'] for event in self.server.received], ids)
+
+    def test_resent_events_are_deduplicated(self):
+        # 上传成功但删除前程序退出：下次启动时同一批事件再上传一次
+        outbox = self.open_outbox(sync_outbox.HttpTransport(self.url))
+        ids = [outbox.add({'op': 'mode', 'value': 'criticism'}) for _ in range(3)]
+        rows = outbox._conn.execute('SELECT body FROM events ORDER BY seq').fetchall()
+        outbox.start()
+        self.wait_drained(outbox)
+        outbox.stop()
+        reopened = self.open_outbox(sync_outbox.HttpTransport(self.url))
+        with reopened._conn:
+            reopened._conn.executemany('INSERT INTO events (body) VALUES (?)', rows)
+        reopened.start()
+        self.wait_drained(reopened)
+        self.assertEqual([event['id'] for event in self.server.received], ids)
+
+    def test_rejected_event_goes_to_dead_letters(self):
+        outbox = self.open_outbox(sync_outbox.HttpTransport(self.url))
+        first = [outbox.add({'op': 'subject', 'value': str(i)}) for i in range(4)]
+        with outbox._conn:
+            outbox._conn.execute("INSERT INTO events (body) VALUES ('not json')")
+        last = [outbox.add({'op': 'subject', 'value': str(i)}) for i in range(3)]
+        self.assertIsNone(outbox.add({'op': 'subject', 'value': object()}))
+        outbox.start()
+        self.wait_drained(outbox)
+        self.assertEqual([event['id'] for event in self.server.received], first + last)
+        self.assertEqual(outbox.dead_letters(), 2)
+
+    def test_state_events_and_add_after_stop(self):
+        outbox = self.open_outbox(sync_outbox.HttpTransport(self.url))
+        state = BoardState(['张三', '李四'])
+        state.subscribe(lambda event, *args: outbox.on_state_event(state, event, *args))
+        outbox.start()
+        state.set('张三', True, 'praise')
+        state.add_student('王五')
+        self.wait_drained(outbox)
+        self.assertEqual([event['op'] for event in self.server.received], ['mark', 'snapshot'])
+        outbox.stop()
+        state.set('李四', True, 'praise')  # 关闭后的变化不再写入
+        self.assertIsNone(outbox.add({'op': 'subject', 'value': '数学'}))
+
+
+if __name__ == '__main__':
+    unittest.main()